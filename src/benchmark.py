@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+
+from methods.benchmark import Benchmark
+from methods.synthetic_data import SyntheticData
+
+
+# Run from the repository root, like main.py:
+#   python src/benchmark.py --scales 10 100
+# The suite drops and reloads its tables: point PGDATABASE at a scratch database.
+# --backend duckdb runs it on an embedded database instead (no server needed).
+db_parameters = {
+    "database_host": os.environ.get("PGHOST", "localhost"),
+    "database_port": int(os.environ.get("PGPORT", "5432")),
+    "database_name": os.environ.get("PGDATABASE", "bca_benchmark"),
+    "database_username": os.environ.get("PGUSER", "postgres"),
+    "database_password": os.environ.get("PGPASSWORD", ""),
+    "pool_min_size": 2,
+    "pool_max_size": 10,
+}
+
+parser = argparse.ArgumentParser(description="Time every loader, transform and report on synthetic data.")
+parser.add_argument("--scales", type=int, nargs="+", default=[10], help="multiples of the bundled data (10 100 1000)")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--data-dir", default="benchmark data")
+parser.add_argument("--baseline", default="benchmark data/baseline.json")
+parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown ratio flagged as a regression")
+parser.add_argument("--update-baseline", action="store_true")
+parser.add_argument("--generate-only", action="store_true", help="write the data files and stop")
+parser.add_argument("--backend", choices=["postgres", "duckdb"], default="postgres")
+parser.add_argument("--database-path", default=":memory:", help="DuckDB file for --backend duckdb")
+args = parser.parse_args()
+
+if args.backend == "duckdb":
+    db_parameters = {"backend": "duckdb", "database_path": args.database_path}
+
+if args.generate_only:
+    for scale in args.scales:
+        SyntheticData.generate(scale, args.data_dir, args.seed)
+    sys.exit(0)
+
+summary = Benchmark.suite(
+    db_parameters,
+    scales=args.scales,
+    seed=args.seed,
+    data_dir=args.data_dir,
+    baseline_path=args.baseline,
+    tolerance=args.tolerance,
+    update_baseline=args.update_baseline,
+)
+
+regressions = {label: s["regressions"] for label, s in summary.items() if s["regressions"]}
+if regressions:
+    for label, steps in regressions.items():
+        print(f"Regressions in {label}: {', '.join(steps)}")
+    sys.exit(1)
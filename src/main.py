@@ -6,6 +6,10 @@ from methods.database import Database
 from methods.report import Report
 from methods.aircraft import Aircraft
 from methods.plot import Plot
+from methods.pipeline import Pipeline
+from methods.coverage import Coverage
+from methods.route_network import RouteNetwork
+from methods.route_graph import RouteGraph
 
 
 db_parameters = {
@@ -13,32 +17,40 @@ db_parameters = {
     "database_password": "#",
     "database_host": "#",
     "database_port": #,
-    "database_name": "#"
+    "database_name": "#",
+    "pool_min_size": 2,   # connections kept open between steps
+    "pool_max_size": 10,  # concurrent report jobs wait beyond this
 }
+# No Postgres server? Run everything on an embedded DuckDB file instead:
+#db_parameters = {"backend": "duckdb", "database_path": "output data/airlines.duckdb"}
 
-#Airlines.load_airlines_to_db("input data/airlines.dat.txt", db_parameters)
-#AirlineRoutes.load_routes_to_db("input data/routes.dat.txt", db_parameters)
-#Airports.load_airports_to_db("input data/airports.dat.txt", db_parameters)
-#Aircraft.load_aircraft_to_db("input data/planes.dat.txt", db_parameters)
-#OperationalAirlines.create_table(db_parameters)
+# Loaders run concurrently; steps whose input files and upstream tables are
+# unchanged since their last run are skipped. force=True reruns everything.
+Pipeline.run(Pipeline.default_steps(), db_parameters, max_workers=4)
+# use_cache=True keeps typed Parquet copies of the parsed inputs in "output data/parsed cache" (git-ignored)
+# (reparsed only when a file's contents change):
+#Pipeline.run(Pipeline.default_steps(use_cache=True), db_parameters, max_workers=4)
+#AirlineRoutes.load_routes_to_db("input data/routes.dat.txt", db_parameters, use_copy=True, use_mmap=True) # memory-mapped reader, see Benchmark.routes_reader
+#AirlineRoutes.migrate_to_code_ids(db_parameters) # codes as CodeDictionary ids; then load with use_codes=True, decode via airline_routes_decoded
 #Database.print_table_length(db_parameters, "operational_airlines") # 1255 operational airlines 
-#AirlineRoutes.map_asia_flags(db_parameters)
 #AirlineRoutes.count_asia_routes(db_parameters)
 # 17855 departues and desitinations are in asia
-#Report.create_asia_report_table(db_parameters)
 #Database.print_table_length(db_parameters, "asia_report") #206 airlines 
-''' Plot.export_asia_report_flights_pie(
-        db_parameters,
-        output_png_path="output data/asia_report_flights_pie.png",
-        top_n=10,
-        also_export_excel=False,
-        output_excel_path="output data/pie_chart_asia_report_flights.xlsx",
-    )
-'''
-#Airports.add_columns(db_parameters)
-#Airports.calculate_flights_per_airport(db_parameters)
-#Report.get_airlines_using_top10_airports(db_parameters)
-Report.get_airlines_unique_airport_counts(db_parameters)
+#Database.print_pool_stats() # checkouts and pool wait time for this run
+# Per-step wall/CPU time, rows, bytes and DB round trips go to "output data/metrics/metrics.jsonl" (git-ignored);
+# PROFILE_STEP=load_routes (PROFILER=pyinstrument optional) profiles a single step.
+#Airports.enable_counter_triggers(db_parameters) # keep airport counters current on every route change
+#Airports.verify_flight_counts(db_parameters) # compare counters against a full recount
+
+# The hub-access notes below, recomputed from per-airline airport bitmaps:
+#coverage = Coverage.from_db(db_parameters)
+#coverage = Coverage(RouteGraph.from_files("input data")) # same, straight from the parsed-input cache
+#print(coverage.airlines_covering(coverage.top_hub_ids(10), at_least=5))
+# Transfer hubs rather than the busiest ones (hub_centrality pipeline step):
+#Report.get_airlines_using_top_airports(db_parameters, k=10, rank_by="betweenness")
+# Multi-hop connectivity between the top-10 hubs for the highlighted airlines:
+#groups = RouteNetwork.airline_groups(coverage.graph, Report.AIRLINE_COLORS)
+#print(RouteNetwork.connectivity_report(coverage.graph, groups, k=10, workers=4))
 
 ''' access to top 10 airports, considered as strategic hubs 
 China Southern Airlines 5/10 , 
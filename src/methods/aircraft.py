@@ -1,4 +1,7 @@
 from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.airline_routes import AirlineRoutes
+from methods.instrumentation import Instrumentation
 
 import csv
 from typing import Optional, Dict, Tuple
@@ -36,54 +39,45 @@ class Aircraft:
         except ValueError:
             return None
 
-    @staticmethod
-    def load_aircraft_to_db(file_path: str, db_parameters: dict):
-        """
-        Loads aircraft data into Postgres table `aircraft`.
-
-        Supports two input formats:
-          - 6 columns: name,iata,icao,seat_capacity,cargo_amount_cuft,source
-          - 7 columns: name,iata,icao,seat_capacity,source
-            (cargo_amount_cuft not present; stored as NULL)
-
-        Deduplicates by ICAO for safe ON CONFLICT upsert.
-        """
+    AIRCRAFT_COLUMNS = (
+        "name",
+        "iata_code",
+        "icao_code",
+        "seat_capacity",
+        "cargo_amount_cuft",
+        "source_of_capacity",
+    )
+
+    CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS aircraft (
+        aircraft_id         BIGSERIAL PRIMARY KEY,
+        name                TEXT,
+        iata_code           TEXT,
+        icao_code           TEXT,
+        seat_capacity       INTEGER,
+        cargo_amount_cuft   DOUBLE PRECISION,
+        source_of_capacity  TEXT
+    );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_aircraft_icao ON aircraft(icao_code);
+    CREATE INDEX IF NOT EXISTS idx_aircraft_iata ON aircraft(iata_code);
+    """
+
+    UPSERT_SQL = """
+    ON CONFLICT (icao_code) DO UPDATE SET
+        name               = EXCLUDED.name,
+        iata_code          = EXCLUDED.iata_code,
+        seat_capacity      = EXCLUDED.seat_capacity,
+        cargo_amount_cuft  = EXCLUDED.cargo_amount_cuft,
+        source_of_capacity = EXCLUDED.source_of_capacity
+    """
 
-        create_sql = """
-        CREATE TABLE IF NOT EXISTS aircraft (
-            aircraft_id         BIGSERIAL PRIMARY KEY,
-            name                TEXT,
-            iata_code           TEXT,
-            icao_code           TEXT,
-            seat_capacity       INTEGER,
-            cargo_amount_cuft   DOUBLE PRECISION,
-            source_of_capacity  TEXT
-        );
+    @staticmethod
+    def parse_aircraft(file_path: str) -> list:
         """
-
-        create_indexes_sql = """
-        CREATE UNIQUE INDEX IF NOT EXISTS ux_aircraft_icao ON aircraft(icao_code);
-        CREATE INDEX IF NOT EXISTS idx_aircraft_iata ON aircraft(iata_code);
+        Parse planes.dat into aircraft tuples, deduplicated by ICAO (last row wins).
+        The result is bounded by the number of distinct ICAO codes, not file size.
         """
-
-        insert_sql = """
-        INSERT INTO aircraft (
-            name,
-            iata_code,
-            icao_code,
-            seat_capacity,
-            cargo_amount_cuft,
-            source_of_capacity
-        )
-        VALUES %s
-        ON CONFLICT (icao_code) DO UPDATE SET
-            name               = EXCLUDED.name,
-            iata_code          = EXCLUDED.iata_code,
-            seat_capacity      = EXCLUDED.seat_capacity,
-            cargo_amount_cuft  = EXCLUDED.cargo_amount_cuft,
-            source_of_capacity = EXCLUDED.source_of_capacity;
-        """
-
         rows_by_icao: Dict[str, Tuple[
             Optional[str], Optional[str], str,
             Optional[str], Optional[str],
@@ -127,7 +121,49 @@ class Aircraft:
 
                 rows_by_icao[icao] = (name, iata, icao, seat_capacity, cargo_cuft, source)
 
-        rows = list(rows_by_icao.values())
+        return list(rows_by_icao.values())
+
+    @staticmethod
+    @Instrumentation.step(input_arg="file_path")
+    def load_aircraft_to_db(file_path: str, db_parameters: dict, use_copy: bool = False, chunk_size: int = 50000):
+        """
+        Loads aircraft data into Postgres table `aircraft`.
+
+        Supports two input formats:
+          - 6 columns: name,iata,icao,seat_capacity,cargo_amount_cuft,source
+          - 7 columns: name,iata,icao,seat_capacity,source
+            (cargo_amount_cuft not present; stored as NULL)
+
+        Deduplicates by ICAO for safe ON CONFLICT upsert.
+        use_copy=True streams rows through COPY + one set-based upsert instead.
+        """
+
+        if use_copy:
+            BulkLoader.copy_merge(
+                db_parameters,
+                "aircraft",
+                Aircraft.CREATE_SQL,
+                Aircraft.AIRCRAFT_COLUMNS,
+                Aircraft.parse_aircraft(file_path),
+                Aircraft.UPSERT_SQL,
+                chunk_size=chunk_size,
+            )
+            AirlineRoutes.build_route_equipment(db_parameters)
+            return
+
+        insert_sql = """
+        INSERT INTO aircraft (
+            name,
+            iata_code,
+            icao_code,
+            seat_capacity,
+            cargo_amount_cuft,
+            source_of_capacity
+        )
+        VALUES %s
+        """ + Aircraft.UPSERT_SQL
+
+        rows = Aircraft.parse_aircraft(file_path)
 
         if not rows:
             print("No aircraft rows found to insert.")
@@ -136,12 +172,15 @@ class Aircraft:
         conn = Database.get_connection(db_parameters)
         try:
             with conn.cursor() as cur:
-                cur.execute(create_sql)
-                cur.execute(create_indexes_sql)
+                cur.execute(Aircraft.CREATE_SQL)
                 execute_values(cur, insert_sql, rows, page_size=10000)
                 conn.commit()
             print(f"Inserted/updated {len(rows)} unique ICAO aircraft rows into `aircraft`.")
         except Exception as e:
             print("Error loading aircraft:", e)
+            return
         finally:
             conn.close()
+
+        # Equipment codes may resolve differently now
+        AirlineRoutes.build_route_equipment(db_parameters)
@@ -1,7 +1,22 @@
 from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.code_dictionary import CodeDictionary
+from methods.embedded import Embedded, EmbeddedCursor
+from methods.parsed_cache import ParsedCache
+from methods.regions import Regions
+from methods.airports import Airports
+from methods.geo import Geo
+from methods.instrumentation import Instrumentation
 
 
 import csv
+import hashlib
+import io
+import os
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import psycopg2
 from psycopg2.extras import execute_values
 
@@ -30,62 +45,37 @@ class AirlineRoutes:
         v = AirlineRoutes.nullify(value)
         return True if v == "Y" else False
 
-    @staticmethod
-    def load_routes_to_db(file_path: str, conn_params: dict):
-        """
-        Load OpenFlights routes.dat (or similar CSV) into PostgreSQL table `airline_routes`.
+    ROUTE_COLUMNS = (
+        "airline_code",
+        "airline_id",
+        "source_airport_code",
+        "source_airport_id",
+        "dest_airport_code",
+        "dest_airport_id",
+        "codeshare",
+        "stops",
+        "equipment",
+    )
 
-        Expected columns (9):
-        Airline, Airline ID, Source airport, Source airport ID,
-        Destination airport, Destination airport ID, Codeshare,
-        Stops, Equipment
-        """
+    CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS airline_routes (
+        route_id BIGSERIAL PRIMARY KEY,
 
-        # Map your conn_params naming (if you use the same dict style as before)
-        # If your dict is already psycopg2-style (host/user/password/database/port),
-        # you can delete this mapping and use conn_params directly.
-        pg_params = {
-            "host": conn_params.get("database_host", conn_params.get("host")),
-            "port": conn_params.get("database_port", conn_params.get("port")),
-            "database": conn_params.get("database_name", conn_params.get("database")),
-            "user": conn_params.get("database_username", conn_params.get("user")),
-            "password": conn_params.get("database_password", conn_params.get("password")),
-        }
+        airline_code          TEXT,     -- IATA or ICAO
+        airline_id            INTEGER,  -- OpenFlights airline id
 
-        create_sql = """
-        CREATE TABLE IF NOT EXISTS airline_routes (
-            route_id BIGSERIAL PRIMARY KEY,
-
-            airline_code          TEXT,     -- IATA or ICAO
-            airline_id            INTEGER,  -- OpenFlights airline id
-
-            source_airport_code   TEXT,     -- IATA or ICAO
-            source_airport_id     INTEGER,  -- OpenFlights airport id
-
-            dest_airport_code     TEXT,     -- IATA or ICAO
-            dest_airport_id       INTEGER,  -- OpenFlights airport id
-
-            codeshare             BOOLEAN,
-            stops                 INTEGER,
-            equipment             TEXT,
-
-            -- Natural key to prevent duplicates
-            CONSTRAINT airline_routes_uk UNIQUE (
-                airline_code,
-                airline_id,
-                source_airport_code,
-                source_airport_id,
-                dest_airport_code,
-                dest_airport_id,
-                codeshare,
-                stops,
-                equipment
-            )
-        );
-        """
+        source_airport_code   TEXT,     -- IATA or ICAO
+        source_airport_id     INTEGER,  -- OpenFlights airport id
+
+        dest_airport_code     TEXT,     -- IATA or ICAO
+        dest_airport_id       INTEGER,  -- OpenFlights airport id
 
-        insert_sql = """
-        INSERT INTO airline_routes (
+        codeshare             BOOLEAN,
+        stops                 INTEGER,
+        equipment             TEXT,
+
+        -- Natural key to prevent duplicates
+        CONSTRAINT airline_routes_uk UNIQUE (
             airline_code,
             airline_id,
             source_airport_code,
@@ -96,53 +86,420 @@ class AirlineRoutes:
             stops,
             equipment
         )
-        VALUES %s
-        ON CONFLICT ON CONSTRAINT airline_routes_uk DO NOTHING;
+    );
+    """
+
+    # Same target as ON CONSTRAINT airline_routes_uk, spelled out so DuckDB accepts it too
+    NATURAL_KEY_CONFLICT_SQL = f"ON CONFLICT ({', '.join(ROUTE_COLUMNS)}) DO NOTHING"
+
+    # parse_route_row as SQL over the raw fields, for the embedded in-engine load
+    DAT_EXPRESSIONS = (
+        Embedded.text(0), Embedded.integer(1), Embedded.text(2), Embedded.integer(3),
+        Embedded.text(4), Embedded.integer(5), Embedded.flag(6, "Y"), Embedded.integer(7),
+        Embedded.text(8),
+    )
+
+    # Column types of the ParsedCache copy (same order as ROUTE_COLUMNS)
+    ARROW_TYPES = ("string", "int32", "string", "int32", "string", "int32", "bool", "int32", "string")
+
+    # Hash-key variant: one BIGINT fingerprint replaces the nine-column natural key
+    ROUTE_KEY_CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS airline_routes (
+        route_id BIGSERIAL PRIMARY KEY,
+        route_key             BIGINT NOT NULL,  -- route_fingerprint of the natural key
+
+        airline_code          TEXT,
+        airline_id            INTEGER,
+
+        source_airport_code   TEXT,
+        source_airport_id     INTEGER,
+
+        dest_airport_code     TEXT,
+        dest_airport_id       INTEGER,
+
+        codeshare             BOOLEAN,
+        stops                 INTEGER,
+        equipment             TEXT
+    );
+    """
+
+    ROUTE_KEY_INDEXES_SQL = """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_airline_routes_route_key ON airline_routes(route_key);
+    CREATE INDEX IF NOT EXISTS idx_airline_routes_source_airport ON airline_routes(source_airport_id);
+    CREATE INDEX IF NOT EXISTS idx_airline_routes_dest_airport ON airline_routes(dest_airport_id);
+    CREATE INDEX IF NOT EXISTS idx_airline_routes_airline ON airline_routes(airline_id);
+    """
+
+    # Code-id variant: the four codes stored only as CodeDictionary ids (the
+    # columns, in ROUTE_COLUMNS order, and the natural key built on those ints)
+    CODED_KEY_COLUMNS = tuple(CodeDictionary.ROUTE_CODES.get(col, (col,))[0] for col in ROUTE_COLUMNS)
+    CODED_CONFLICT_SQL = f"ON CONFLICT ({', '.join(CODED_KEY_COLUMNS)}) DO NOTHING"
+    CODE_POSITIONS = tuple(i for i, col in enumerate(ROUTE_COLUMNS) if col in CodeDictionary.ROUTE_CODES)
+
+    CODED_CREATE_SQL = CodeDictionary.CREATE_SQL + f"""
+    CREATE TABLE IF NOT EXISTS airline_routes (
+        route_id BIGSERIAL PRIMARY KEY,
+
+        airline_code_id        INTEGER,  -- airline_codes.code_id
+        airline_id             INTEGER,
+
+        source_airport_code_id INTEGER,  -- airport_codes.code_id
+        source_airport_id      INTEGER,
+
+        dest_airport_code_id   INTEGER,  -- airport_codes.code_id
+        dest_airport_id        INTEGER,
+
+        codeshare              BOOLEAN,
+        stops                  INTEGER,
+        equipment_code_id      INTEGER,  -- equipment_codes.code_id
+
+        CONSTRAINT airline_routes_uk UNIQUE ({", ".join(CODED_KEY_COLUMNS)})
+    );
+    """
+
+    # airline_routes with the text codes back, for readers of the code-id schema.
+    # r.* comes last so columns added to the table later (region_pair,
+    # distance_km, ...) only append to the view and CREATE OR REPLACE still works.
+    DECODED_VIEW_SQL = """
+    CREATE OR REPLACE VIEW airline_routes_decoded AS
+    SELECT
+        al.code AS airline_code,
+        src.code AS source_airport_code,
+        dst.code AS dest_airport_code,
+        eq.code AS equipment,
+        r.*
+    FROM airline_routes r
+    LEFT JOIN airline_codes al ON al.code_id = r.airline_code_id
+    LEFT JOIN airport_codes src ON src.code_id = r.source_airport_code_id
+    LEFT JOIN airport_codes dst ON dst.code_id = r.dest_airport_code_id
+    LEFT JOIN equipment_codes eq ON eq.code_id = r.equipment_code_id;
+    """
+
+    @staticmethod
+    def is_coded(cur) -> bool:
+        """True once airline_routes is on the code-id schema (see migrate_to_code_ids)."""
+        return Database.column_exists(cur, "airline_routes", "airline_code_id")
+
+    @staticmethod
+    def routes_source(cur) -> str:
+        """
+        The relation to read routes with their text codes from: airline_routes,
+        or on the code-id schema the airline_routes_decoded view (re-created so
+        it carries every column the table has now).
         """
+        if not AirlineRoutes.is_coded(cur):
+            return "airline_routes"
+        cur.execute(AirlineRoutes.DECODED_VIEW_SQL)
+        return "airline_routes_decoded"
+
+    @staticmethod
+    def parse_route_row(row: list, line_num: int) -> tuple:
+        """Normalize one csv row of routes.dat into the `airline_routes` column tuple."""
+        if len(row) != 9:
+            raise ValueError(f"Line {line_num}: expected 9 columns, got {len(row)}: {row}")
+
+        airline_code = AirlineRoutes.nullify(row[0])
+        airline_id = AirlineRoutes.to_int_or_none(row[1])
+
+        source_code = AirlineRoutes.nullify(row[2])
+        source_id = AirlineRoutes.to_int_or_none(row[3])
+
+        dest_code = AirlineRoutes.nullify(row[4])
+        dest_id = AirlineRoutes.to_int_or_none(row[5])
+
+        codeshare = AirlineRoutes.to_bool_codeshare(row[6])
+
+        stops_raw = AirlineRoutes.nullify(row[7])
+        stops = None if stops_raw is None else int(stops_raw)
+
+        equipment = AirlineRoutes.nullify(row[8])
+
+        # airline_routes stores these as INTEGER; reject here so every reader agrees
+        for name, value in (("airline_id", airline_id), ("source_airport_id", source_id),
+                            ("dest_airport_id", dest_id), ("stops", stops)):
+            if value is not None and not -2**31 <= value < 2**31:
+                raise ValueError(f"Line {line_num}: {name} {value} is outside the INTEGER range of airline_routes.")
 
-        rows = []
+        return (
+            airline_code,
+            airline_id,
+            source_code,
+            source_id,
+            dest_code,
+            dest_id,
+            codeshare,
+            stops,
+            equipment
+        )
+
+    @staticmethod
+    def iter_routes(file_path: str):
+        """Stream parsed route tuples from routes.dat one line at a time."""
         with open(file_path, "r", encoding="utf-8", newline="") as f:
             reader = csv.reader(f)  # OpenFlights routes is comma-delimited with quotes as needed
             for line_num, row in enumerate(reader, start=1):
                 if not row:
                     continue
+                yield AirlineRoutes.parse_route_row(row, line_num)
+
+    @staticmethod
+    def split_byte_ranges(file_path: str, parts: int, min_chunk_bytes: int = 1 << 20):
+        """
+        Split a file into (start, end) byte ranges that begin and end on line boundaries.
+        Returns roughly `parts` ranges of at least min_chunk_bytes each.
+        """
+        size = os.path.getsize(file_path)
+        if size == 0:
+            return []
+
+        chunk = max(min_chunk_bytes, size // max(1, parts))
+        ranges = []
+        with open(file_path, "rb") as f:
+            start = 0
+            while start < size:
+                f.seek(min(start + chunk, size))
+                f.readline()  # move to the start of the next line
+                end = min(f.tell(), size)
+                ranges.append((start, end))
+                start = end
+        return ranges
+
+    @staticmethod
+    def parse_route_range(task: tuple):
+        """
+        Worker: parse one byte range of routes.dat into compact column arrays.
+
+        Returns (records_seen, columns, error) where `error` is None or
+        (local_record_number, raw_row) for the first row that failed to parse.
+        Integer columns are array('q') with a separate null mask so the result
+        pickles back to the parent cheaply.
+        """
+        file_path, start, end = task
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            text = f.read(end - start).decode("utf-8")
+
+        columns = {
+            "airline_code": [],
+            "airline_id": array("q"),
+            "source_airport_code": [],
+            "source_airport_id": array("q"),
+            "dest_airport_code": [],
+            "dest_airport_id": array("q"),
+            "codeshare": bytearray(),
+            "stops": array("q"),
+            "equipment": [],
+            "nulls": bytearray(),  # bit i set -> int column i is NULL (airline, source, dest, stops)
+        }
+
+        records = 0
+        reader = csv.reader(io.StringIO(text, newline=""))
+        for records, row in enumerate(reader, start=1):
+            if not row:
+                continue
+            try:
+                parsed = AirlineRoutes.parse_route_row(row, records)
+            except ValueError:
+                return records, columns, (records, row)
+
+            nulls = 0
+            for bit, (name, value) in enumerate((
+                ("airline_id", parsed[1]),
+                ("source_airport_id", parsed[3]),
+                ("dest_airport_id", parsed[5]),
+                ("stops", parsed[7]),
+            )):
+                if value is None:
+                    nulls |= 1 << bit
+                    value = 0
+                columns[name].append(value)
+
+            columns["airline_code"].append(parsed[0])
+            columns["source_airport_code"].append(parsed[2])
+            columns["dest_airport_code"].append(parsed[4])
+            columns["codeshare"].append(1 if parsed[6] else 0)
+            columns["equipment"].append(parsed[8])
+            columns["nulls"].append(nulls)
+
+        return records, columns, None
+
+    @staticmethod
+    def iter_route_columns(columns: dict):
+        """Turn one parse_route_range column block back into `airline_routes` tuples."""
+        airline_ids = columns["airline_id"]
+        source_ids = columns["source_airport_id"]
+        dest_ids = columns["dest_airport_id"]
+        stops = columns["stops"]
+        nulls = columns["nulls"]
+
+        for i in range(len(nulls)):
+            n = nulls[i]
+            yield (
+                columns["airline_code"][i],
+                None if n & 1 else airline_ids[i],
+                columns["source_airport_code"][i],
+                None if n & 2 else source_ids[i],
+                columns["dest_airport_code"][i],
+                None if n & 4 else dest_ids[i],
+                columns["codeshare"][i] == 1,
+                None if n & 8 else stops[i],
+                columns["equipment"][i],
+            )
+
+    @staticmethod
+    def parse_routes_parallel(file_path: str, workers: int = None):
+        """
+        Parse routes.dat in a process pool, one byte range per task.
 
-                if len(row) != 9:
-                    raise ValueError(f"Line {line_num}: expected 9 columns, got {len(row)}: {row}")
+        Results are yielded in file order and are identical to iter_routes,
+        including the line number in parse errors. At most 2 * workers ranges
+        are in flight, so memory stays bounded for multi-million line files.
+        Assumes no quoted field spans multiple lines (true for OpenFlights data).
+        """
+        workers = workers or os.cpu_count() or 1
+        ranges = AirlineRoutes.split_byte_ranges(file_path, workers * 4)
+        tasks = iter((file_path, start, end) for start, end in ranges)
 
-                airline_code = AirlineRoutes.nullify(row[0])
-                airline_id = AirlineRoutes.to_int_or_none(row[1])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(AirlineRoutes.parse_route_range, task))
+                if len(pending) >= workers * 2:
+                    break
 
-                source_code = AirlineRoutes.nullify(row[2])
-                source_id = AirlineRoutes.to_int_or_none(row[3])
+            line_offset = 0
+            while pending:
+                records, columns, error = pending.popleft().result()
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.append(pool.submit(AirlineRoutes.parse_route_range, next_task))
 
-                dest_code = AirlineRoutes.nullify(row[4])
-                dest_id = AirlineRoutes.to_int_or_none(row[5])
+                yield from AirlineRoutes.iter_route_columns(columns)
 
-                codeshare = AirlineRoutes.to_bool_codeshare(row[6])
+                if error is not None:
+                    local_num, row = error
+                    for future in pending:
+                        future.cancel()
+                    # Re-raise exactly what the serial parser would have raised
+                    AirlineRoutes.parse_route_row(row, line_offset + local_num)
 
-                stops_raw = AirlineRoutes.nullify(row[7])
-                stops = None if stops_raw is None else int(stops_raw)
+                line_offset += records
 
-                equipment = AirlineRoutes.nullify(row[8])
+    @staticmethod
+    def read_routes(file_path: str, workers: int = 1, use_cache: bool = False, use_mmap: bool = False):
+        """
+        Route tuples from routes.dat: serial for workers=1, process pool otherwise.
+        use_mmap=True parses with RoutesReader into a pyarrow Table (same rows).
+        use_cache=True returns the ParsedCache table instead (parsed that way on a miss).
+        """
+        if use_mmap:
+            from methods.routes_reader import RoutesReader  # imports this module
+            parse = lambda path: RoutesReader(path).to_arrow()
+        else:
+            parse = lambda path: AirlineRoutes.read_routes(path, workers)
+        if use_cache:
+            return ParsedCache.table(file_path, AirlineRoutes.ROUTE_COLUMNS, AirlineRoutes.ARROW_TYPES, parse)
+        if use_mmap:
+            with Instrumentation.phase("parse"):
+                return parse(file_path)
+        if workers and workers > 1:
+            return AirlineRoutes.parse_routes_parallel(file_path, workers)
+        return AirlineRoutes.iter_routes(file_path)
 
-                rows.append((
-                    airline_code,
-                    airline_id,
-                    source_code,
-                    source_id,
-                    dest_code,
-                    dest_id,
-                    codeshare,
-                    stops,
-                    equipment
-                ))
+    @staticmethod
+    @Instrumentation.step(input_arg="file_path")
+    def load_routes_to_db(
+        file_path: str,
+        conn_params: dict,
+        use_copy: bool = False,
+        chunk_size: int = 50000,
+        workers: int = 1,
+        use_route_key: bool = False,
+        use_cache: bool = False,
+        use_mmap: bool = False,
+        use_codes: bool = False,
+    ):
+        """
+        Load OpenFlights routes.dat (or similar CSV) into PostgreSQL table `airline_routes`.
+
+        Expected columns (9):
+        Airline, Airline ID, Source airport, Source airport ID,
+        Destination airport, Destination airport ID, Codeshare,
+        Stops, Equipment
+
+        use_copy=True streams rows through COPY into an unlogged staging table
+        (chunk_size rows at a time) and merges them in one statement.
+        workers > 1 parses the file in that many processes (same rows, same order).
+        use_route_key=True uses the hash-key schema (see migrate_to_route_key):
+        duplicates are resolved on the indexed route_key column.
+        use_cache=True reads the parsed rows from ParsedCache (parsing only when
+        the file changed) and COPYs them straight from Arrow.
+        use_mmap=True parses with the memory-mapped RoutesReader instead of
+        csv.reader (workers is then ignored).
+        use_codes=True uses the code-id schema (see migrate_to_code_ids): codes
+        are replaced by CodeDictionary ids and duplicates are resolved on the
+        id columns (always through COPY + merge).
+        On the embedded backend DuckDB reads the file itself in parallel, or
+        scans the Arrow table with use_cache/use_mmap (use_copy and workers
+        are moot; the route_key schema is Postgres-only).
+        """
+        if use_route_key:
+            Database.require_postgres(conn_params, "The route_key schema")
+            if use_codes:
+                raise ValueError("use_route_key and use_codes are alternative schemas; pick one.")
+
+        if Database.is_embedded(conn_params) and not (use_cache or use_mmap or use_codes):
+            Embedded.load_dat(
+                conn_params, "airline_routes", AirlineRoutes.CREATE_SQL, AirlineRoutes.ROUTE_COLUMNS,
+                file_path, 9, AirlineRoutes.DAT_EXPRESSIONS, AirlineRoutes.NATURAL_KEY_CONFLICT_SQL,
+            )
+            AirlineRoutes.refresh_after_load(conn_params)
+            return
+
+        columns = AirlineRoutes.ROUTE_COLUMNS
+        rows = AirlineRoutes.read_routes(file_path, workers, use_cache, use_mmap)
+
+        if use_codes:
+            AirlineRoutes.load_coded_routes(conn_params, rows, chunk_size)
+            AirlineRoutes.refresh_after_load(conn_params)
+            return
+
+        if use_route_key:
+            rows = ParsedCache.iter_rows(rows)
+            create_sql = AirlineRoutes.ROUTE_KEY_CREATE_SQL + AirlineRoutes.ROUTE_KEY_INDEXES_SQL
+            conflict_sql = "ON CONFLICT (route_key) DO NOTHING"
+            columns = ("route_key",) + columns
+            rows = ((AirlineRoutes.route_fingerprint(r),) + r for r in rows)
+        else:
+            create_sql = AirlineRoutes.CREATE_SQL
+            conflict_sql = AirlineRoutes.NATURAL_KEY_CONFLICT_SQL
+
+        if use_copy or Database.is_embedded(conn_params):
+            BulkLoader.copy_merge(
+                conn_params,
+                "airline_routes",
+                create_sql,
+                columns,
+                rows,
+                conflict_sql,
+                chunk_size=chunk_size,
+            )
+            AirlineRoutes.refresh_after_load(conn_params)
+            return
+
+        insert_sql = f"""
+        INSERT INTO airline_routes ({", ".join(columns)})
+        VALUES %s
+        {conflict_sql};
+        """
+
+        rows = list(ParsedCache.iter_rows(rows))
 
         if not rows:
             print("No rows found to insert.")
             return
 
-        with psycopg2.connect(**pg_params) as conn:
+        with Database.connection(conn_params) as conn:
             with conn.cursor() as cur:
                 cur.execute(create_sql)
                 execute_values(cur, insert_sql, rows, page_size=10000)
@@ -150,67 +507,599 @@ class AirlineRoutes:
 
         print(f"Inserted {len(rows)} rows into `airline_routes` (duplicates ignored).")
 
-    
+        AirlineRoutes.refresh_after_load(conn_params)
+
+    ROUTE_EQUIPMENT_SQL = """
+    CREATE TABLE IF NOT EXISTS route_equipment (
+        route_id    BIGINT NOT NULL REFERENCES airline_routes(route_id) ON DELETE CASCADE,
+        aircraft_id BIGINT NOT NULL REFERENCES aircraft(aircraft_id) ON DELETE CASCADE,
+        PRIMARY KEY (route_id, aircraft_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_route_equipment_aircraft ON route_equipment(aircraft_id);
+    """
+
+    # DuckDB foreign keys cannot cascade, so the embedded table has none. Nothing
+    # deletes routes or aircraft there (incremental loads are Postgres-only), and
+    # every routes/aircraft load rebuilds route_equipment from scratch.
+    ROUTE_EQUIPMENT_EMBEDDED_SQL = """
+    CREATE TABLE IF NOT EXISTS route_equipment (
+        route_id    BIGINT NOT NULL,
+        aircraft_id BIGINT NOT NULL,
+        PRIMARY KEY (route_id, aircraft_id)
+    );
+    """
+
     @staticmethod
-    def map_asia_flags(db_parameters: dict):
+    def refresh_route_equipment(cur, new_routes_only: bool = False):
         """
-        Adds source_in_asia and dest_in_asia columns to airline_routes
-        using airports.country membership in Asia.
+        Split airline_routes.equipment ("CR2 737") into route_equipment rows,
+        one per plane type, resolved to aircraft.aircraft_id.
+
+        Each code resolves to one aircraft: an IATA match wins over an ICAO
+        match, lowest aircraft_id breaks ties.
+        new_routes_only=True only adds rows for the inserted routes in
+        `route_changes` (incremental load); otherwise the table is rebuilt.
         """
+        if isinstance(cur, EmbeddedCursor):
+            cur.execute(AirlineRoutes.ROUTE_EQUIPMENT_EMBEDDED_SQL)
+        else:
+            cur.execute(AirlineRoutes.ROUTE_EQUIPMENT_SQL)
 
-        # A practical Asia country list (you can add/remove as needed)
-        asia_countries = [
-            'Afghanistan','Armenia','Azerbaijan','Bahrain','Bangladesh','Bhutan','Brunei',
-            'Cambodia','China','Cyprus','Georgia','India','Indonesia','Iran','Iraq','Israel',
-            'Japan','Jordan','Kazakhstan','Kuwait','Kyrgyzstan','Laos','Lebanon','Malaysia',
-            'Maldives','Mongolia','Myanmar','Nepal','North Korea','Oman','Pakistan',
-            'Palestine','Philippines','Qatar','Saudi Arabia','Singapore','South Korea',
-            'Sri Lanka','Syria','Taiwan','Tajikistan','Thailand','Timor-Leste','Turkey',
-            'Turkmenistan','United Arab Emirates','Uzbekistan','Vietnam','Yemen','Hong Kong','Macau'
-        ]
+        if new_routes_only:
+            route_filter = "WHERE r.route_id IN (SELECT route_id FROM route_changes WHERE delta = 1)"
+        else:
+            cur.execute("TRUNCATE route_equipment;")
+            route_filter = ""
 
-        # Build safe SQL literals
-        country_list_sql = ", ".join(["%s"] * len(asia_countries))
+        code_map = """
+            codes AS (
+                SELECT iata_code AS code, aircraft_id, 0 AS preference
+                FROM aircraft
+                WHERE iata_code IS NOT NULL
 
-        sql = f"""
-        ALTER TABLE airline_routes
-        ADD COLUMN IF NOT EXISTS source_in_asia BOOLEAN,
-        ADD COLUMN IF NOT EXISTS dest_in_asia BOOLEAN;
+                UNION ALL
 
-        -- Source flag
-        UPDATE airline_routes r
-        SET source_in_asia = (a.country IN ({country_list_sql}))
-        FROM airports a
-        WHERE r.source_airport_id = a.airport_id;
+                SELECT icao_code AS code, aircraft_id, 1 AS preference
+                FROM aircraft
+                WHERE icao_code IS NOT NULL
+            ),
+            code_map AS (
+                SELECT DISTINCT ON (code) code, aircraft_id
+                FROM codes
+                ORDER BY code, preference, aircraft_id
+            )"""
+
+        if AirlineRoutes.is_coded(cur):
+            # Each distinct equipment string is split once, then routes join on its id
+            cur.execute(f"""
+                WITH {code_map},
+                equipment_map AS (
+                    SELECT DISTINCT eq.code_id, cm.aircraft_id
+                    FROM equipment_codes eq
+                    CROSS JOIN LATERAL unnest(string_to_array(eq.code, ' ')) AS e(code)
+                    JOIN code_map cm
+                      ON cm.code = e.code
+                )
+                INSERT INTO route_equipment (route_id, aircraft_id)
+                SELECT r.route_id, em.aircraft_id
+                FROM airline_routes r
+                JOIN equipment_map em
+                  ON em.code_id = r.equipment_code_id
+                {route_filter}
+                ON CONFLICT DO NOTHING;
+            """)
+            return cur.rowcount
+
+        cur.execute(f"""
+            WITH {code_map}
+            INSERT INTO route_equipment (route_id, aircraft_id)
+            SELECT DISTINCT r.route_id, cm.aircraft_id
+            FROM airline_routes r
+            CROSS JOIN LATERAL unnest(string_to_array(r.equipment, ' ')) AS e(code)
+            JOIN code_map cm
+              ON cm.code = e.code
+            {route_filter}
+            ON CONFLICT DO NOTHING;
+        """)
+        return cur.rowcount
+
+    @staticmethod
+    def refresh_after_load(db_parameters: dict):
+        """
+        After load_routes_to_db: region_pair for the new routes (once
+        Regions.apply_to_db has run), their airlines queued for the regional
+        report, and route_equipment rebuilt.
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                classified = Regions.classify_new_routes(cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        if classified:
+            print(f"region_pair set for {classified} new routes.")
+        AirlineRoutes.build_route_equipment(db_parameters)
+
+    @staticmethod
+    def build_route_equipment(db_parameters: dict):
+        """
+        Rebuild the route_equipment bridge table. Skipped until both
+        airline_routes and aircraft are loaded (they can load in either order).
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                if not (Database.table_exists(cur, "airline_routes") and Database.table_exists(cur, "aircraft")):
+                    return
+                linked = AirlineRoutes.refresh_route_equipment(cur)
+                # Seat capacity behind every airline's pax figures may have changed
+                Regions.mark_report_dirty(cur)
+            conn.commit()
+            print(f"route_equipment rebuilt: {linked} route/aircraft links.")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def migrate_to_route_key(db_parameters: dict, chunk_size: int = 50000):
+        """
+        Switch an existing `airline_routes` table to the hash-key schema:
+        backfill route_key, index it (unique), drop the nine-column
+        airline_routes_uk constraint and add per-column lookup indexes on
+        source_airport_id, dest_airport_id and airline_id.
+        """
+        Database.require_postgres(db_parameters, "migrate_to_route_key")
+        cols = AirlineRoutes.ROUTE_COLUMNS
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("ALTER TABLE airline_routes ADD COLUMN IF NOT EXISTS route_key BIGINT;")
+                cur.execute("""
+                    CREATE TEMP TABLE route_key_backfill (
+                        route_id  BIGINT PRIMARY KEY,
+                        route_key BIGINT NOT NULL
+                    ) ON COMMIT DROP;
+                """)
+
+            # Fingerprints are computed in Python (same function as the loaders),
+            # streaming the table through a server-side cursor.
+            with conn.cursor(name="route_key_scan") as scan, conn.cursor() as cur:
+                scan.itersize = chunk_size
+                scan.execute(f"SELECT route_id, {', '.join(cols)} FROM airline_routes WHERE route_key IS NULL;")
+                keys = ((row[0], AirlineRoutes.route_fingerprint(tuple(row[1:]))) for row in scan)
+                updated = BulkLoader.copy_rows(cur, "route_key_backfill", ("route_id", "route_key"), keys, chunk_size)
+
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE airline_routes r
+                    SET route_key = b.route_key
+                    FROM route_key_backfill b
+                    WHERE r.route_id = b.route_id;
+                """)
+                cur.execute(AirlineRoutes.ROUTE_KEY_INDEXES_SQL)
+                cur.execute("""
+                    ALTER TABLE airline_routes ALTER COLUMN route_key SET NOT NULL;
+                    ALTER TABLE airline_routes DROP CONSTRAINT IF EXISTS airline_routes_uk;
+                """)
+            conn.commit()
+            print(f"airline_routes migrated to route_key ({updated} keys backfilled).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def load_coded_routes(db_parameters: dict, rows, chunk_size: int = 50000) -> int:
+        """
+        load_routes_to_db for the code-id schema: the codes of every row are
+        replaced by CodeDictionary ids (new codes get theirs from the dimension
+        tables, once per chunk), then the rows are COPYed and merged on the id
+        key, all in one transaction. Returns the number of rows streamed.
+        """
+        started = time.perf_counter()
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(AirlineRoutes.CODED_CREATE_SQL)
+                if not AirlineRoutes.is_coded(cur):
+                    raise ValueError("airline_routes has no code ids yet; run AirlineRoutes.migrate_to_code_ids first.")
+
+                dictionary = CodeDictionary.from_db(cur)
+                rows = dictionary.encode_routes(
+                    cur, ParsedCache.iter_rows(rows), AirlineRoutes.CODE_POSITIONS, chunk_size
+                )
+                copied, merged = BulkLoader.merge_rows(
+                    cur, "airline_routes", AirlineRoutes.CODED_KEY_COLUMNS, rows, AirlineRoutes.CODED_CONFLICT_SQL, chunk_size
+                )
+                added = dictionary.added
+                cur.execute(AirlineRoutes.DECODED_VIEW_SQL)
+            with Instrumentation.phase("commit"):
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"Loaded {copied} rows into `airline_routes` ({merged} inserted) with code ids in {elapsed:.2f}s; "
+            f"{added} new codes ({len(dictionary)} in the dictionaries)."
+        )
+        return copied
+
+    @staticmethod
+    def migrate_to_code_ids(db_parameters: dict):
+        """
+        Switch an existing `airline_routes` table to the code-id schema: create
+        the CodeDictionary dimension tables, add and backfill the four id
+        columns, rebuild airline_routes_uk on the ids, drop the four text
+        columns and create the airline_routes_decoded view that readers use
+        instead (see routes_source). Later loads need use_codes=True.
+        Postgres reclaims the dropped columns' space as rows are rewritten
+        (or at once with VACUUM FULL airline_routes).
+        """
+        Database.require_postgres(db_parameters, "migrate_to_code_ids")
+        add_columns = ", ".join(f"ADD COLUMN IF NOT EXISTS {col} INTEGER" for col in CodeDictionary.ID_COLUMNS)
+        drop_columns = ", ".join(f"DROP COLUMN IF EXISTS {col}" for col in CodeDictionary.ROUTE_CODES)
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"ALTER TABLE airline_routes {add_columns};")
+                added = CodeDictionary.sync(cur)
+                cur.execute(f"""
+                    ALTER TABLE airline_routes DROP CONSTRAINT IF EXISTS airline_routes_uk;
+                    ALTER TABLE airline_routes
+                        ADD CONSTRAINT airline_routes_uk UNIQUE ({", ".join(AirlineRoutes.CODED_KEY_COLUMNS)});
+                    ALTER TABLE airline_routes {drop_columns};
+                """)
+                cur.execute(AirlineRoutes.DECODED_VIEW_SQL)
+            conn.commit()
+            print(f"airline_routes migrated to code ids ({added} codes interned).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    MANIFEST_SQL = """
+    CREATE TABLE IF NOT EXISTS airline_routes_manifest (
+        row_hash BIGINT PRIMARY KEY,   -- route_fingerprint of the normalized row
+        route_id BIGINT NOT NULL
+    );
+    """
+
+    @staticmethod
+    def route_fingerprint(route: tuple) -> int:
+        """Signed 64-bit hash of a normalized route tuple (fits a Postgres BIGINT)."""
+        digest = hashlib.blake2b(repr(route).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
 
-        -- Destination flag
+    @staticmethod
+    def natural_key_join(left: str, right: str, columns=ROUTE_COLUMNS) -> str:
+        """
+        Hash-joinable equality over the nine natural key columns (columns=
+        CODED_KEY_COLUMNS for the code-id schema).
+        NULLs are coalesced to sentinels the parser never produces.
+        """
+        parts = []
+        for col in columns:
+            if col in ("airline_id", "source_airport_id", "dest_airport_id", "stops") + CodeDictionary.ID_COLUMNS:
+                sentinel = "-2147483648"
+            elif col == "codeshare":
+                sentinel = "FALSE"
+            else:
+                sentinel = "''"
+            parts.append(f"COALESCE({left}.{col}, {sentinel}) = COALESCE({right}.{col}, {sentinel})")
+        return "\n            AND ".join(parts)
+
+    @staticmethod
+    @Instrumentation.step(input_arg="file_path")
+    def load_routes_incremental(
+        file_path: str,
+        db_parameters: dict,
+        workers: int = 1,
+        chunk_size: int = 50000,
+        countries_path: str = None,
+    ):
+        """
+        Apply a new routes.dat snapshot as a diff against the previous one.
+
+        Every normalized row is fingerprinted and COPYed into a staging table.
+        `airline_routes_manifest` holds the fingerprints of the previous snapshot,
+        so only new rows are inserted and rows missing from the snapshot are deleted.
+        Existing routes without a manifest entry (e.g. from a full load) are adopted
+        when they match a snapshot row instead of being re-inserted; the others are
+        deleted like any route missing from the snapshot.
+
+        If present, source_in_asia/dest_in_asia are set for inserted routes only,
+        and airports inbound/outbound/total counters get +/- deltas for the
+        airports touched by the change. On the code-id schema rows are staged,
+        compared and inserted with their CodeDictionary ids (the fingerprints
+        are still taken over the text rows).
+        Postgres only (it relies on DML in CTEs and serial sequences).
+        """
+        Database.require_postgres(db_parameters, "load_routes_incremental")
+        fingerprint = AirlineRoutes.route_fingerprint
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(AirlineRoutes.CREATE_SQL)
+                cur.execute(AirlineRoutes.MANIFEST_SQL)
+                has_route_key = Database.column_exists(cur, "airline_routes", "route_key")
+                coded = AirlineRoutes.is_coded(cur)
+                cols = AirlineRoutes.CODED_KEY_COLUMNS if coded else AirlineRoutes.ROUTE_COLUMNS
+                col_list = ", ".join(cols)
+                key_join = "r.route_key = s.row_hash" if has_route_key else AirlineRoutes.natural_key_join("r", "s", cols)
+
+                staging = BulkLoader.create_staging(cur, "airline_routes", cols, {"row_hash": "BIGINT"})
+                rows = ((fingerprint(r),) + r for r in AirlineRoutes.read_routes(file_path, workers))
+                if coded:
+                    # Shifted by one for the leading row_hash
+                    positions = [i + 1 for i in AirlineRoutes.CODE_POSITIONS]
+                    rows = CodeDictionary.from_db(cur).encode_routes(cur, rows, positions, chunk_size)
+                copied = BulkLoader.copy_rows(cur, staging, ("row_hash",) + cols, rows, chunk_size)
+                cur.execute(f"CREATE INDEX ON {staging} (row_hash);")
+                cur.execute(f"ANALYZE {staging};")
+
+                # Adopt routes already in the table that the manifest doesn't know yet
+                cur.execute(f"""
+                    INSERT INTO airline_routes_manifest (row_hash, route_id)
+                    SELECT DISTINCT ON (s.row_hash) s.row_hash, r.route_id
+                    FROM {staging} s
+                    JOIN airline_routes r
+                      ON {key_join}
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM airline_routes_manifest m WHERE m.row_hash = s.row_hash
+                    )
+                      AND NOT EXISTS (
+                        SELECT 1 FROM airline_routes_manifest m WHERE m.route_id = r.route_id
+                    )
+                    ON CONFLICT DO NOTHING;
+                """)
+
+                cur.execute("""
+                    CREATE TEMP TABLE route_changes (
+                        route_id          BIGINT,
+                        airline_id        INTEGER,
+                        source_airport_id INTEGER,
+                        dest_airport_id   INTEGER,
+                        delta             INTEGER   -- +1 inserted, -1 deleted
+                    ) ON COMMIT DROP;
+                """)
+
+                # Deletes: in the previous snapshot, not in this one
+                cur.execute(f"""
+                    WITH gone AS (
+                        DELETE FROM airline_routes_manifest m
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM {staging} s WHERE s.row_hash = m.row_hash
+                        )
+                        RETURNING m.route_id
+                    ),
+                    removed AS (
+                        DELETE FROM airline_routes r
+                        USING gone
+                        WHERE r.route_id = gone.route_id
+                        RETURNING r.route_id, r.airline_id, r.source_airport_id, r.dest_airport_id
+                    )
+                    INSERT INTO route_changes
+                    SELECT route_id, airline_id, source_airport_id, dest_airport_id, -1
+                    FROM removed;
+                """)
+
+                # Routes the manifest still doesn't know after adoption are not in this
+                # snapshot (or duplicate an adopted one): without this a table loaded
+                # in full before the first run would never converge to the snapshot
+                cur.execute("""
+                    WITH removed AS (
+                        DELETE FROM airline_routes r
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM airline_routes_manifest m WHERE m.route_id = r.route_id
+                        )
+                        RETURNING r.route_id, r.airline_id, r.source_airport_id, r.dest_airport_id
+                    )
+                    INSERT INTO route_changes
+                    SELECT route_id, airline_id, source_airport_id, dest_airport_id, -1
+                    FROM removed;
+                """)
+
+                # Inserts: in this snapshot, not in the previous one
+                cur.execute(f"""
+                    CREATE TEMP TABLE route_inserts ON COMMIT DROP AS
+                    SELECT nextval(pg_get_serial_sequence('airline_routes', 'route_id')) AS route_id, f.*
+                    FROM (
+                        SELECT DISTINCT ON (s.row_hash) s.*
+                        FROM {staging} s
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM airline_routes_manifest m WHERE m.row_hash = s.row_hash
+                        )
+                    ) f;
+                """)
+                # row_hash doubles as route_key on the hash-key schema
+                key_cols = "route_key, " if has_route_key else ""
+                key_vals = "row_hash, " if has_route_key else ""
+
+                cur.execute(f"""
+                    WITH added AS (
+                        INSERT INTO airline_routes (route_id, {key_cols}{col_list})
+                        SELECT route_id, {key_vals}{col_list}
+                        FROM route_inserts
+                        ON CONFLICT DO NOTHING
+                        RETURNING route_id, airline_id, source_airport_id, dest_airport_id
+                    ),
+                    recorded AS (
+                        INSERT INTO airline_routes_manifest (row_hash, route_id)
+                        SELECT i.row_hash, i.route_id
+                        FROM route_inserts i
+                        JOIN added a ON a.route_id = i.route_id
+                    )
+                    INSERT INTO route_changes
+                    SELECT route_id, airline_id, source_airport_id, dest_airport_id, 1
+                    FROM added;
+                """)
+
+                cur.execute("""
+                    SELECT
+                        COUNT(*) FILTER (WHERE delta = 1),
+                        COUNT(*) FILTER (WHERE delta = -1)
+                    FROM route_changes;
+                """)
+                inserted, deleted = cur.fetchone()
+
+                if Database.column_exists(cur, "airline_routes", "source_in_asia"):
+                    AirlineRoutes.update_asia_flags_for_changes(cur, countries_path)
+
+                if Database.column_exists(cur, "airline_routes", "region_pair"):
+                    cur.execute(Regions.region_pair_sql(
+                        "WHERE r2.route_id IN (SELECT route_id FROM route_changes WHERE delta = 1)"
+                    ))
+
+                # With the counter triggers on, the INSERT/DELETE above already adjusted them
+                if Database.column_exists(cur, "airports", "inbound_count") and not Airports.counter_triggers_enabled(cur):
+                    AirlineRoutes.apply_airport_count_deltas(cur)
+
+                if Database.table_exists(cur, "airport_airline_usage") and not Airports.counter_triggers_enabled(cur):
+                    cur.execute(Airports.apply_usage_deltas_sql(Airports.ROUTE_CHANGES_USAGE_DELTAS))
+
+                if Database.table_exists(cur, "aircraft"):
+                    AirlineRoutes.refresh_route_equipment(cur, new_routes_only=True)
+
+                if Database.column_exists(cur, "airline_routes", "distance_km"):
+                    Geo.update_route_distances(
+                        cur, "WHERE r.route_id IN (SELECT route_id FROM route_changes WHERE delta = 1)"
+                    )
+
+                if Database.table_exists(cur, "regional_report_dirty_airlines"):
+                    # Report.refresh_regional_flow_report recomputes only these airlines
+                    cur.execute("""
+                        INSERT INTO regional_report_dirty_airlines (airline_id)
+                        SELECT DISTINCT airline_id FROM route_changes;
+                    """)
+
+                cur.execute(f"DROP TABLE IF EXISTS {staging};")
+            conn.commit()
+
+            print(
+                f"Incremental routes load: {copied} rows in snapshot, "
+                f"{inserted} inserted, {deleted} deleted, {copied - inserted} unchanged."
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def update_asia_flags_for_changes(cur, countries_path: str = None):
+        """Set source_in_asia/dest_in_asia only for routes inserted in `route_changes`."""
+        asia_countries = Regions.country_names(Regions.ASIA, countries_path)
+        route_filter = "WHERE r2.route_id IN (SELECT route_id FROM route_changes WHERE delta = 1)"
+        cur.execute(AirlineRoutes.asia_flags_sql(route_filter), {"asia": asia_countries})
+
+    @staticmethod
+    def apply_airport_count_deltas(cur):
+        """Adjust airports inbound/outbound/total counters by the +/- rows in `route_changes`."""
+        cur.execute("""
+            UPDATE airports a
+            SET outbound_count = COALESCE(a.outbound_count, 0) + d.delta
+            FROM (
+                SELECT source_airport_id AS airport_id, SUM(delta) AS delta
+                FROM route_changes
+                WHERE source_airport_id IS NOT NULL
+                GROUP BY source_airport_id
+            ) d
+            WHERE a.airport_id = d.airport_id;
+
+            UPDATE airports a
+            SET inbound_count = COALESCE(a.inbound_count, 0) + d.delta
+            FROM (
+                SELECT dest_airport_id AS airport_id, SUM(delta) AS delta
+                FROM route_changes
+                WHERE dest_airport_id IS NOT NULL
+                GROUP BY dest_airport_id
+            ) d
+            WHERE a.airport_id = d.airport_id;
+
+            UPDATE airports a
+            SET total_in_out = COALESCE(a.inbound_count, 0) + COALESCE(a.outbound_count, 0)
+            WHERE a.airport_id IN (
+                SELECT source_airport_id FROM route_changes
+                UNION
+                SELECT dest_airport_id FROM route_changes
+            );
+        """)
+
+    @staticmethod
+    def asia_flags_sql(route_filter: str = "") -> str:
+        """
+        One-pass UPDATE of source_in_asia/dest_in_asia. Unmatched airports and
+        NULL countries give FALSE; rows whose flags don't change are not rewritten.
+        Parameter: the list of Asia country names.
+        """
+        return f"""
         UPDATE airline_routes r
-        SET dest_in_asia = (a.country IN ({country_list_sql}))
-        FROM airports a
-        WHERE r.dest_airport_id = a.airport_id;
+        SET source_in_asia = x.source_in_asia,
+            dest_in_asia = x.dest_in_asia
+        FROM (
+            SELECT
+                r2.route_id,
+                COALESCE(s.country = ANY(%(asia)s), FALSE) AS source_in_asia,
+                COALESCE(d.country = ANY(%(asia)s), FALSE) AS dest_in_asia
+            FROM airline_routes r2
+            LEFT JOIN airports s ON s.airport_id = r2.source_airport_id
+            LEFT JOIN airports d ON d.airport_id = r2.dest_airport_id
+            {route_filter}
+        ) x
+        WHERE r.route_id = x.route_id
+          AND (r.source_in_asia IS DISTINCT FROM x.source_in_asia
+               OR r.dest_in_asia IS DISTINCT FROM x.dest_in_asia);
+        """
 
-        -- Any routes with missing airport_id match -> set to FALSE
-        UPDATE airline_routes
-        SET source_in_asia = FALSE
-        WHERE source_in_asia IS NULL;
+    @staticmethod
+    @Instrumentation.step(input_arg="countries_path")
+    def map_asia_flags(db_parameters: dict, countries_path: str = None):
+        """
+        Adds source_in_asia and dest_in_asia columns to airline_routes
+        using airports.country membership in Asia.
 
-        UPDATE airline_routes
-        SET dest_in_asia = FALSE
-        WHERE dest_in_asia IS NULL;
+        Asia is Regions.ASIA (ISO codes), resolved to airport country names via
+        countries.dat; for other regions use Regions(...).apply_to_db.
         """
+        asia_countries = Regions.country_names(Regions.ASIA, countries_path)
 
         conn = Database.get_connection(db_parameters)
         try:
             with conn.cursor() as cur:
-                # We use the same country list twice (source + dest), so pass it twice
-                cur.execute(sql, asia_countries + asia_countries)
+                cur.execute("""
+                    ALTER TABLE airline_routes
+                    ADD COLUMN IF NOT EXISTS source_in_asia BOOLEAN,
+                    ADD COLUMN IF NOT EXISTS dest_in_asia BOOLEAN;
+                """)
+                cur.execute(AirlineRoutes.asia_flags_sql(), {"asia": asia_countries})
+                changed = cur.rowcount
                 conn.commit()
-            print("Asia flags updated on airline_routes.")
+            print(f"Asia flags updated on airline_routes ({changed} routes changed).")
         finally:
             conn.close()
             
     @staticmethod
-    def count_asia_routes(db_parameters):
+    @Instrumentation.step()
+    def count_asia_routes(db_parameters, graph=None):
+        """Print Asia route counts. Pass a loaded RouteGraph to skip the database scan."""
 
         sql = """
         SELECT
@@ -225,23 +1114,27 @@ class AirlineRoutes:
         FROM airline_routes;
         """
 
-        conn = Database.get_connection(db_parameters)
-
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql)
-                result = cur.fetchone()
+        if graph is not None:
+            result = graph.count_asia_routes()
+        else:
+            conn = Database.get_connection(db_parameters)
 
-            print("Routes with source_in_asia = TRUE:", result[0])
-            print("Routes with dest_in_asia   = TRUE:", result[1])
-            print("Routes with BOTH in Asia   :", result[2])
-            print("Routes that touch Asia     :", result[3])
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    result = cur.fetchone()
+            finally:
+                conn.close()
 
-        finally:
-            conn.close()
+        print("Routes with source_in_asia = TRUE:", result[0])
+        print("Routes with dest_in_asia   = TRUE:", result[1])
+        print("Routes with BOTH in Asia   :", result[2])
+        print("Routes that touch Asia     :", result[3])
+        return result
             
     @staticmethod
-    def report_asia_airline_frequencies(db_parameters, limit=50):
+    def report_asia_airline_frequencies(db_parameters, limit=50, graph=None):
+        """Print per-airline Asia route counts. Pass a loaded RouteGraph to skip the database scan."""
         sql = """
         SELECT
           r.airline_id,
@@ -253,24 +1146,28 @@ class AirlineRoutes:
           COUNT(*) FILTER (WHERE r.source_in_asia = FALSE AND r.dest_in_asia = TRUE) AS into_asia,
           COUNT(*) FILTER (WHERE r.source_in_asia = TRUE OR  r.dest_in_asia = TRUE)  AS touches_asia_total
 
-        FROM airline_routes r
+        FROM {routes} r
         LEFT JOIN airlines a
           ON a.airline_id = r.airline_id
 
         GROUP BY r.airline_id, r.airline_code, a.name
         HAVING COUNT(*) FILTER (WHERE r.source_in_asia = TRUE AND r.dest_in_asia = TRUE) > 0
-        ORDER BY touches_asia_total DESC, within_asia DESC
+        ORDER BY touches_asia_total DESC, within_asia DESC, r.airline_id, r.airline_code
         LIMIT %s;
         """
 
-        conn = Database.get_connection(db_parameters)
-        try:
-            with conn.cursor() as cur:
-                cur.execute(sql, (limit,))
-                rows = cur.fetchall()
+        if graph is not None:
+            rows = list(graph.asia_airline_frequencies(limit).itertuples(index=False, name=None))
+        else:
+            conn = Database.get_connection(db_parameters)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql.format(routes=AirlineRoutes.routes_source(cur)), (limit,))
+                    rows = cur.fetchall()
+            finally:
+                conn.close()
 
-            print("airline_id | code | name | within | out | into | touches_total")
-            for r in rows:
-                print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]} | {r[6]}")
-        finally:
-            conn.close()
\ No newline at end of file
+        print("airline_id | code | name | within | out | into | touches_total")
+        for r in rows:
+            print(f"{r[0]} | {r[1]} | {r[2]} | {r[3]} | {r[4]} | {r[5]} | {r[6]}")
+        return rows
\ No newline at end of file
@@ -1,5 +1,9 @@
 
 from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.embedded import Embedded
+from methods.parsed_cache import ParsedCache
+from methods.instrumentation import Instrumentation
 
 import csv
 import psycopg2
@@ -15,45 +19,41 @@ class Airlines:
         v = value.strip()
         return None if v == r"\N" or v == "" else v
 
-    @staticmethod
-    def load_airlines_to_db(file_path: str, conn_params: dict):
-        # Map your parameter names -> psycopg2 names
-        pg_params = {
-            "host": conn_params["database_host"],
-            "port": conn_params["database_port"],
-            "database": conn_params["database_name"],
-            "user": conn_params["database_username"],
-            "password": conn_params["database_password"],
-        }
-
-        create_sql = """
-        CREATE TABLE IF NOT EXISTS airlines (
-            airline_id INTEGER PRIMARY KEY,
-            name       TEXT,
-            alias      TEXT,
-            iata       TEXT,
-            icao       TEXT,
-            callsign   TEXT,
-            country    TEXT,
-            active     CHAR(1)
-        );
-        """
+    AIRLINE_COLUMNS = ("airline_id", "name", "alias", "iata", "icao", "callsign", "country", "active")
 
-        insert_sql = """
-            INSERT INTO airlines
-                (airline_id, name, alias, iata, icao, callsign, country, active)
-            VALUES %s
-            ON CONFLICT (airline_id) DO UPDATE SET
-                name     = EXCLUDED.name,
-                alias    = EXCLUDED.alias,
-                iata     = EXCLUDED.iata,
-                icao     = EXCLUDED.icao,
-                callsign = EXCLUDED.callsign,
-                country  = EXCLUDED.country,
-                active   = EXCLUDED.active;
-        """
+    # iter_airlines as SQL over the raw fields, for the embedded in-engine load
+    DAT_EXPRESSIONS = (Embedded.integer(0),) + tuple(Embedded.text(i) for i in range(1, 8))
 
-        rows = []
+    # Column types of the ParsedCache copy (same order as AIRLINE_COLUMNS)
+    ARROW_TYPES = ("int32",) + ("string",) * 7
+
+    CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS airlines (
+        airline_id INTEGER PRIMARY KEY,
+        name       TEXT,
+        alias      TEXT,
+        iata       TEXT,
+        icao       TEXT,
+        callsign   TEXT,
+        country    TEXT,
+        active     CHAR(1)
+    );
+    """
+
+    UPSERT_SQL = """
+        ON CONFLICT (airline_id) DO UPDATE SET
+            name     = EXCLUDED.name,
+            alias    = EXCLUDED.alias,
+            iata     = EXCLUDED.iata,
+            icao     = EXCLUDED.icao,
+            callsign = EXCLUDED.callsign,
+            country  = EXCLUDED.country,
+            active   = EXCLUDED.active
+    """
+
+    @staticmethod
+    def iter_airlines(file_path: str):
+        """Stream parsed airline tuples from airlines.dat one line at a time."""
         with open(file_path, "r", encoding="utf-8", newline="") as f:
             reader = csv.reader(f)
             for line_num, row in enumerate(reader, start=1):
@@ -66,7 +66,7 @@ class Airlines:
                 if airline_id is None:
                     continue
 
-                rows.append((
+                yield (
                     int(airline_id),
                     Airlines.nullify(row[1]),
                     Airlines.nullify(row[2]),
@@ -75,19 +75,67 @@ class Airlines:
                     Airlines.nullify(row[5]),
                     Airlines.nullify(row[6]),
                     Airlines.nullify(row[7])
-                ))
+                )
+
+    @staticmethod
+    def read_airlines(file_path: str, use_cache: bool = False):
+        """Airline tuples, or with use_cache=True the ParsedCache table of them."""
+        if use_cache:
+            return ParsedCache.table(file_path, Airlines.AIRLINE_COLUMNS, Airlines.ARROW_TYPES, Airlines.iter_airlines)
+        return Airlines.iter_airlines(file_path)
+
+    @staticmethod
+    @Instrumentation.step(input_arg="file_path")
+    def load_airlines_to_db(
+        file_path: str, conn_params: dict, use_copy: bool = False, chunk_size: int = 50000, use_cache: bool = False
+    ):
+        """
+        Load OpenFlights airlines.dat into Postgres table `airlines`.
+        use_copy=True streams rows through COPY + one set-based upsert instead.
+        use_cache=True reads the parsed rows from ParsedCache (parsing only when
+        the file changed) and COPYs them straight from Arrow.
+        On the embedded backend DuckDB reads the file itself, or scans the cached
+        Arrow table with use_cache=True (use_copy is moot either way).
+        """
+        if Database.is_embedded(conn_params) and not use_cache:
+            Embedded.load_dat(
+                conn_params, "airlines", Airlines.CREATE_SQL, Airlines.AIRLINE_COLUMNS,
+                file_path, 8, Airlines.DAT_EXPRESSIONS, Airlines.UPSERT_SQL, key_field=0,
+            )
+            return
+
+        rows = Airlines.read_airlines(file_path, use_cache)
+
+        if use_copy or Database.is_embedded(conn_params):
+            BulkLoader.copy_merge(
+                conn_params,
+                "airlines",
+                Airlines.CREATE_SQL,
+                Airlines.AIRLINE_COLUMNS,
+                rows,
+                Airlines.UPSERT_SQL,
+                chunk_size=chunk_size,
+            )
+            return
+
+        insert_sql = """
+            INSERT INTO airlines
+                (airline_id, name, alias, iata, icao, callsign, country, active)
+            VALUES %s
+        """ + Airlines.UPSERT_SQL
+
+        rows = list(ParsedCache.iter_rows(rows))
 
         if not rows:
             print("No rows found to insert.")
             return
 
-        with psycopg2.connect(**pg_params) as conn:
+        with Database.connection(conn_params) as conn:
             with conn.cursor() as cur:
-                cur.execute(create_sql)
+                cur.execute(Airlines.CREATE_SQL)
                 execute_values(cur, insert_sql, rows, page_size=5000)
             conn.commit()
 
         print(f"Inserted/updated {len(rows)} airlines into `airlines`.")
 
     
-    
\ No newline at end of file
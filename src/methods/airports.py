@@ -1,6 +1,10 @@
 import csv
 from psycopg2.extras import execute_values
 from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.embedded import Embedded
+from methods.parsed_cache import ParsedCache
+from methods.instrumentation import Instrumentation
 
 
 class Airports:
@@ -22,58 +26,66 @@ class Airports:
         v = Airports.nullify(value)
         return None if v is None else int(v)
 
-    @staticmethod
-    def load_airports_to_db(file_path: str, db_parameters: dict):
-        """
-        Load OpenFlights airport.dat into Postgres table `airports`.
-        Expected columns (14):
-        Airport ID, Name, City, Country, IATA, ICAO, Latitude, Longitude,
-        Altitude, Timezone, DST, Tz database timezone, Type, Source
-        """
+    AIRPORT_COLUMNS = (
+        "airport_id", "name", "city", "country", "iata", "icao",
+        "latitude", "longitude", "altitude_ft", "timezone_utc_offset",
+        "dst", "tz_database", "type", "source"
+    )
 
-        create_sql = """
-        CREATE TABLE IF NOT EXISTS airports (
-            airport_id  INTEGER PRIMARY KEY,
-            name        TEXT,
-            city        TEXT,
-            country     TEXT,
-            iata        TEXT,
-            icao        TEXT,
-            latitude    DOUBLE PRECISION,
-            longitude   DOUBLE PRECISION,
-            altitude_ft INTEGER,
-            timezone_utc_offset DOUBLE PRECISION,
-            dst         TEXT,
-            tz_database TEXT,
-            type        TEXT,
-            source      TEXT
-        );
-        """
+    # iter_airports as SQL over the raw fields, for the embedded in-engine load
+    DAT_EXPRESSIONS = (
+        Embedded.integer(0), Embedded.text(1), Embedded.text(2), Embedded.text(3),
+        Embedded.text(4), Embedded.text(5), Embedded.double(6), Embedded.double(7),
+        Embedded.integer(8), Embedded.double(9), Embedded.text(10), Embedded.text(11),
+        Embedded.text(12), Embedded.text(13),
+    )
 
-        insert_sql = """
-        INSERT INTO airports (
-            airport_id, name, city, country, iata, icao,
-            latitude, longitude, altitude_ft, timezone_utc_offset,
-            dst, tz_database, type, source
-        )
-        VALUES %s
-        ON CONFLICT (airport_id) DO UPDATE SET
-            name = EXCLUDED.name,
-            city = EXCLUDED.city,
-            country = EXCLUDED.country,
-            iata = EXCLUDED.iata,
-            icao = EXCLUDED.icao,
-            latitude = EXCLUDED.latitude,
-            longitude = EXCLUDED.longitude,
-            altitude_ft = EXCLUDED.altitude_ft,
-            timezone_utc_offset = EXCLUDED.timezone_utc_offset,
-            dst = EXCLUDED.dst,
-            tz_database = EXCLUDED.tz_database,
-            type = EXCLUDED.type,
-            source = EXCLUDED.source;
-        """
-
-        rows = []
+    # Column types of the ParsedCache copy (same order as AIRPORT_COLUMNS)
+    ARROW_TYPES = (
+        "int32", "string", "string", "string", "string", "string",
+        "double", "double", "int32", "double",
+        "string", "string", "string", "string",
+    )
+
+    CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS airports (
+        airport_id  INTEGER PRIMARY KEY,
+        name        TEXT,
+        city        TEXT,
+        country     TEXT,
+        iata        TEXT,
+        icao        TEXT,
+        latitude    DOUBLE PRECISION,
+        longitude   DOUBLE PRECISION,
+        altitude_ft INTEGER,
+        timezone_utc_offset DOUBLE PRECISION,
+        dst         TEXT,
+        tz_database TEXT,
+        type        TEXT,
+        source      TEXT
+    );
+    """
+
+    UPSERT_SQL = """
+    ON CONFLICT (airport_id) DO UPDATE SET
+        name = EXCLUDED.name,
+        city = EXCLUDED.city,
+        country = EXCLUDED.country,
+        iata = EXCLUDED.iata,
+        icao = EXCLUDED.icao,
+        latitude = EXCLUDED.latitude,
+        longitude = EXCLUDED.longitude,
+        altitude_ft = EXCLUDED.altitude_ft,
+        timezone_utc_offset = EXCLUDED.timezone_utc_offset,
+        dst = EXCLUDED.dst,
+        tz_database = EXCLUDED.tz_database,
+        type = EXCLUDED.type,
+        source = EXCLUDED.source
+    """
+
+    @staticmethod
+    def iter_airports(file_path: str):
+        """Stream parsed airport tuples from airports.dat one line at a time."""
         with open(file_path, "r", encoding="utf-8", newline="") as f:
             reader = csv.reader(f)
             for line_num, row in enumerate(reader, start=1):
@@ -86,7 +98,7 @@ class Airports:
                 if airport_id is None:
                     continue
 
-                rows.append((
+                yield (
                     airport_id,
                     Airports.nullify(row[1]),   # name
                     Airports.nullify(row[2]),   # city
@@ -101,7 +113,64 @@ class Airports:
                     Airports.nullify(row[11]),  # tz database
                     Airports.nullify(row[12]),  # type
                     Airports.nullify(row[13])   # source
-                ))
+                )
+
+    @staticmethod
+    def read_airports(file_path: str, use_cache: bool = False):
+        """Airport tuples, or with use_cache=True the ParsedCache table of them."""
+        if use_cache:
+            return ParsedCache.table(file_path, Airports.AIRPORT_COLUMNS, Airports.ARROW_TYPES, Airports.iter_airports)
+        return Airports.iter_airports(file_path)
+
+    @staticmethod
+    @Instrumentation.step(input_arg="file_path")
+    def load_airports_to_db(
+        file_path: str, db_parameters: dict, use_copy: bool = False, chunk_size: int = 50000, use_cache: bool = False
+    ):
+        """
+        Load OpenFlights airport.dat into Postgres table `airports`.
+        Expected columns (14):
+        Airport ID, Name, City, Country, IATA, ICAO, Latitude, Longitude,
+        Altitude, Timezone, DST, Tz database timezone, Type, Source
+
+        use_copy=True streams rows through COPY + one set-based upsert instead.
+        use_cache=True reads the parsed rows from ParsedCache (parsing only when
+        the file changed) and COPYs them straight from Arrow.
+        On the embedded backend DuckDB reads the file itself, or scans the cached
+        Arrow table with use_cache=True (use_copy is moot either way).
+        """
+
+        if Database.is_embedded(db_parameters) and not use_cache:
+            Embedded.load_dat(
+                db_parameters, "airports", Airports.CREATE_SQL, Airports.AIRPORT_COLUMNS,
+                file_path, 14, Airports.DAT_EXPRESSIONS, Airports.UPSERT_SQL, key_field=0,
+            )
+            return
+
+        rows = Airports.read_airports(file_path, use_cache)
+
+        if use_copy or Database.is_embedded(db_parameters):
+            BulkLoader.copy_merge(
+                db_parameters,
+                "airports",
+                Airports.CREATE_SQL,
+                Airports.AIRPORT_COLUMNS,
+                rows,
+                Airports.UPSERT_SQL,
+                chunk_size=chunk_size,
+            )
+            return
+
+        insert_sql = """
+        INSERT INTO airports (
+            airport_id, name, city, country, iata, icao,
+            latitude, longitude, altitude_ft, timezone_utc_offset,
+            dst, tz_database, type, source
+        )
+        VALUES %s
+        """ + Airports.UPSERT_SQL
+
+        rows = list(ParsedCache.iter_rows(rows))
 
         if not rows:
             print("No airport rows found.")
@@ -110,13 +179,14 @@ class Airports:
         conn = Database.get_connection(db_parameters)
         try:
             with conn.cursor() as cur:
-                cur.execute(create_sql)
+                cur.execute(Airports.CREATE_SQL)
                 execute_values(cur, insert_sql, rows, page_size=10000)
                 conn.commit()
             print(f"Inserted/updated {len(rows)} airports into `airports`.")
         finally:
             conn.close()
             
+    @Instrumentation.step()
     def add_columns(db_parameters):
         conn = Database.get_connection(db_parameters)
 
@@ -136,55 +206,477 @@ class Airports:
             conn.close()
 
             
-    def calculate_flights_per_airport(db_parameters):
+    # Full recount of every airport's route counters (0 for airports without routes)
+    RECOUNT_SQL = """
+    SELECT
+        a.airport_id,
+        COALESCE(o.n, 0) AS outbound_count,
+        COALESCE(i.n, 0) AS inbound_count
+    FROM airports a
+    LEFT JOIN (
+        SELECT source_airport_id AS airport_id, COUNT(*) AS n
+        FROM airline_routes
+        WHERE source_airport_id IS NOT NULL
+        GROUP BY source_airport_id
+    ) o ON o.airport_id = a.airport_id
+    LEFT JOIN (
+        SELECT dest_airport_id AS airport_id, COUNT(*) AS n
+        FROM airline_routes
+        WHERE dest_airport_id IS NOT NULL
+        GROUP BY dest_airport_id
+    ) i ON i.airport_id = a.airport_id
+    """
+
+    COUNTER_TRIGGER = "airline_routes_airport_counters_insert"
+
+    # Statement-level triggers: each INSERT/DELETE on airline_routes applies one
+    # aggregated +/- delta per touched airport from its transition tables.
+    NEW_ROUTE_DELTAS = """
+            SELECT source_airport_id AS airport_id, 1 AS d_out, 0 AS d_in FROM new_routes
+            UNION ALL
+            SELECT dest_airport_id, 0, 1 FROM new_routes"""
+
+    OLD_ROUTE_DELTAS = """
+            SELECT source_airport_id AS airport_id, -1 AS d_out, 0 AS d_in FROM old_routes
+            UNION ALL
+            SELECT dest_airport_id, 0, -1 FROM old_routes"""
+
+    # The same transition tables as (airport, airline, +/- route record) for airport_airline_usage
+    NEW_USAGE_DELTAS = """
+            SELECT source_airport_id AS airport_id, airline_id, 1 AS delta FROM new_routes
+            UNION ALL
+            SELECT dest_airport_id, airline_id, 1 FROM new_routes"""
+
+    OLD_USAGE_DELTAS = """
+            SELECT source_airport_id AS airport_id, airline_id, -1 AS delta FROM old_routes
+            UNION ALL
+            SELECT dest_airport_id, airline_id, -1 FROM old_routes"""
+
+    # UPDATEs go through a row-level trigger that fires only when a row's airports
+    # or airline change, so bulk rewrites of other columns (Asia flags,
+    # region_pair, distance_km) never build transition tables. It sees one row.
+    ROW_UPDATE_DELTAS = """
+            SELECT NEW.source_airport_id AS airport_id, 1 AS d_out, 0 AS d_in
+            UNION ALL SELECT NEW.dest_airport_id, 0, 1
+            UNION ALL SELECT OLD.source_airport_id, -1, 0
+            UNION ALL SELECT OLD.dest_airport_id, 0, -1"""
+
+    ROW_UPDATE_USAGE_DELTAS = """
+            SELECT NEW.source_airport_id AS airport_id, NEW.airline_id AS airline_id, 1 AS delta
+            UNION ALL SELECT NEW.dest_airport_id, NEW.airline_id, 1
+            UNION ALL SELECT OLD.source_airport_id, OLD.airline_id, -1
+            UNION ALL SELECT OLD.dest_airport_id, OLD.airline_id, -1"""
+
+    # route_changes (load_routes_incremental) as usage deltas
+    ROUTE_CHANGES_USAGE_DELTAS = """
+            SELECT source_airport_id AS airport_id, airline_id, delta FROM route_changes
+            UNION ALL
+            SELECT dest_airport_id, airline_id, delta FROM route_changes"""
+
+    @staticmethod
+    def apply_deltas_sql(deltas_sql: str) -> str:
+        return f"""
+        UPDATE airports a
+        SET outbound_count = COALESCE(a.outbound_count, 0) + d.d_out,
+            inbound_count  = COALESCE(a.inbound_count, 0) + d.d_in,
+            total_in_out   = COALESCE(a.outbound_count, 0) + COALESCE(a.inbound_count, 0) + d.d_out + d.d_in
+        FROM (
+            SELECT airport_id, SUM(d_out) AS d_out, SUM(d_in) AS d_in
+            FROM ({deltas_sql}
+            ) x
+            WHERE airport_id IS NOT NULL
+            GROUP BY airport_id
+        ) d
+        WHERE a.airport_id = d.airport_id
+          AND (d.d_out <> 0 OR d.d_in <> 0);  -- updates that keep both airports write nothing
+        """
+
+    @staticmethod
+    def apply_usage_deltas_sql(deltas_sql: str) -> str:
+        """
+        Add summed (airport_id, airline_id, delta) rows to airport_airline_usage,
+        then drop the pairs whose count fell to zero. Pairs that net to zero
+        (e.g. an UPDATE keeping both airports) write nothing.
+        """
+        return f"""
+        INSERT INTO airport_airline_usage (airport_id, airline_id, route_records)
+        SELECT airport_id, airline_id, SUM(delta)
+        FROM ({deltas_sql}
+        ) x
+        WHERE airport_id IS NOT NULL AND airline_id IS NOT NULL
+        GROUP BY airport_id, airline_id
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (airport_id, airline_id) DO UPDATE
+        SET route_records = airport_airline_usage.route_records + EXCLUDED.route_records;
+
+        DELETE FROM airport_airline_usage u
+        USING (
+            SELECT airport_id, airline_id
+            FROM ({deltas_sql}
+            ) x
+            GROUP BY airport_id, airline_id
+            HAVING SUM(delta) < 0
+        ) d
+        WHERE u.airport_id = d.airport_id
+          AND u.airline_id = d.airline_id
+          AND u.route_records <= 0;
+        """
+
+    @staticmethod
+    def counter_triggers_sql() -> str:
+        return f"""
+    CREATE OR REPLACE FUNCTION airports_apply_route_deltas() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {Airports.apply_deltas_sql(Airports.NEW_ROUTE_DELTAS)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {Airports.apply_deltas_sql(Airports.OLD_ROUTE_DELTAS)}
+        ELSE  -- TRUNCATE
+            UPDATE airports
+            SET outbound_count = 0, inbound_count = 0, total_in_out = 0
+            WHERE outbound_count <> 0 OR inbound_count <> 0 OR total_in_out <> 0;
+        END IF;
+
+        -- The hub index's per-airline usage follows the same deltas
+        IF to_regclass('airport_airline_usage') IS NOT NULL THEN
+            IF TG_OP = 'INSERT' THEN
+                {Airports.apply_usage_deltas_sql(Airports.NEW_USAGE_DELTAS)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {Airports.apply_usage_deltas_sql(Airports.OLD_USAGE_DELTAS)}
+            ELSE  -- TRUNCATE
+                DELETE FROM airport_airline_usage;
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    -- One route whose airports or airline changed (see the WHEN on its trigger)
+    CREATE OR REPLACE FUNCTION airports_apply_route_update() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        {Airports.apply_deltas_sql(Airports.ROW_UPDATE_DELTAS)}
+        IF to_regclass('airport_airline_usage') IS NOT NULL THEN
+            {Airports.apply_usage_deltas_sql(Airports.ROW_UPDATE_USAGE_DELTAS)}
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    -- Airports inserted after their routes start from a recount of those routes
+    CREATE OR REPLACE FUNCTION airports_seed_route_counters() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE airports a
+        SET outbound_count = c.outbound_count,
+            inbound_count  = c.inbound_count,
+            total_in_out   = c.outbound_count + c.inbound_count
+        FROM (
+            SELECT
+                n.airport_id,
+                (SELECT COUNT(*) FROM airline_routes r WHERE r.source_airport_id = n.airport_id) AS outbound_count,
+                (SELECT COUNT(*) FROM airline_routes r WHERE r.dest_airport_id = n.airport_id) AS inbound_count
+            FROM new_airports n
+        ) c
+        WHERE a.airport_id = c.airport_id;
+        RETURN NULL;
+    END;
+    $$;
+
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_insert ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_delete ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_update ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_truncate ON airline_routes;
+    DROP TRIGGER IF EXISTS airports_seed_route_counters ON airports;
+
+    CREATE TRIGGER airline_routes_airport_counters_insert
+        AFTER INSERT ON airline_routes
+        REFERENCING NEW TABLE AS new_routes
+        FOR EACH STATEMENT EXECUTE FUNCTION airports_apply_route_deltas();
+
+    CREATE TRIGGER airline_routes_airport_counters_delete
+        AFTER DELETE ON airline_routes
+        REFERENCING OLD TABLE AS old_routes
+        FOR EACH STATEMENT EXECUTE FUNCTION airports_apply_route_deltas();
+
+    CREATE TRIGGER airline_routes_airport_counters_update
+        AFTER UPDATE OF source_airport_id, dest_airport_id, airline_id ON airline_routes
+        FOR EACH ROW
+        WHEN (OLD.source_airport_id IS DISTINCT FROM NEW.source_airport_id
+              OR OLD.dest_airport_id IS DISTINCT FROM NEW.dest_airport_id
+              OR OLD.airline_id IS DISTINCT FROM NEW.airline_id)
+        EXECUTE FUNCTION airports_apply_route_update();
+
+    CREATE TRIGGER airline_routes_airport_counters_truncate
+        AFTER TRUNCATE ON airline_routes
+        FOR EACH STATEMENT EXECUTE FUNCTION airports_apply_route_deltas();
+
+    CREATE TRIGGER airports_seed_route_counters
+        AFTER INSERT ON airports
+        REFERENCING NEW TABLE AS new_airports
+        FOR EACH STATEMENT EXECUTE FUNCTION airports_seed_route_counters();
+    """
+
+    DROP_COUNTER_TRIGGERS_SQL = """
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_insert ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_delete ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_update ON airline_routes;
+    DROP TRIGGER IF EXISTS airline_routes_airport_counters_truncate ON airline_routes;
+    DROP TRIGGER IF EXISTS airports_seed_route_counters ON airports;
+    DROP FUNCTION IF EXISTS airports_apply_route_deltas();
+    DROP FUNCTION IF EXISTS airports_apply_route_update();
+    DROP FUNCTION IF EXISTS airports_seed_route_counters();
+    """
+
+    @staticmethod
+    def counter_triggers_enabled(cur) -> bool:
+        return Database.trigger_exists(cur, "airline_routes", Airports.COUNTER_TRIGGER)
+
+    @staticmethod
+    def update_counts_sql() -> str:
+        """Set the counters from a full recount, writing only airports whose values differ."""
+        return f"""
+        UPDATE airports a
+        SET outbound_count = c.outbound_count,
+            inbound_count  = c.inbound_count,
+            total_in_out   = c.outbound_count + c.inbound_count
+        FROM ({Airports.RECOUNT_SQL}) c
+        WHERE a.airport_id = c.airport_id
+          AND (a.outbound_count, a.inbound_count, a.total_in_out)
+              IS DISTINCT FROM (c.outbound_count, c.inbound_count, c.outbound_count + c.inbound_count);
+        """
+
+    @staticmethod
+    @Instrumentation.step()
+    def enable_counter_triggers(db_parameters):
+        """
+        Switch the airport counters and airport_airline_usage to incremental
+        mode: recount once, then let statement-level triggers on airline_routes
+        keep them current.
+        The embedded backend has no triggers: counts stay in full-recount mode.
+        """
+        Airports.add_columns(db_parameters)
+        if Database.is_embedded(db_parameters):
+            print("Counter triggers need Postgres; airport counts stay in full-recount mode.")
+            Airports.calculate_flights_per_airport(db_parameters)
+            return
+
         conn = Database.get_connection(db_parameters)
         try:
             with conn.cursor() as cur:
-                #  reset so airports with no routes are 0
-                cur.execute("""
-                    UPDATE airports
-                    SET inbound_count = 0,
-                        outbound_count = 0,
-                        total_in_out = 0;
-                """)
+                # No route changes between the seed recount and the triggers going live
+                cur.execute("LOCK TABLE airline_routes IN SHARE ROW EXCLUSIVE MODE;")
+                cur.execute(Airports.update_counts_sql())
+                seeded = cur.rowcount
+                cur.execute(Airports.HUB_INDEX_SQL)
+                usage = Airports.refresh_airline_usage(cur)
+                cur.execute(Airports.counter_triggers_sql())
+            conn.commit()
+            print(f"Airport counter triggers enabled ({seeded} airports, {usage} airline-usage rows re-seeded).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
-                # Outbound update (by source_airport_id)
-                cur.execute("""
-                    UPDATE airports a
-                    SET outbound_count = sub.out_count
-                    FROM (
-                        SELECT source_airport_id AS airport_id, COUNT(*) AS out_count
-                        FROM airline_routes
-                        WHERE source_airport_id IS NOT NULL
-                        GROUP BY source_airport_id
-                    ) sub
-                    WHERE a.airport_id = sub.airport_id;
-                """)
+    @staticmethod
+    def disable_counter_triggers(db_parameters):
+        """Back to full-recount mode (calculate_flights_per_airport)."""
+        if Database.is_embedded(db_parameters):
+            return
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(Airports.DROP_COUNTER_TRIGGERS_SQL)
+            conn.commit()
+            print("Airport counter triggers disabled.")
+        finally:
+            conn.close()
 
-                # Inbound update (by destination_airport_id AKA dest_airport_id)
-                cur.execute("""
-                    UPDATE airports a
-                    SET inbound_count = sub.in_count
-                    FROM (
-                        SELECT dest_airport_id AS airport_id, COUNT(*) AS in_count
-                        FROM airline_routes
-                        WHERE dest_airport_id IS NOT NULL
-                        GROUP BY dest_airport_id
-                    ) sub
-                    WHERE a.airport_id = sub.airport_id;
+    @staticmethod
+    @Instrumentation.step()
+    def verify_flight_counts(db_parameters, fix: bool = False, show: int = 10) -> int:
+        """
+        Compare inbound/outbound/total counters against a full recount.
+        Prints up to `show` mismatches and returns how many airports differ;
+        fix=True rewrites just those airports.
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT
+                        a.airport_id,
+                        a.iata,
+                        a.outbound_count, c.outbound_count,
+                        a.inbound_count, c.inbound_count,
+                        a.total_in_out, c.outbound_count + c.inbound_count
+                    FROM airports a
+                    JOIN ({Airports.RECOUNT_SQL}) c ON c.airport_id = a.airport_id
+                    WHERE (a.outbound_count, a.inbound_count, a.total_in_out)
+                          IS DISTINCT FROM (c.outbound_count, c.inbound_count, c.outbound_count + c.inbound_count)
+                    ORDER BY a.airport_id;
                 """)
+                mismatches = cur.fetchall()
 
-                # Total update
-                cur.execute("""
-                    UPDATE airports
-                    SET total_in_out = COALESCE(inbound_count, 0) + COALESCE(outbound_count, 0);
-                """)
+                for airport_id, iata, out_now, out_ok, in_now, in_ok, total_now, total_ok in mismatches[:show]:
+                    print(
+                        f"  airport {airport_id} ({iata}): out {out_now} vs {out_ok}, "
+                        f"in {in_now} vs {in_ok}, total {total_now} vs {total_ok}"
+                    )
 
+                if mismatches and fix:
+                    cur.execute(Airports.update_counts_sql())
             conn.commit()
-            print("Airport counts updated successfully!")
+
+            if not mismatches:
+                print("Airport flight counts verified: all counters match a full recount.")
+            else:
+                action = "fixed" if fix else "found"
+                print(f"Airport flight counts: {len(mismatches)} mismatched airports {action}.")
+            return len(mismatches)
         finally:
             conn.close()
 
+    HUB_INDEX_SQL = """
+    -- Every airport ranked per metric; a top-K hub list is WHERE metric = ... AND hub_rank <= K
+    CREATE TABLE IF NOT EXISTS airport_hub_rank (
+        metric     TEXT    NOT NULL,
+        hub_rank   INTEGER NOT NULL,
+        airport_id INTEGER NOT NULL,
+        score      DOUBLE PRECISION,
+        PRIMARY KEY (metric, hub_rank)
+    );
+
+    -- Route records touching each airport (as source or destination) per airline
+    CREATE TABLE IF NOT EXISTS airport_airline_usage (
+        airport_id    INTEGER NOT NULL,
+        airline_id    INTEGER NOT NULL,
+        route_records BIGINT  NOT NULL,
+        PRIMARY KEY (airport_id, airline_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_airport_airline_usage_rank
+        ON airport_airline_usage(airport_id, route_records DESC);
+    """
+
+    @staticmethod
+    def refresh_hub_rank(cur, metric: str, score_sql: str) -> int:
+        """
+        Rank every airport by score_sql (an airports column/expression), descending
+        with NULLs first as in ORDER BY ... DESC, ties by airport_id.
+        Only rank slots whose airport or score changed are rewritten.
+        """
+        cur.execute(f"""
+            INSERT INTO airport_hub_rank (metric, hub_rank, airport_id, score)
+            SELECT
+                %(metric)s,
+                ROW_NUMBER() OVER (ORDER BY {score_sql} DESC NULLS FIRST, airport_id),
+                airport_id,
+                {score_sql}
+            FROM airports
+            ON CONFLICT (metric, hub_rank) DO UPDATE
+            SET airport_id = EXCLUDED.airport_id,
+                score = EXCLUDED.score
+            WHERE (airport_hub_rank.airport_id, airport_hub_rank.score)
+                  IS DISTINCT FROM (EXCLUDED.airport_id, EXCLUDED.score);
+        """, {"metric": metric})
+        changed = cur.rowcount
+
+        cur.execute("""
+            DELETE FROM airport_hub_rank
+            WHERE metric = %(metric)s
+              AND hub_rank > (SELECT COUNT(*) FROM airports);
+        """, {"metric": metric})
+        return changed + cur.rowcount
+
+    @staticmethod
+    def refresh_airline_usage(cur) -> int:
+        """
+        Recount airport_airline_usage and write only the (airport, airline) pairs
+        that changed. Returns the rows deleted, inserted or updated.
+        """
+        cur.execute("""
+            CREATE TEMP TABLE airport_airline_usage_now ON COMMIT DROP AS
+            SELECT airport_id, airline_id, COUNT(*) AS route_records
+            FROM (
+                SELECT source_airport_id AS airport_id, airline_id
+                FROM airline_routes
+                WHERE airline_id IS NOT NULL AND source_airport_id IS NOT NULL
+
+                UNION ALL
 
+                SELECT dest_airport_id AS airport_id, airline_id
+                FROM airline_routes
+                WHERE airline_id IS NOT NULL AND dest_airport_id IS NOT NULL
+            ) x
+            GROUP BY airport_id, airline_id;
+        """)
 
-            
\ No newline at end of file
+        cur.execute("""
+            DELETE FROM airport_airline_usage u
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM airport_airline_usage_now n
+                WHERE n.airport_id = u.airport_id
+                  AND n.airline_id = u.airline_id
+            );
+        """)
+        removed = cur.rowcount
+
+        cur.execute("""
+            INSERT INTO airport_airline_usage (airport_id, airline_id, route_records)
+            SELECT airport_id, airline_id, route_records
+            FROM airport_airline_usage_now
+            ON CONFLICT (airport_id, airline_id) DO UPDATE
+            SET route_records = EXCLUDED.route_records
+            WHERE airport_airline_usage.route_records <> EXCLUDED.route_records;
+        """)
+        written = cur.rowcount
+
+        cur.execute("DROP TABLE airport_airline_usage_now;")
+        return removed + written
+
+    @staticmethod
+    def refresh_hub_index(cur, recount_usage: bool = True):
+        """
+        Bring airport_hub_rank ('total_in_out') and airport_airline_usage up to date.
+        recount_usage=False leaves the usage to the counter triggers.
+        """
+        cur.execute(Airports.HUB_INDEX_SQL)
+        ranks = Airports.refresh_hub_rank(cur, "total_in_out", "total_in_out")
+        usage = Airports.refresh_airline_usage(cur) if recount_usage else 0
+        return ranks, usage
+
+    @Instrumentation.step()
+    def calculate_flights_per_airport(db_parameters, force: bool = False):
+        """
+        Full recount of inbound/outbound/total per airport; only airports whose
+        counts changed are rewritten. With the counter triggers enabled the
+        counts and airport_airline_usage are already current, so both recounts
+        are skipped unless force=True.
+        Either way the hub ranks are then refreshed (changed rows only).
+        Returns the number of airports updated.
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                recount = force or not Airports.counter_triggers_enabled(cur)
+                if not recount:
+                    print("Airport counts and airline usage are maintained by triggers; recount skipped.")
+                    changed = 0
+                else:
+                    cur.execute(Airports.update_counts_sql())
+                    changed = cur.rowcount
+
+                ranks, usage = Airports.refresh_hub_index(cur, recount_usage=recount)
+
+            conn.commit()
+            print(
+                f"Airport counts updated successfully! ({changed} airports changed; "
+                f"hub index: {ranks} rank rows, {usage} airline-usage rows rewritten)"
+            )
+            return changed
+        finally:
+            conn.close()
@@ -0,0 +1,402 @@
+from methods.database import Database
+from methods.airline_routes import AirlineRoutes
+from methods.bulk_loader import BulkLoader
+from methods.code_dictionary import CodeDictionary
+from methods.geo import Geo
+from methods.spatial_index import SpatialIndex
+from methods.synthetic_data import SyntheticData
+from methods.instrumentation import Instrumentation
+from methods.airlines import Airlines
+from methods.airports import Airports
+from methods.aircraft import Aircraft
+from methods.operational_airlines import OperationalAirlines
+from methods.regions import Regions
+from methods.report import Report
+from methods.plot import Plot
+
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+class Benchmark:
+
+    @staticmethod
+    def route_key_schema(file_path: str, db_parameters: dict, workers: int = 1, chunk_size: int = 50000):
+        """
+        Compare the nine-column airline_routes_uk schema against the route_key
+        schema and the code-id schema (airline_routes_uk on CodeDictionary ids).
+
+        Each variant is loaded into its own scratch schema with the COPY + merge
+        path, then a second identical load measures the pure conflict-check cost.
+        Prints load times plus table and index sizes; the scratch schemas are dropped.
+        """
+        rows = list(AirlineRoutes.read_routes(file_path, workers))
+        keyed_rows = [(AirlineRoutes.route_fingerprint(r),) + r for r in rows]
+
+        def coded_rows(cur):
+            # Ids come from the scratch schema's dimension tables, so encode after create_sql
+            dictionary = CodeDictionary.from_db(cur)
+            return list(dictionary.encode_routes(cur, rows, AirlineRoutes.CODE_POSITIONS, chunk_size))
+
+        variants = [
+            (
+                "natural_key",
+                AirlineRoutes.CREATE_SQL,
+                AirlineRoutes.ROUTE_COLUMNS,
+                rows,
+                "ON CONFLICT ON CONSTRAINT airline_routes_uk DO NOTHING",
+            ),
+            (
+                "route_key",
+                AirlineRoutes.ROUTE_KEY_CREATE_SQL + AirlineRoutes.ROUTE_KEY_INDEXES_SQL,
+                ("route_key",) + AirlineRoutes.ROUTE_COLUMNS,
+                keyed_rows,
+                "ON CONFLICT (route_key) DO NOTHING",
+            ),
+            (
+                "code_ids",
+                AirlineRoutes.CODED_CREATE_SQL,
+                AirlineRoutes.CODED_KEY_COLUMNS,
+                coded_rows,
+                AirlineRoutes.CODED_CONFLICT_SQL,
+            ),
+        ]
+
+        results = []
+        conn = Database.get_connection(db_parameters)
+        try:
+            for name, create_sql, columns, variant_rows, conflict_sql in variants:
+                schema = f"route_key_bench_{name}"
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+                    cur.execute(f"CREATE SCHEMA {schema};")
+                    cur.execute(f"SET search_path TO {schema}, public;")
+                    cur.execute(create_sql)
+                    if callable(variant_rows):
+                        variant_rows = variant_rows(cur)
+                conn.commit()
+
+                timings = []
+                for _ in range(2):  # first load inserts, second is all conflicts
+                    started = time.perf_counter()
+                    with conn.cursor() as cur:
+                        BulkLoader.merge_rows(cur, "airline_routes", columns, variant_rows, conflict_sql, chunk_size)
+                    conn.commit()
+                    timings.append(time.perf_counter() - started)
+
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT
+                            pg_relation_size('airline_routes'),
+                            pg_indexes_size('airline_routes')
+                    """)
+                    table_bytes, index_bytes = cur.fetchone()
+                    cur.execute("SET search_path TO public;")
+                    cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+                conn.commit()
+
+                results.append({
+                    "schema": name,
+                    "rows": len(variant_rows),
+                    "initial_load_s": timings[0],
+                    "reload_s": timings[1],
+                    "table_mb": table_bytes / 1024 / 1024,
+                    "indexes_mb": index_bytes / 1024 / 1024,
+                })
+        finally:
+            conn.close()
+
+        print("schema      | rows     | initial load | reload (all dup) | table MB | indexes MB")
+        for r in results:
+            print(
+                f"{r['schema']:<11} | {r['rows']:<8} | {r['initial_load_s']:>10.2f}s | "
+                f"{r['reload_s']:>14.2f}s | {r['table_mb']:>8.1f} | {r['indexes_mb']:>10.1f}"
+            )
+        return results
+
+    # Per-row distance math in SQL: what a radius query costs without the index
+    RADIUS_SCAN_SQL = f"""
+    SELECT airport_id
+    FROM airports
+    WHERE 2 * {Geo.EARTH_RADIUS_KM} * asin(sqrt(
+        power(sin(radians(latitude - %(lat)s) / 2), 2)
+        + cos(radians(%(lat)s)) * cos(radians(latitude)) * power(sin(radians(longitude - %(lon)s) / 2), 2)
+    )) <= %(km)s;
+    """
+
+    @staticmethod
+    def spatial_index(db_parameters: dict, queries: int = 1000, radii_km=(50, 300, 1000), k: int = 5,
+                      sql_queries: int = 20, seed: int = 0):
+        """
+        Time SpatialIndex radius and k-nearest queries against a NumPy full scan
+        (every airport, haversine) and the SQL full scan, checking that all three
+        return the same airports. Query points are random airports.
+        """
+        started = time.perf_counter()
+        index = SpatialIndex.from_db(db_parameters)
+        build_s = time.perf_counter() - started
+
+        rng = np.random.default_rng(seed)
+        points = rng.integers(0, len(index.airport_ids), queries)
+
+        def timed(fn):
+            t = time.perf_counter()
+            out = [fn(p) for p in points]
+            return out, (time.perf_counter() - t) / len(points)
+
+        results = []
+        for km in radii_km:
+            fast, fast_s = timed(lambda p: index.radius_positions(index.lat[p], index.lon[p], km)[0])
+            slow, slow_s = timed(lambda p: index.brute_force_radius(index.lat[p], index.lon[p], km)[0])
+            mismatches = sum(set(a) != set(b) for a, b in zip(fast, slow))
+            results.append((f"radius {km} km", fast_s, slow_s, mismatches))
+
+        fast, fast_s = timed(lambda p: index.nearest_positions(index.lat[p], index.lon[p], k, exclude=p)[1])
+        slow, slow_s = timed(lambda p: index.brute_force_radius(index.lat[p], index.lon[p], np.inf)[1][1:k + 1])
+        mismatches = sum(not np.allclose(a, b) for a, b in zip(fast, slow))
+        results.append((f"{k}-nearest", fast_s, slow_s, mismatches))
+
+        # SQL full scan (per-row trig), on a few points only
+        km = radii_km[len(radii_km) // 2]
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                t = time.perf_counter()
+                mismatches = 0
+                for p in points[:sql_queries]:
+                    cur.execute(Benchmark.RADIUS_SCAN_SQL, {"lat": float(index.lat[p]), "lon": float(index.lon[p]), "km": km})
+                    found = {row[0] for row in cur.fetchall()}
+                    expected = set(index.airport_ids[index.radius_positions(index.lat[p], index.lon[p], km)[0]].tolist())
+                    mismatches += found != expected
+                sql_s = (time.perf_counter() - t) / max(min(sql_queries, len(points)), 1)
+        finally:
+            conn.close()
+
+        print(f"SpatialIndex over {len(index.airport_ids)} airports built in {build_s * 1000:.1f} ms ({len(index.cell_ids)} cells)")
+        print("query            | index      | full scan  | speed-up | mismatches")
+        for name, fast_s, slow_s, bad in results:
+            print(f"{name:<16} | {fast_s * 1e6:>7.1f} us | {slow_s * 1e6:>7.1f} us | {slow_s / fast_s:>7.1f}x | {bad}")
+        print(f"SQL scan, radius {km} km: {sql_s * 1000:.2f} ms/query (index disagrees on {mismatches} of {min(sql_queries, len(points))})")
+        return results
+
+    @staticmethod
+    def routes_reader(file_path: str):
+        """
+        Parse routes.dat with csv.reader (iter_routes) and with RoutesReader
+        (tuples, columns, Arrow), printing time and peak traced memory of each
+        and checking the rows are identical.
+        """
+        from methods.routes_reader import RoutesReader
+        import tracemalloc
+
+        variants = [
+            ("csv.reader", lambda: list(AirlineRoutes.iter_routes(file_path))),
+            ("mmap tuples", lambda: list(RoutesReader(file_path).iter_rows())),
+            ("mmap columns", lambda: RoutesReader(file_path).columns()),
+            ("mmap arrow", lambda: RoutesReader(file_path).to_arrow()),
+        ]
+
+        results, outputs = [], {}
+        for name, fn in variants:
+            started = time.perf_counter()
+            outputs[name] = fn()
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()  # second run: tracing slows allocation-heavy code
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((name, elapsed, peak))
+
+        expected = outputs["csv.reader"]
+        identical = outputs["mmap tuples"] == expected and outputs["mmap arrow"].to_pylist() == [
+            dict(zip(AirlineRoutes.ROUTE_COLUMNS, row)) for row in expected
+        ]
+
+        print(f"{len(expected)} routes from {file_path} (rows identical: {identical})")
+        print("reader       | time      | peak MB")
+        for name, elapsed, peak in results:
+            print(f"{name:<12} | {elapsed:>8.2f}s | {peak / 1024 / 1024:>7.1f}")
+        return results
+
+
+    # Everything the suite's steps create; dropped before each scale so every load starts empty
+    SUITE_TABLES = (
+        "route_equipment",
+        "airline_routes",
+        "airline_routes_manifest",
+        "airports",
+        "airlines",
+        "aircraft",
+        "operational_airlines",
+        "asia_report",
+        "airport_hub_rank",
+        "airport_airline_usage",
+        "regional_flow_report",
+        "regional_report_dirty_airlines",
+        "country_regions",
+        "regions",
+    )
+
+    @staticmethod
+    def suite_steps(data_dir: str) -> list:
+        """(name, callable(db_parameters)) in run order: loaders, transforms, then every report."""
+        path = lambda name: os.path.join(data_dir, name)
+        countries = path("countries.dat.txt")
+        regions = ["asia", "middle_east", "europe"]
+        return [
+            ("load_airlines", lambda p: Airlines.load_airlines_to_db(path("airlines.dat.txt"), p, use_copy=True)),
+            ("load_airports", lambda p: Airports.load_airports_to_db(path("airports.dat.txt"), p, use_copy=True)),
+            ("load_aircraft", lambda p: Aircraft.load_aircraft_to_db(path("planes.dat.txt"), p, use_copy=True)),
+            ("load_routes", lambda p: AirlineRoutes.load_routes_to_db(path("routes.dat.txt"), p, use_copy=True)),
+            ("operational_airlines", OperationalAirlines.create_table),
+            ("map_asia_flags", lambda p: AirlineRoutes.map_asia_flags(p, countries)),
+            ("airport_columns", Airports.add_columns),
+            ("flights_per_airport", Airports.calculate_flights_per_airport),
+            ("asia_report", Report.create_asia_report_table),
+            ("asia_report_pie", lambda p: Plot.export_asia_report_flights_pie(
+                p,
+                output_png_path="output data/asia_report_flights_pie.png",
+                top_n=10,
+                also_export_excel=False,
+                output_excel_path="output data/pie_chart_asia_report_flights.xlsx",
+            )),
+            ("top10_airports_report", Report.get_airlines_using_top10_airports),
+            ("unique_airports_report", Report.get_airlines_unique_airport_counts),
+            ("apply_regions", lambda p: Regions.standard(countries).apply_to_db(p)),
+            ("regional_reports", lambda p: Report.create_regional_reports(p, regions, full=True)),
+        ]
+
+    @staticmethod
+    @contextmanager
+    def working_directory(path: str):
+        """Run with cwd = path (with an "output data" folder), so report files land there."""
+        os.makedirs(os.path.join(path, "output data"), exist_ok=True)
+        previous = os.getcwd()
+        os.chdir(path)
+        try:
+            yield
+        finally:
+            os.chdir(previous)
+
+    @staticmethod
+    def reset_tables(db_parameters: dict):
+        with Database.connection(db_parameters) as conn:
+            with conn.cursor() as cur:
+                for table in Benchmark.SUITE_TABLES:
+                    cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE;")
+            conn.commit()
+
+    @staticmethod
+    def run_step(fn, db_parameters: dict) -> dict:
+        """Wall/CPU time and Instrumentation counter deltas for one call."""
+        _, counters = Instrumentation.state()
+        before = dict(counters)
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn(db_parameters)
+        return {
+            "wall_s": time.perf_counter() - wall,
+            "cpu_s": time.process_time() - cpu,
+            **{key: counters[key] - before[key] for key in counters},
+        }
+
+    @staticmethod
+    def load_baseline(path: str) -> dict:
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, tolerance: float, min_delta_s: float) -> list:
+        """
+        (step, wall_s, baseline_s, ratio, flag) per step. A step is flagged as a
+        regression when it is more than `tolerance` slower than the baseline and
+        also at least min_delta_s slower in absolute terms, so tiny steps don't flap.
+        """
+        rows = []
+        for step, result in results.items():
+            base = baseline.get(step, {}).get("wall_s")
+            wall = result["wall_s"]
+            if base is None:
+                rows.append((step, wall, None, None, "new"))
+                continue
+            ratio = wall / base if base > 0 else float("inf")
+            if ratio > 1 + tolerance and wall - base >= min_delta_s:
+                flag = "REGRESSION"
+            elif ratio < 1 / (1 + tolerance) and base - wall >= min_delta_s:
+                flag = "faster"
+            else:
+                flag = "ok"
+            rows.append((step, wall, base, ratio, flag))
+        return rows
+
+    @staticmethod
+    def suite(db_parameters: dict, scales=(10,), seed: int = 0, data_dir: str = "benchmark data",
+              input_dir: str = "input data", baseline_path: str = "benchmark data/baseline.json",
+              tolerance: float = 0.2, min_delta_s: float = 0.05, update_baseline: bool = False) -> dict:
+        """
+        Generate (or reuse) synthetic data per scale, load it from empty tables
+        and time every loader, transform and report step. DROPS the suite's
+        tables first, so point db_parameters at a scratch database.
+
+        Results are compared with the stored baseline for the same scale and
+        seed; scales without a baseline (or all of them with update_baseline)
+        are written back as the new baseline. Returns
+        {scale label: {"results": ..., "regressions": [step, ...]}}.
+        """
+        baseline = Benchmark.load_baseline(baseline_path)
+        backend = Database.backend(db_parameters)
+        summary = {}
+
+        for scale in scales:
+            # Backends are baselined separately; Postgres keeps the plain label
+            label = f"x{scale}_seed{seed}" + ("" if backend == "postgres" else f"_{backend}")
+            source = os.path.abspath(SyntheticData.generate(scale, data_dir, seed, input_dir))
+            with open(os.path.join(source, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            Benchmark.reset_tables(db_parameters)
+            results = {}
+            with Benchmark.working_directory(os.path.join(data_dir, f"run_{label}")):
+                for name, fn in Benchmark.suite_steps(source):
+                    results[name] = Benchmark.run_step(fn, db_parameters)
+
+            stored = baseline.get(label, {})
+            rows = Benchmark.compare(results, stored.get("steps", {}), tolerance, min_delta_s)
+            regressions = [step for step, *_, flag in rows if flag == "REGRESSION"]
+
+            print(f"\nBenchmark {label}: {manifest['routes']} routes, {manifest['airports']} airports, {manifest['airlines']} airlines")
+            print("step                     |     wall |     cpu | round trips | baseline |  change | flag")
+            for step, wall, base, ratio, flag in rows:
+                r = results[step]
+                base_txt = f"{base:>7.2f}s" if base is not None else "       -"
+                change_txt = f"{(ratio - 1) * 100:>+6.0f}%" if ratio is not None else "      -"
+                print(
+                    f"{step:<24} | {wall:>7.2f}s | {r['cpu_s']:>6.2f}s | {r['db_round_trips']:>11} | "
+                    f"{base_txt} | {change_txt} | {flag}"
+                )
+
+            if update_baseline or not stored:
+                baseline[label] = {
+                    "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "backend": backend,
+                    "data": manifest,
+                    "steps": results,
+                }
+                print(f"Baseline for {label} written to {baseline_path}.")
+
+            summary[label] = {"results": results, "regressions": regressions}
+
+        directory = os.path.dirname(baseline_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        return summary
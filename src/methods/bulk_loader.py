@@ -0,0 +1,195 @@
+from methods.database import Database
+from methods.embedded import EmbeddedCursor
+from methods.instrumentation import Instrumentation
+from methods.parsed_cache import ParsedCache
+
+import io
+import time
+from itertools import islice
+from typing import Iterable, Optional, Sequence
+
+
+class BulkLoader:
+
+    @staticmethod
+    def copy_value(value) -> str:
+        """
+        Encode one Python value for COPY ... FROM STDIN (text format).
+        None -> \\N, booleans -> t/f, strings are escaped.
+        """
+        if value is None:
+            return r"\N"
+        if value is True:
+            return "t"
+        if value is False:
+            return "f"
+        if isinstance(value, str):
+            return (
+                value.replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r")
+            )
+        return str(value)
+
+    @staticmethod
+    def iter_chunks(rows: Iterable[tuple], chunk_size: int):
+        """Yield lists of at most chunk_size rows without materializing the input."""
+        it = iter(rows)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def create_staging(cur, target_table: str, columns: Sequence[str], extra_columns: Optional[dict] = None) -> str:
+        """
+        (Re)create an UNLOGGED staging table shaped like the given columns of target_table.
+        extra_columns ({name: sql_type}) are prepended, e.g. a row hash.
+        Returns the staging table name.
+        """
+        staging = f"{target_table}_staging"
+        extra_sql = "".join(f"NULL::{sql_type} AS {name}, " for name, sql_type in (extra_columns or {}).items())
+
+        cur.execute(f"DROP TABLE IF EXISTS {staging};")
+        cur.execute(f"""
+            CREATE UNLOGGED TABLE {staging} AS
+            SELECT {extra_sql}{", ".join(columns)}
+            FROM {target_table}
+            WITH NO DATA;
+        """)
+        return staging
+
+    @staticmethod
+    def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[tuple], chunk_size: int = 50000) -> int:
+        """
+        Stream rows into `table` with COPY ... FROM STDIN, chunk_size rows at a time,
+        so memory stays bounded by one chunk regardless of input size.
+        On the embedded backend each chunk is one INSERT from a DataFrame instead.
+        Returns the number of rows copied.
+        """
+        if ParsedCache.is_table(rows):
+            return BulkLoader.copy_arrow(cur, table, columns, rows, chunk_size)
+
+        copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)"
+        encode = BulkLoader.copy_value
+        total = 0
+
+        # Time spent inside the row generator (file parsing) is reported apart from COPY
+        for chunk in BulkLoader.iter_chunks(Instrumentation.timed_iter(rows, "parse"), chunk_size):
+            if isinstance(cur, EmbeddedCursor):
+                total += cur.insert_rows(table, columns, chunk)
+                Instrumentation.add_rows(len(chunk))
+                continue
+            buf = io.StringIO()
+            for row in chunk:
+                buf.write("\t".join([encode(v) for v in row]))
+                buf.write("\n")
+            buf.seek(0)
+            cur.copy_expert(copy_sql, buf)
+            total += len(chunk)
+            Instrumentation.add_rows(len(chunk))
+
+        return total
+
+    @staticmethod
+    def copy_arrow(cur, table: str, columns: Sequence[str], data, chunk_size: int = 50000) -> int:
+        """
+        copy_rows for a pyarrow Table (a ParsedCache hit): each batch is encoded
+        by Arrow's CSV writer and sent with COPY ... (FORMAT csv), whose NULL
+        (empty unquoted field) and "" conventions match the writer's, so no
+        Python objects are built per row. Embedded cursors insert the batches
+        as Arrow directly.
+        """
+        import pyarrow.csv as pa_csv
+
+        data = data.select(list(columns))
+        copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        options = pa_csv.WriteOptions(include_header=False, quoting_style="needed")
+        total = 0
+
+        for batch in data.to_batches(max_chunksize=chunk_size):
+            if isinstance(cur, EmbeddedCursor):
+                total += cur.insert_arrow(table, columns, batch)
+                Instrumentation.add_rows(batch.num_rows)
+                continue
+            buf = io.BytesIO()
+            pa_csv.write_csv(batch, buf, options)
+            buf.seek(0)
+            cur.copy_expert(copy_sql, buf)
+            total += batch.num_rows
+            Instrumentation.add_rows(batch.num_rows)
+
+        return total
+
+    @staticmethod
+    def merge_rows(
+        cur,
+        target_table: str,
+        columns: Sequence[str],
+        rows: Iterable[tuple],
+        conflict_sql: str,
+        chunk_size: int = 50000,
+    ):
+        """
+        COPY rows into a fresh staging table, then merge staging -> target with
+        one INSERT ... SELECT ... {conflict_sql}. Returns (rows_copied, rows_merged).
+        """
+        staging = BulkLoader.create_staging(cur, target_table, columns)
+        with Instrumentation.phase("copy"):
+            copied = BulkLoader.copy_rows(cur, staging, columns, rows, chunk_size)
+
+        col_list = ", ".join(columns)
+        with Instrumentation.phase("merge"):
+            cur.execute(f"""
+                INSERT INTO {target_table} ({col_list})
+                SELECT {col_list}
+                FROM {staging}
+                {conflict_sql};
+            """)
+            merged = cur.rowcount
+
+        cur.execute(f"DROP TABLE IF EXISTS {staging};")
+        return copied, merged
+
+    @staticmethod
+    def copy_merge(
+        db_parameters: dict,
+        target_table: str,
+        create_sql: str,
+        columns: Sequence[str],
+        rows: Iterable[tuple],
+        conflict_sql: str,
+        chunk_size: int = 50000,
+    ) -> int:
+        """
+        Shared bulk-load path:
+          1. CREATE the target table (create_sql) if needed
+          2. COPY rows into an unlogged staging table in fixed-size chunks
+          3. merge staging -> target with one INSERT ... SELECT ... {conflict_sql}
+
+        Prints rows/sec and returns the number of rows streamed.
+        """
+        started = time.perf_counter()
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(create_sql)
+                copied, merged = BulkLoader.merge_rows(cur, target_table, columns, rows, conflict_sql, chunk_size)
+            with Instrumentation.phase("commit"):
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - started
+        rate = copied / elapsed if elapsed > 0 else 0.0
+        print(
+            f"COPY loaded {copied} rows into `{target_table}` "
+            f"({merged} inserted/updated) in {elapsed:.2f}s ({rate:,.0f} rows/sec)."
+        )
+        return copied
@@ -0,0 +1,244 @@
+from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.airports import Airports
+from methods.route_graph import RouteGraph
+from methods.route_network import RouteNetwork
+from methods.instrumentation import Instrumentation
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class Centrality:
+    """
+    Hub centrality over the all-airline route network (one edge per airport pair):
+
+    degree:      distinct airports linked to the airport (in or out)
+    pagerank:    PageRank with edges weighted by their route records
+    betweenness: Brandes betweenness on hop-shortest paths, estimated from a
+                 random sample of source airports and normalised to 0..1
+
+    Results are stored as airports columns of the same names and ranked in
+    airport_hub_rank under the same metric names, next to 'total_in_out'.
+    """
+
+    METRICS = ("degree", "pagerank", "betweenness")
+    COLUMN_TYPES = {"degree": "INTEGER", "pagerank": "DOUBLE PRECISION", "betweenness": "DOUBLE PRECISION"}
+
+    @staticmethod
+    def degree(network: RouteNetwork) -> np.ndarray:
+        """Distinct neighbours per node (an airport served both ways counts once)."""
+        n = network.n_nodes
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(network.out_ptr))
+        pairs = np.unique(np.minimum(src, network.out_adj) * n + np.maximum(src, network.out_adj))
+        return np.bincount(np.concatenate([pairs // n, pairs % n]), minlength=n)
+
+    @staticmethod
+    def pagerank(network: RouteNetwork, damping: float = 0.85, tol: float = 1e-10, max_iter: int = 200):
+        """
+        (scores, iterations). Power iteration where each step is one sparse
+        matrix-vector product over the edge list (np.bincount); rank held by
+        airports without departures is spread evenly, so scores sum to 1.
+        """
+        n = network.n_nodes
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(network.out_ptr))
+        dst = network.out_adj
+        weight = network.out_records.astype(np.float64)
+
+        out_weight = np.bincount(src, weights=weight, minlength=n)
+        share = weight / out_weight[src]
+        dangling = out_weight == 0
+
+        rank = np.full(n, 1.0 / n)
+        for iteration in range(1, max_iter + 1):
+            new = damping * np.bincount(dst, weights=rank[src] * share, minlength=n)
+            new += (1.0 - damping + damping * rank[dangling].sum()) / n
+            delta = np.abs(new - rank).sum()
+            rank = new
+            if delta < tol:
+                break
+        return rank, iteration
+
+    @staticmethod
+    def brandes_source(ptr: np.ndarray, adj: np.ndarray, source: int) -> np.ndarray:
+        """
+        Dependency of `source` on every node (Brandes): one level-synchronous BFS
+        counting shortest paths, then the dependencies pushed back level by level.
+        """
+        n = len(ptr) - 1
+        dist = np.full(n, -1, dtype=np.int32)
+        sigma = np.zeros(n)
+        dist[source] = 0
+        sigma[source] = 1.0
+
+        levels = []  # (from, to) of the shortest-path DAG edges, one entry per level
+        frontier = np.array([source], dtype=np.int32)
+        depth = 0
+        while len(frontier):
+            nbrs, via = RouteNetwork.expand(ptr, adj, frontier)
+            nxt = np.unique(nbrs[dist[nbrs] < 0])
+            dist[nxt] = depth + 1
+            on_dag = dist[nbrs] == depth + 1
+            u, w = via[on_dag], nbrs[on_dag]
+            sigma += np.bincount(w, weights=sigma[u], minlength=n)
+            levels.append((u, w))
+            frontier = nxt
+            depth += 1
+
+        delta = np.zeros(n)
+        for u, w in reversed(levels):
+            delta += np.bincount(u, weights=sigma[u] / sigma[w] * (1.0 + delta[w]), minlength=n)
+        delta[source] = 0.0
+        return delta
+
+    @staticmethod
+    def brandes_chunk(task: tuple) -> np.ndarray:
+        """Process-pool worker: summed dependencies for a chunk of sources."""
+        ptr, adj, sources = task
+        total = np.zeros(len(ptr) - 1)
+        for s in sources:
+            total += Centrality.brandes_source(ptr, adj, int(s))
+        return total
+
+    @staticmethod
+    def betweenness(network: RouteNetwork, samples: int = 512, workers: int = 1, seed: int = 0) -> np.ndarray:
+        """
+        Sampled betweenness: exact Brandes over `samples` random source airports
+        (all of them when there are fewer), scaled up to the full source count
+        and normalised by (n - 1)(n - 2) over airports that have routes.
+        """
+        active = np.flatnonzero((np.diff(network.out_ptr) + np.diff(network.in_ptr)) > 0)
+        n_active = len(active)
+        if n_active < 3:
+            return np.zeros(network.n_nodes)
+
+        rng = np.random.default_rng(seed)
+        sources = active if samples >= n_active else rng.choice(active, samples, replace=False)
+
+        workers = min(workers or os.cpu_count() or 1, len(sources))
+        if workers > 1:
+            chunks = np.array_split(sources, workers * 4)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                total = sum(pool.map(
+                    Centrality.brandes_chunk,
+                    [(network.out_ptr, network.out_adj, chunk) for chunk in chunks],
+                ))
+        else:
+            total = Centrality.brandes_chunk((network.out_ptr, network.out_adj, sources))
+
+        return total * (n_active / len(sources)) / ((n_active - 1) * (n_active - 2))
+
+    @staticmethod
+    def compute_frame(graph: RouteGraph, samples: int = 512, workers: int = 1, seed: int = 0) -> pd.DataFrame:
+        """airport_id plus one column per metric, for every airport of the graph."""
+        network = RouteNetwork(graph)
+        timings = {}
+
+        started = time.perf_counter()
+        degree = Centrality.degree(network)
+        timings["degree"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        pagerank, iterations = Centrality.pagerank(network)
+        timings[f"pagerank ({iterations} iterations)"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        betweenness = Centrality.betweenness(network, samples, workers, seed)
+        timings[f"betweenness ({samples} samples)"] = time.perf_counter() - started
+
+        for label, seconds in timings.items():
+            print(f"  {label}: {seconds:.2f}s")
+
+        return pd.DataFrame({
+            "airport_id": graph.node_ids,
+            "degree": degree,
+            "pagerank": pagerank,
+            "betweenness": betweenness,
+        })
+
+    @staticmethod
+    def store(cur, metrics: pd.DataFrame) -> int:
+        """
+        Write the metric columns to airports through COPY + one UPDATE (changed
+        rows only), then rank every metric in airport_hub_rank. Returns airports updated.
+        """
+        for metric in Centrality.METRICS:
+            cur.execute(f"ALTER TABLE airports ADD COLUMN IF NOT EXISTS {metric} {Centrality.COLUMN_TYPES[metric]};")
+
+        cur.execute("""
+            CREATE TEMP TABLE airport_centrality (
+                airport_id  INTEGER PRIMARY KEY,
+                degree      INTEGER,
+                pagerank    DOUBLE PRECISION,
+                betweenness DOUBLE PRECISION
+            ) ON COMMIT DROP;
+        """)
+        rows = zip(
+            metrics["airport_id"].astype(np.int64).tolist(),
+            metrics["degree"].astype(np.int64).tolist(),
+            metrics["pagerank"].astype(np.float64).tolist(),
+            metrics["betweenness"].astype(np.float64).tolist(),
+        )
+        BulkLoader.copy_rows(cur, "airport_centrality", ("airport_id",) + Centrality.METRICS, rows)
+
+        cur.execute("""
+            UPDATE airports a
+            SET degree = c.degree,
+                pagerank = c.pagerank,
+                betweenness = c.betweenness
+            FROM airport_centrality c
+            WHERE a.airport_id = c.airport_id
+              AND (a.degree, a.pagerank, a.betweenness)
+                  IS DISTINCT FROM (c.degree, c.pagerank, c.betweenness);
+        """)
+        updated = cur.rowcount
+        cur.execute("DROP TABLE airport_centrality;")
+
+        cur.execute(Airports.HUB_INDEX_SQL)
+        for metric in Centrality.METRICS:
+            Airports.refresh_hub_rank(cur, metric, metric)
+        return updated
+
+    @staticmethod
+    @Instrumentation.step()
+    def compute_hub_centrality(db_parameters: dict, samples: int = 512, workers: int = 4, seed: int = 0,
+                               graph: RouteGraph = None) -> pd.DataFrame:
+        """
+        Pipeline stage: degree, PageRank and sampled betweenness for every
+        airport, stored on airports and in the hub index. Returns the metrics.
+        """
+        started = time.perf_counter()
+        graph = graph or RouteGraph.from_db(db_parameters)
+        metrics = Centrality.compute_frame(graph, samples, workers, seed)
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                updated = Centrality.store(cur, metrics)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        print(f"Hub centrality stored: {updated} airports updated in {time.perf_counter() - started:.2f}s.")
+        return metrics
+
+    @staticmethod
+    def top_airports(graph: RouteGraph, metrics: pd.DataFrame, metric: str = "betweenness", k: int = 10) -> pd.DataFrame:
+        """The k airports with the highest metric (ties by airport_id), with names for printing."""
+        if metric not in Centrality.METRICS:
+            raise ValueError(f"Unknown centrality metric '{metric}'; expected one of {Centrality.METRICS}.")
+        top = metrics.sort_values([metric, "airport_id"], ascending=[False, True], kind="stable").head(k)
+        pos = np.searchsorted(graph.airport_ids, top["airport_id"].to_numpy())
+        pos = np.minimum(pos, len(graph.airport_ids) - 1)
+        known = graph.airport_ids[pos] == top["airport_id"].to_numpy()
+        return top.assign(
+            iata=np.where(known, graph.airport_iata[pos], None),
+            name=np.where(known, graph.airport_names[pos], None),
+        ).reset_index(drop=True)
@@ -0,0 +1,144 @@
+from methods.bulk_loader import BulkLoader
+
+from typing import Iterable, Optional
+
+
+class CodeDictionary:
+    """
+    Small-integer ids for the codes repeated on every route row (airline,
+    airport and equipment), kept in the airline_codes, airport_codes and
+    equipment_codes dimension tables and cached in memory while loading.
+
+    Ids come from each table's sequence (INSERT ... ON CONFLICT (code) DO
+    NOTHING RETURNING), so concurrent loads never hand out the same id, and
+    they are never reassigned: an id stored in airline_routes always decodes
+    to the same code. Source and destination airports share one dictionary;
+    NULL codes stay NULL ids.
+    """
+
+    KINDS = ("airline", "airport", "equipment")
+
+    # airline_routes text column -> (id column, dictionary), in ROUTE_COLUMNS order
+    ROUTE_CODES = {
+        "airline_code": ("airline_code_id", "airline"),
+        "source_airport_code": ("source_airport_code_id", "airport"),
+        "dest_airport_code": ("dest_airport_code_id", "airport"),
+        "equipment": ("equipment_code_id", "equipment"),
+    }
+    ID_COLUMNS = tuple(id_column for id_column, _ in ROUTE_CODES.values())
+
+    CREATE_SQL = "".join(f"""
+    CREATE TABLE IF NOT EXISTS {kind}_codes (
+        code_id SERIAL PRIMARY KEY,
+        code    TEXT NOT NULL UNIQUE
+    );
+    """ for kind in KINDS)
+
+    def __init__(self):
+        self.ids = {kind: {} for kind in CodeDictionary.KINDS}    # code -> id
+        self.codes = {kind: {} for kind in CodeDictionary.KINDS}  # id -> code
+        self.added = 0  # codes this dictionary inserted into the dimension tables
+
+    def remember(self, kind: str, pairs: Iterable[tuple]):
+        for code_id, code in pairs:
+            self.ids[kind][code] = code_id
+            self.codes[kind][code_id] = code
+
+    def decode(self, kind: str, code_id: Optional[int]) -> Optional[str]:
+        return None if code_id is None else self.codes[kind][code_id]
+
+    def decode_codes(self, code_ids: Iterable[Optional[int]]) -> tuple:
+        """The four codes (airline, source airport, dest airport, equipment) for a route's four ids."""
+        return tuple(self.decode(kind, i) for (_, kind), i in zip(CodeDictionary.ROUTE_CODES.values(), code_ids))
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids.values())
+
+    @staticmethod
+    def from_db(cur) -> "CodeDictionary":
+        """Create the dimension tables if needed and load every code in them."""
+        cur.execute(CodeDictionary.CREATE_SQL)
+        dictionary = CodeDictionary()
+        for kind in CodeDictionary.KINDS:
+            cur.execute(f"SELECT code_id, code FROM {kind}_codes;")
+            dictionary.remember(kind, cur.fetchall())
+        return dictionary
+
+    def fetch_ids(self, cur, kind: str, codes) -> int:
+        """
+        Look up ids for codes not cached yet, inserting the ones the table
+        doesn't have. Codes another load inserted first are read back instead.
+        Returns the number of codes inserted.
+        """
+        codes = sorted(codes)
+        cur.execute(f"""
+            INSERT INTO {kind}_codes (code)
+            SELECT u.code FROM unnest(%s) AS u(code)
+            ORDER BY u.code
+            ON CONFLICT (code) DO NOTHING
+            RETURNING code_id, code;
+        """, (codes,))
+        inserted = cur.fetchall()
+        self.remember(kind, inserted)
+
+        if len(inserted) < len(codes):
+            cur.execute(f"SELECT code_id, code FROM {kind}_codes WHERE code IN (SELECT unnest(%s));", (codes,))
+            self.remember(kind, cur.fetchall())
+        return len(inserted)
+
+    def encode_routes(self, cur, routes: Iterable[tuple], positions, chunk_size: int = 50000):
+        """
+        Yield routes with the codes at `positions` (the ROUTE_CODES columns'
+        indexes in each row) replaced by their ids. Codes not cached yet are
+        fetched once per chunk of chunk_size rows.
+        """
+        kinds = dict(zip(positions, (kind for _, kind in CodeDictionary.ROUTE_CODES.values())))
+        for chunk in BulkLoader.iter_chunks(routes, chunk_size):
+            for kind in CodeDictionary.KINDS:
+                missing = {row[i] for row in chunk for i, k in kinds.items() if k == kind}
+                missing.difference_update(self.ids[kind].keys())
+                missing.discard(None)
+                if missing:
+                    self.added += self.fetch_ids(cur, kind, missing)
+
+            for row in chunk:
+                row = list(row)
+                for i, kind in kinds.items():
+                    if row[i] is not None:
+                        row[i] = self.ids[kind][row[i]]
+                yield tuple(row)
+
+    @staticmethod
+    def sync(cur) -> int:
+        """
+        Fill NULL id columns of airline_routes from its text columns, adding
+        the codes the dictionaries don't have yet (migrate_to_code_ids, before
+        the text columns are dropped). Returns the number of codes added.
+        """
+        cur.execute(CodeDictionary.CREATE_SQL)
+
+        added = 0
+        for kind in CodeDictionary.KINDS:
+            columns = [(col, id_col) for col, (id_col, k) in CodeDictionary.ROUTE_CODES.items() if k == kind]
+            missing = " UNION ".join(
+                f"SELECT r.{col} FROM airline_routes r WHERE r.{id_col} IS NULL"
+                for col, id_col in columns
+            )
+            cur.execute(f"""
+                INSERT INTO {kind}_codes (code)
+                SELECT DISTINCT code FROM ({missing}) AS u(code)
+                WHERE code IS NOT NULL
+                ORDER BY code
+                ON CONFLICT (code) DO NOTHING;
+            """)
+            added += cur.rowcount
+
+            for col, id_col in columns:
+                cur.execute(f"""
+                    UPDATE airline_routes r
+                    SET {id_col} = c.code_id
+                    FROM {kind}_codes c
+                    WHERE c.code = r.{col}
+                      AND r.{id_col} IS NULL;
+                """)
+        return added
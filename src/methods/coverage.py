@@ -0,0 +1,140 @@
+from methods.route_graph import RouteGraph
+
+import numpy as np
+import pandas as pd
+
+
+class Coverage:
+    """
+    One packed bitmap of airports per airline, built from a RouteGraph:
+    bit i of an airline's row is set when any of its routes starts or ends at
+    dense airport node i. Rows are uint64 words (~1 KB per airline), so unique
+    counts, overlaps, Jaccard similarity and hub access are popcounts over
+    ANDed/ORed rows.
+    """
+
+    # Set bits per byte value
+    POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def __init__(self, graph: RouteGraph):
+        self.graph = graph
+
+        keep = graph.route_airlines != RouteGraph.NULL_ID
+        self.airline_ids = graph.route_airlines[keep].astype(np.int64)  # sorted (np.unique)
+        row_of = np.cumsum(keep) - 1  # dense airline index -> bitmap row
+
+        n_nodes = len(graph.node_ids)
+        touched = np.zeros((len(self.airline_ids), n_nodes), dtype=bool)
+        for nodes in (graph.source_node, graph.dest_node):
+            valid = keep[graph.route_airline] & (nodes >= 0)
+            touched[row_of[graph.route_airline[valid]], nodes[valid]] = True
+
+        self.bits = Coverage.pack(touched)
+
+    @staticmethod
+    def from_graph(graph: RouteGraph) -> "Coverage":
+        return Coverage(graph)
+
+    @staticmethod
+    def from_db(db_parameters: dict) -> "Coverage":
+        return Coverage(RouteGraph.from_db(db_parameters))
+
+    @staticmethod
+    def pack(touched: np.ndarray) -> np.ndarray:
+        """Boolean [..., n] -> uint64 words [..., ceil(n / 64)]."""
+        packed = np.packbits(touched, axis=-1)
+        pad = -packed.shape[-1] % 8
+        if pad:
+            packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+        return np.ascontiguousarray(packed).view(np.uint64)
+
+    @staticmethod
+    def popcount(bits: np.ndarray) -> np.ndarray:
+        """Set bits per row (or in total for a single row)."""
+        if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+            return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+        return Coverage.POPCOUNT8[bits.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+    def row(self, airline_id: int) -> np.ndarray:
+        pos = np.searchsorted(self.airline_ids, airline_id)
+        if pos >= len(self.airline_ids) or self.airline_ids[pos] != airline_id:
+            raise KeyError(f"Airline {airline_id} has no routes.")
+        return self.bits[pos]
+
+    def mask(self, airport_ids) -> np.ndarray:
+        """Packed bitmap of the given airports (ids without routes are ignored)."""
+        ids = np.asarray(airport_ids, dtype=np.int64)
+        nodes = np.searchsorted(self.graph.node_ids, ids)
+        nodes = nodes[(nodes < len(self.graph.node_ids)) & (self.graph.node_ids[np.minimum(nodes, len(self.graph.node_ids) - 1)] == ids)]
+        touched = np.zeros(len(self.graph.node_ids), dtype=bool)
+        touched[nodes] = True
+        return Coverage.pack(touched)
+
+    def unique_count(self, airline_id: int) -> int:
+        return int(Coverage.popcount(self.row(airline_id)))
+
+    def overlap(self, airline_a: int, airline_b: int) -> int:
+        """Airports served by both airlines."""
+        return int(Coverage.popcount(self.row(airline_a) & self.row(airline_b)))
+
+    def jaccard(self, airline_a: int, airline_b: int) -> float:
+        a, b = self.row(airline_a), self.row(airline_b)
+        union = Coverage.popcount(a | b)
+        return float(Coverage.popcount(a & b) / union) if union else 0.0
+
+    def most_similar(self, airline_id: int, n: int = 10) -> pd.DataFrame:
+        """The n airlines with the highest Jaccard similarity to airline_id (itself excluded)."""
+        row = self.row(airline_id)
+        inter = Coverage.popcount(self.bits & row)
+        union = Coverage.popcount(self.bits | row)
+        scores = np.where(union > 0, inter / np.maximum(union, 1), 0.0)
+        scores[self.airline_ids == airline_id] = -1.0
+
+        order = np.argsort(-scores, kind="stable")[:n]
+        return pd.DataFrame({
+            **self.graph.airline_columns(self.airline_ids[order]),
+            "shared_airports": inter[order],
+            "jaccard": scores[order],
+        })
+
+    def unique_counts(self) -> pd.DataFrame:
+        """Same rows and order as Report.get_airlines_unique_airport_counts."""
+        df = pd.DataFrame({
+            **self.graph.airline_columns(self.airline_ids),
+            "unique_airports_touched": Coverage.popcount(self.bits),
+        })
+        df = df.sort_values(
+            ["unique_airports_touched", "airline_name"],
+            ascending=[False, True],
+            na_position="last",
+            kind="stable",
+        )
+        return df.reset_index(drop=True)
+
+    def top_hub_ids(self, k: int = 10) -> np.ndarray:
+        """Airport ids of the k busiest airports (same order as the top-K hub report)."""
+        return self.graph.airport_ids[self.graph.top_airports(k)]
+
+    def hub_access(self, airport_ids) -> np.ndarray:
+        """For every airline (self.airline_ids order): how many of airport_ids it serves."""
+        mask = self.mask(airport_ids)
+        words = np.flatnonzero(mask)  # a handful of hubs touch only a few words
+        return Coverage.popcount(self.bits[:, words] & mask[words])
+
+    def airlines_covering(self, airport_ids, at_least: int = 1) -> pd.DataFrame:
+        """Airlines serving at least `at_least` of airport_ids, most hubs first (the "8/10 hubs" notes)."""
+        covered = self.hub_access(airport_ids)
+        keep = np.flatnonzero(covered >= at_least)
+
+        df = pd.DataFrame({
+            **self.graph.airline_columns(self.airline_ids[keep]),
+            "hubs_covered": covered[keep],
+            "hubs_total": len(np.unique(np.asarray(airport_ids))),
+        })
+        df = df.sort_values(
+            ["hubs_covered", "airline_name"],
+            ascending=[False, True],
+            na_position="last",
+            kind="stable",
+        )
+        return df.reset_index(drop=True)
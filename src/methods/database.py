@@ -3,21 +3,353 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection as Psycopg2Connection, cursor as Psycopg2Cursor, TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from methods.instrumentation import Instrumentation
+from methods.embedded import Embedded, EmbeddedConnection, EmbeddedCursor
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+
+class CountingCursor(Psycopg2Cursor):
+    """Cursor that reports round trips and affected rows to Instrumentation."""
+
+    def counted(self, trips: int = 1):
+        Instrumentation.add("db_round_trips", trips)
+        if self.rowcount > 0:
+            Instrumentation.add("db_rows", self.rowcount)
+
+    def execute(self, query, vars=None):
+        try:
+            return super().execute(query, vars)
+        finally:
+            self.counted()
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            Instrumentation.add("db_round_trips", len(vars_list))
+
+    def copy_expert(self, sql, file, size=8192):
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self.counted()
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self.name is not None:  # named cursors FETCH from the server
+            Instrumentation.add("db_round_trips")
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self.name is not None:
+            Instrumentation.add("db_round_trips")
+        return rows
+
+
+class PooledConnection(Psycopg2Connection):
+    """
+    psycopg2 connection whose close() hands it back to its pool instead of
+    disconnecting. Its cursors count round trips for Instrumentation.
+    """
+
+    pool = None  # set while checked out
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = CountingCursor
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool plus a semaphore, so callers wait for a free
+    connection (up to timeout) instead of failing with "pool exhausted".
+    Idle connections are health-checked before reuse; broken ones are replaced.
+    """
+
+    def __init__(self, connect_kwargs: dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, health_check_seconds: float = 30.0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_seconds = health_check_seconds
+        self.pool = ThreadedConnectionPool(min_size, max_size, connection_factory=PooledConnection, **connect_kwargs)
+        self.slots = threading.Semaphore(max_size)
+        self.lock = threading.Lock()
+        self.last_used = {}  # id(conn) -> time returned to the pool
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.health_check_failures = 0
+
+    def acquire(self) -> PooledConnection:
+        started = time.perf_counter()
+        if not self.slots.acquire(blocking=False):
+            if not self.slots.acquire(timeout=self.timeout):
+                raise PoolError(f"No pooled connection free after {self.timeout}s ({self.max_size} in use).")
+            with self.lock:
+                self.waits += 1
+        waited = time.perf_counter() - started
+
+        try:
+            conn = self.checkout_healthy()
+        except Exception:
+            self.slots.release()
+            raise
+
+        with self.lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+        conn.pool = self
+        return conn
+
+    def checkout_healthy(self) -> PooledConnection:
+        while True:
+            conn = self.pool.getconn()
+            idle_since = self.last_used.pop(id(conn), None)
+            if not conn.closed and (idle_since is None or time.monotonic() - idle_since < self.health_check_seconds):
+                return conn
+            try:
+                if not conn.closed:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1;")
+                    conn.rollback()
+                    return conn
+            except psycopg2.Error:
+                pass
+            with self.lock:
+                self.health_check_failures += 1
+            self.pool.putconn(conn, close=True)
+
+    def release(self, conn: PooledConnection):
+        broken = bool(conn.closed)
+        if not broken:
+            try:
+                # Never hand the next caller an open transaction or a changed session mode
+                if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                broken = True
+
+        # putconn keeps up to min_size idle connections open and closes the rest
+        self.last_used[id(conn)] = time.monotonic()
+        self.pool.putconn(conn, close=broken)
+        if conn.closed:
+            self.last_used.pop(id(conn), None)
+
+        with self.lock:
+            self.in_use -= 1
+        self.slots.release()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "avg_wait_ms": 1000 * self.wait_seconds / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": 1000 * self.max_wait_seconds,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "max_size": self.max_size,
+                "health_check_failures": self.health_check_failures,
+            }
+
+    def close(self):
+        for conn in list(self.pool._used.values()):
+            conn.pool = None  # really disconnect connections that are still checked out
+        self.pool.closeall()
+        self.last_used.clear()
 
 
 class Database: 
-    
+
+    # One pool per distinct connection target, shared by every loader and report
+    pools = {}
+    pools_lock = threading.Lock()
+
+    # Rows per FETCH round trip for the server-side cursor readers
+    ITERSIZE = 10000
+    cursor_ids = itertools.count()
+
+    # db_parameters["backend"]: a Postgres server (default) or embedded DuckDB (see Embedded)
+    BACKENDS = ("postgres", "duckdb")
+
+    @staticmethod
+    def backend(db_parameters) -> str:
+        backend = db_parameters.get("backend", "postgres")
+        if backend not in Database.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'; expected one of {Database.BACKENDS}.")
+        return backend
+
+    @staticmethod
+    def is_embedded(db_parameters) -> bool:
+        return Database.backend(db_parameters) == "duckdb"
+
+    @staticmethod
+    def require_postgres(db_parameters, feature: str):
+        if Database.is_embedded(db_parameters):
+            raise ValueError(
+                f'{feature} needs the Postgres backend, but db_parameters selects backend "{Database.backend(db_parameters)}".'
+            )
+
+    @staticmethod
+    def connection_kwargs(db_parameters):
+        """
+        psycopg2.connect keyword arguments from either key style:
+        database_host/database_port/database_name/database_username/database_password
+        or host/port/database (dbname)/user/password.
+        """
+        get = db_parameters.get
+        return {
+            "host": get("database_host", get("host")),
+            "port": get("database_port", get("port")),
+            "dbname": get("database_name", get("database", get("dbname"))),
+            "user": get("database_username", get("user")),
+            "password": get("database_password", get("password")),
+        }
+
+    @staticmethod
+    def pool(db_parameters):
+        """
+        The shared ConnectionPool for these parameters, created on first use.
+        Optional keys: pool_min_size (1, connections kept open while idle),
+        pool_max_size (10),
+        pool_timeout_seconds (30), pool_health_check_seconds (30).
+        """
+        kwargs = Database.connection_kwargs(db_parameters)
+        key = tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+        with Database.pools_lock:
+            pool = Database.pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    kwargs,
+                    min_size=db_parameters.get("pool_min_size", 1),
+                    max_size=db_parameters.get("pool_max_size", 10),
+                    timeout=db_parameters.get("pool_timeout_seconds", 30.0),
+                    health_check_seconds=db_parameters.get("pool_health_check_seconds", 30.0),
+                )
+                Database.pools[key] = pool
+        return pool
+
     @staticmethod
     def get_connection(db_parameters):
-        db_connection = psycopg2.connect(
-            host=db_parameters["database_host"],
-            port=db_parameters["database_port"],
-            database=db_parameters["database_name"],
-            user=db_parameters["database_username"],
-            password=db_parameters["database_password"]
-        )
-        return db_connection
+        """
+        Check a connection out of the shared pool; conn.close() returns it.
+        With backend "duckdb" it is a connection to the embedded database instead.
+        """
+        if Database.is_embedded(db_parameters):
+            return Embedded.connect(db_parameters)
+        return Database.pool(db_parameters).acquire()
+
+    @staticmethod
+    @contextmanager
+    def connection(db_parameters):
+        """
+        with Database.connection(db_parameters) as conn: ...
+        Rolls back on error and always returns the connection to the pool.
+        Committing stays with the caller, as everywhere else in this package.
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def pool_stats(db_parameters=None):
+        """Checkout/wait counters for one pool, or for all pools when no parameters are given."""
+        if db_parameters is not None:
+            return Database.pool(db_parameters).stats()
+        with Database.pools_lock:
+            return {dict(key)["host"] + "/" + dict(key)["dbname"]: pool.stats() for key, pool in Database.pools.items()}
+
+    @staticmethod
+    def print_pool_stats(db_parameters=None):
+        stats = Database.pool_stats(db_parameters)
+        for name, s in ({"pool": stats} if db_parameters is not None else stats).items():
+            print(
+                f"{name}: {s['checkouts']} checkouts, {s['waits']} waited "
+                f"(avg {s['avg_wait_ms']:.1f} ms, max {s['max_wait_ms']:.1f} ms), "
+                f"peak {s['peak_in_use']}/{s['max_size']} in use, "
+                f"{s['health_check_failures']} failed health checks"
+            )
+
+    @staticmethod
+    def close_pools():
+        with Database.pools_lock:
+            for pool in Database.pools.values():
+                pool.close()
+            Database.pools.clear()
+        Embedded.close_databases()
     
+    @staticmethod
+    def column_exists(cur, table_name, column_name):
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+                  AND table_name = %s
+                  AND column_name = %s
+            );
+        """, (table_name, column_name))
+        return cur.fetchone()[0]
+
+    @staticmethod
+    def table_exists(cur, table_name):
+        if isinstance(cur, EmbeddedCursor):
+            cur.execute("SELECT COUNT(*) > 0 FROM information_schema.tables WHERE table_name = %s;", (table_name,))
+            return cur.fetchone()[0]
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (table_name,))
+        return cur.fetchone()[0]
+
+    @staticmethod
+    def trigger_exists(cur, table_name, trigger_name):
+        if isinstance(cur, EmbeddedCursor):
+            return False  # DuckDB has no triggers
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_trigger
+                WHERE tgrelid = to_regclass(%s)
+                  AND tgname = %s
+                  AND NOT tgisinternal
+            );
+        """, (table_name, trigger_name))
+        return cur.fetchone()[0]
+
     @staticmethod
     def print_table_length(db_parameters, table_name):
 
@@ -35,4 +367,113 @@ class Database:
 
         finally:
             conn.close()
-    
\ No newline at end of file
+
+    @staticmethod
+    def query_stats() -> dict:
+        return {"rows": 0, "batches": 0, "bytes": 0, "seconds": 0.0}
+
+    @staticmethod
+    def iter_rows(conn, sql, params=None, itersize=None, stats=None):
+        """
+        Run sql on a named (server-side) cursor and yield (columns, rows) batches
+        of at most itersize rows, so the client never holds the whole result.
+        Always yields at least one batch, so the columns are known for empty results.
+        """
+        itersize = itersize or Database.ITERSIZE
+        started = time.perf_counter()
+
+        with conn.cursor(name=f"stream_{next(Database.cursor_ids)}") as cur:
+            cur.itersize = itersize
+            cur.execute(sql, params)
+            first = True
+            while True:
+                rows = cur.fetchmany(itersize)
+                if not rows and not first:
+                    break
+                first = False
+                Instrumentation.add_rows(len(rows))
+                if stats is not None:
+                    stats["rows"] += len(rows)
+                    stats["batches"] += 1
+                    stats["seconds"] = time.perf_counter() - started
+                yield [d[0] for d in cur.description], rows
+                if len(rows) < itersize:
+                    break
+
+    @staticmethod
+    def read_sql_chunks(conn, sql, params=None, itersize=None, as_arrow=False, stats=None):
+        """
+        Stream a query as DataFrames (or pyarrow RecordBatches with as_arrow=True),
+        one per itersize rows. stats (see query_stats) accumulates rows, batches
+        and bytes; bytes is the in-memory size of the batches produced.
+        """
+        if as_arrow:
+            try:
+                import pyarrow as pa
+            except ImportError as e:
+                raise ImportError("read_sql_chunks(as_arrow=True) needs pyarrow installed.") from e
+
+        for columns, rows in Database.iter_rows(conn, sql, params, itersize, stats):
+            if as_arrow:
+                arrays = [pa.array(values) for values in zip(*rows)] if rows else [pa.array([]) for _ in columns]
+                batch = pa.RecordBatch.from_arrays(arrays, names=columns)
+                size = batch.nbytes
+            else:
+                batch = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+                size = int(batch.memory_usage(index=False, deep=True).sum())
+            if stats is not None:
+                stats["bytes"] += size
+            yield batch
+
+    @staticmethod
+    def read_sql_columns(conn, sql, converters: dict, params=None, itersize=None, stats=None) -> pd.DataFrame:
+        """
+        Stream a query chunk by chunk, converting each column of each chunk with
+        converters[column] (Series -> compact ndarray, e.g. int32 ids) as it
+        arrives; columns without a converter stay object arrays. Only the
+        converted arrays are kept, so no full-width frame of Python objects is
+        ever held. Returns a DataFrame over the concatenated arrays.
+        """
+        if isinstance(conn, EmbeddedConnection):
+            chunks = [Database.read_sql_frame(conn, sql, params, itersize, stats)]
+        else:
+            chunks = Database.read_sql_chunks(conn, sql, params, itersize, stats=stats)
+
+        parts = {}
+        for chunk in chunks:
+            for column in chunk.columns:
+                convert = converters.get(column)
+                values = convert(chunk[column]) if convert is not None else chunk[column].to_numpy(dtype=object)
+                parts.setdefault(column, []).append(values)
+        return pd.DataFrame({column: np.concatenate(arrays) for column, arrays in parts.items()})
+
+    @staticmethod
+    def read_sql_frame(conn, sql, params=None, itersize=None, stats=None) -> pd.DataFrame:
+        """
+        Drop-in for pd.read_sql(sql, conn, params=...) built from server-side cursor
+        chunks. The chunks are concatenated, so peak memory is that of pd.read_sql:
+        use it only for results known to be small (airports, airlines, code
+        tables) and read_sql_chunks / read_sql_columns for the routes.
+        """
+        if isinstance(conn, EmbeddedConnection):
+            started = time.perf_counter()
+            frame = conn.read_frame(sql, params)
+            if stats is not None:
+                stats["rows"] += len(frame)
+                stats["batches"] += 1
+                stats["bytes"] += int(frame.memory_usage(index=False, deep=True).sum())
+                stats["seconds"] = time.perf_counter() - started
+            return frame
+        chunks = list(Database.read_sql_chunks(conn, sql, params, itersize, stats=stats))
+        if len(chunks) == 1:
+            return chunks[0]
+        # A chunk of all-NULLs is object dtype; let numeric columns settle after the concat
+        return pd.concat(chunks, ignore_index=True).infer_objects()
+
+    @staticmethod
+    def print_query_stats(label, stats):
+        print(
+            f"{label}: {stats['rows']} rows in {stats['batches']} batches, "
+            f"{stats['bytes'] / 1024 / 1024:.1f} MB, {stats['seconds']:.2f}s"
+        )
+
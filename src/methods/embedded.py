@@ -0,0 +1,421 @@
+from methods.instrumentation import Instrumentation
+
+import math
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+
+
+class EmbeddedCursor:
+    """
+    psycopg2-style cursor over a DuckDB connection, so the loaders, transforms
+    and reports run unchanged on the embedded backend.
+
+    Queries keep psycopg2 placeholders (%s, %(name)s) and Postgres syntax;
+    Embedded.translate maps both to DuckDB. Results are fetched when the
+    statement runs (DuckDB has produced them in full by then), so several
+    cursors of one connection can be used in turn like server-side ones.
+    """
+
+    def __init__(self, connection: "EmbeddedConnection", name: str = None):
+        self.connection = connection
+        self.name = name
+        self.itersize = 2000
+        self.arraysize = 1
+        self.description = None
+        self.rowcount = -1
+        self.rows = []
+        self.position = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self.closed = True
+        self.rows = []
+
+    def execute(self, query, vars=None):
+        sql, params = Embedded.translate(query, vars)
+        con = self.connection.begin()
+        try:
+            con.execute(sql, params) if params is not None else con.execute(sql)
+        finally:
+            Instrumentation.add("db_round_trips")
+
+        description = con.description
+        self.position = 0
+        if description and [d[0] for d in description] in (["Count"], ["Success"]):
+            # DML/DDL: DuckDB returns the affected row count as a one-row result
+            row = con.fetchone() if description[0][0] == "Count" else None
+            self.description, self.rows = None, []
+            self.rowcount = row[0] if row else -1
+            if self.rowcount > 0:
+                Instrumentation.add("db_rows", self.rowcount)
+        else:
+            self.description = description
+            self.rows = con.fetchall() if description else []
+            self.rowcount = len(self.rows)
+
+    def executemany(self, query, vars_list):
+        for vars in vars_list:
+            self.execute(query, vars)
+
+    def mogrify(self, query, vars=None) -> bytes:
+        """query with vars inlined as SQL literals (what psycopg2.extras.execute_values builds on)."""
+        if isinstance(query, bytes):
+            query = query.decode("utf-8")
+        if vars is None:
+            return query.encode("utf-8")
+        if isinstance(vars, dict):
+            literals = {k: Embedded.literal(v) for k, v in vars.items()}
+            sql = Embedded.PARAM_RE.sub(lambda m: "%" if m.group(0) == "%%" else literals[m.group(1)], query)
+        else:
+            literals = iter([Embedded.literal(v) for v in vars])
+            sql = Embedded.PARAM_RE.sub(lambda m: "%" if m.group(0) == "%%" else next(literals), query)
+        return sql.encode("utf-8")
+
+    def fetchone(self):
+        if self.position >= len(self.rows):
+            return None
+        self.position += 1
+        return self.rows[self.position - 1]
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+    def insert_rows(self, table: str, columns, rows: list) -> int:
+        """
+        Append Python tuples to table in one INSERT ... SELECT over a DataFrame
+        (the embedded stand-in for COPY). Object columns keep ints, bools and
+        None exactly as given.
+        """
+        if not rows:
+            return 0
+        frame = pd.DataFrame({c: pd.Series(v, dtype=object) for c, v in zip(columns, zip(*rows))})
+        con = self.connection.begin()
+        view = f"rows_in_{id(frame)}"
+        con.register(view, frame)
+        try:
+            con.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {view};")
+        finally:
+            con.unregister(view)
+            Instrumentation.add("db_round_trips")
+        self.rowcount = len(rows)
+        return self.rowcount
+
+    def insert_arrow(self, table: str, columns, data) -> int:
+        """Append a pyarrow Table/RecordBatch to table; DuckDB scans the Arrow buffers directly."""
+        if data.num_rows == 0:
+            return 0
+        con = self.connection.begin()
+        view = f"arrow_in_{id(data)}"
+        con.register(view, data)
+        try:
+            con.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {view};")
+        finally:
+            con.unregister(view)
+            Instrumentation.add("db_round_trips")
+        self.rowcount = data.num_rows
+        return self.rowcount
+
+
+class EmbeddedConnection:
+    """
+    psycopg2-style connection to an embedded DuckDB database: a transaction
+    opens with the first statement and lasts until commit()/rollback(), and
+    close() rolls back anything uncommitted.
+    """
+
+    encoding = "UTF8"  # read by psycopg2.extras.execute_values
+
+    def __init__(self, con):
+        self.con = con
+        self.autocommit = False
+        self.in_transaction = False
+        self.closed = False
+
+    def cursor(self, name: str = None, cursor_factory=None) -> EmbeddedCursor:
+        return EmbeddedCursor(self, name)
+
+    def begin(self):
+        """The DuckDB connection, inside a transaction unless autocommit is on."""
+        if self.closed:
+            raise RuntimeError("Embedded connection is closed.")
+        if not self.autocommit and not self.in_transaction:
+            self.con.begin()
+            self.in_transaction = True
+        return self.con
+
+    def commit(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.con.commit()
+
+    def rollback(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.con.rollback()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.rollback()
+        finally:
+            self.closed = True
+            self.con.close()
+
+    def read_frame(self, sql, params=None) -> pd.DataFrame:
+        """A query result as a DataFrame, converted column-wise by DuckDB."""
+        sql, params = Embedded.translate(sql, params)
+        con = self.begin()
+        Instrumentation.add("db_round_trips")
+        frame = (con.execute(sql, params) if params is not None else con.execute(sql)).df()
+        Instrumentation.add_rows(len(frame))
+        return frame
+
+
+class Embedded:
+    """
+    The DuckDB backend, selected with db_parameters["backend"] = "duckdb":
+
+        {"backend": "duckdb", "database_path": "output data/airlines.duckdb"}
+
+    database_path defaults to ":memory:" (lives until close_databases()).
+    Every Database.get_connection() is a new DuckDB connection to one shared
+    database per path, so threads each get their own, as with the pool.
+
+    translate() rewrites the Postgres-only syntax this package uses; features
+    with no DuckDB equivalent (triggers, incremental loads, cascading foreign
+    keys) stay Postgres-only.
+    """
+
+    databases = {}
+    databases_lock = threading.Lock()
+
+    PARAM_RE = re.compile(r"%%|%\((\w+)\)s|%s")
+
+    # (pattern, replacement) applied to every statement
+    REWRITES = (
+        (re.compile(r"\bCREATE\s+UNLOGGED\s+TABLE\b", re.I), "CREATE TABLE"),
+        (re.compile(r"\bON\s+COMMIT\s+DROP\b", re.I), ""),
+        (re.compile(r"^\s*LOCK\s+TABLE\b[^;]*;", re.I | re.M), ""),
+        (re.compile(r"\btable_schema\s*=\s*'public'", re.I), "table_schema = 'main'"),
+        # Secondary indexes only serve Postgres plans; DuckDB prunes with zone maps, and an
+        # ART index cannot be created after updates in the same transaction. UNIQUE ones stay.
+        (re.compile(r"^\s*CREATE\s+INDEX\b[^;]*;", re.I | re.M), ""),
+        # DuckDB foreign keys block deletes; referential checks are left to Postgres.
+        # Referential actions are refused by translate() (CASCADE_RE) rather than dropped.
+        (re.compile(r"\s+REFERENCES\s+\w+\s*\([^)]*\)(\s+ON\s+(DELETE|UPDATE)\s+(RESTRICT|NO\s+ACTION))*", re.I), ""),
+    )
+    CASCADE_RE = re.compile(
+        r"\bREFERENCES\s+(\w+)\s*\([^)]*\)(?:\s+ON\s+(?:DELETE|UPDATE)\s+(?:RESTRICT|NO\s+ACTION))*"
+        r"\s+ON\s+((?:DELETE|UPDATE)\s+(?:CASCADE|SET\s+NULL|SET\s+DEFAULT))",
+        re.I,
+    )
+    SERIAL_RE = re.compile(r"\b(\w+)\s+(BIG)?SERIAL\b", re.I)
+    CREATE_TABLE_RE = re.compile(r"\bCREATE\s+(?:TEMP\s+|TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.I)
+    ALTER_ADD_RE = re.compile(r"\bALTER\s+TABLE\s+(\w+)\s+(ADD\s+COLUMN\b[^;]*?,\s*ADD\s+COLUMN\b[^;]*)(;|$)", re.I)
+    TRUNCATE_RE = re.compile(r"\bTRUNCATE\s+(?:TABLE\s+)?(\w+(?:\s*,\s*\w+)+)\s*(;|$)", re.I)
+
+    @staticmethod
+    def database_path(db_parameters: dict) -> str:
+        return db_parameters.get("database_path", ":memory:")
+
+    @staticmethod
+    def database(db_parameters: dict):
+        """The shared DuckDB database for these parameters, opened on first use."""
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError('backend "duckdb" needs duckdb installed (pip install duckdb).') from e
+
+        path = Embedded.database_path(db_parameters)
+        with Embedded.databases_lock:
+            con = Embedded.databases.get(path)
+            if con is None:
+                directory = os.path.dirname(path) if path != ":memory:" else ""
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Postgres semantics: integer / integer truncates
+                con = duckdb.connect(path, config={"integer_division": True})
+                Embedded.databases[path] = con
+        return con
+
+    @staticmethod
+    def connect(db_parameters: dict) -> EmbeddedConnection:
+        return EmbeddedConnection(Embedded.database(db_parameters).cursor())
+
+    @staticmethod
+    def close_databases():
+        with Embedded.databases_lock:
+            for con in Embedded.databases.values():
+                con.close()
+            Embedded.databases.clear()
+
+    @staticmethod
+    def literal(value) -> str:
+        if value is None:
+            return "NULL"
+        if value is True or value is False:
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, float):
+            return f"'{value}'::DOUBLE" if math.isnan(value) or math.isinf(value) else repr(value)
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(Embedded.literal(v) for v in value) + "]"
+        return "'" + str(value).replace("'", "''") + "'"
+
+    @staticmethod
+    def translate(query, vars=None):
+        """(DuckDB sql, DuckDB parameters) for a psycopg2-style query and vars."""
+        sql = query.decode("utf-8") if isinstance(query, bytes) else query
+        params = None
+        if vars is not None:
+            # psycopg2 only treats % as special when parameters are passed
+            if isinstance(vars, dict):
+                sql = Embedded.PARAM_RE.sub(lambda m: "%" if m.group(0) == "%%" else "$" + m.group(1), sql)
+                params = dict(vars)
+            else:
+                sql = Embedded.PARAM_RE.sub(lambda m: "%" if m.group(0) == "%%" else "?", sql)
+                params = list(vars)
+
+        cascade = Embedded.CASCADE_RE.search(sql)
+        if cascade:
+            raise ValueError(
+                f'backend "duckdb" cannot enforce REFERENCES {cascade.group(1)} ON {" ".join(cascade.group(2).split())}; '
+                "create the table without it and delete dependent rows explicitly."
+            )
+
+        for pattern, replacement in Embedded.REWRITES:
+            sql = pattern.sub(replacement, sql)
+
+        sql = Embedded.ALTER_ADD_RE.sub(
+            lambda m: " ".join(
+                f"ALTER TABLE {m.group(1)} {part.strip()};"
+                for part in re.split(r",\s*(?=ADD\s+COLUMN\b)", m.group(2), flags=re.I)
+            ),
+            sql,
+        )
+        sql = Embedded.TRUNCATE_RE.sub(
+            lambda m: " ".join(f"TRUNCATE {t.strip()};" for t in m.group(1).split(",")),
+            sql,
+        )
+
+        # SERIAL columns become sequences named as Postgres names them
+        sequences = []
+
+        def serial(m):
+            tables = Embedded.CREATE_TABLE_RE.findall(sql, 0, m.start())
+            if not tables:
+                return m.group(0)
+            sequence = f"{tables[-1]}_{m.group(1)}_seq"
+            sequences.append(f"CREATE SEQUENCE IF NOT EXISTS {sequence};")
+            return f"{m.group(1)} {'BIGINT' if m.group(2) else 'INTEGER'} DEFAULT nextval('{sequence}')"
+
+        sql = Embedded.SERIAL_RE.sub(serial, sql)
+        if sequences:
+            sql = "\n".join(sequences) + "\n" + sql
+        return sql, params
+
+    # ---- reading OpenFlights .dat files in the engine ----
+
+    @staticmethod
+    def text(field: int) -> str:
+        """Field as text, '\\N' and blanks -> NULL (the loaders' nullify)."""
+        return f"NULLIF(NULLIF(trim(c{field}, ' \t\r\n'), '\\N'), '')"
+
+    @staticmethod
+    def integer(field: int) -> str:
+        return f"CAST({Embedded.text(field)} AS INTEGER)"
+
+    @staticmethod
+    def double(field: int) -> str:
+        return f"CAST({Embedded.text(field)} AS DOUBLE)"
+
+    @staticmethod
+    def flag(field: int, true_value: str = "Y") -> str:
+        return f"COALESCE({Embedded.text(field)} = '{true_value}', FALSE)"
+
+    @staticmethod
+    def dat_source(file_path: str, n_fields: int) -> str:
+        """read_csv over a .dat file: n_fields VARCHAR columns c0.., csv-module quoting."""
+        columns = ", ".join(f"'c{i}': 'VARCHAR'" for i in range(n_fields))
+        path = file_path.replace("'", "''")
+        return (
+            f"read_csv('{path}', header = false, delim = ',', quote = '\"', escape = '\"', "
+            f"auto_detect = false, columns = {{{columns}}})"
+        )
+
+    @staticmethod
+    def load_dat(
+        db_parameters: dict,
+        target_table: str,
+        create_sql: str,
+        columns,
+        file_path: str,
+        n_fields: int,
+        expressions,
+        conflict_sql: str = "",
+        key_field: int = None,
+    ) -> int:
+        """
+        Embedded counterpart of BulkLoader.copy_merge: DuckDB reads the file
+        itself (parallel CSV scan) into a staging table, applying the
+        per-column expressions, then one INSERT ... SELECT {conflict_sql}
+        merges it. Rows whose key_field is NULL are skipped, as the Python
+        parsers do. Returns rows read.
+        """
+        started = time.perf_counter()
+        source = Embedded.dat_source(file_path, n_fields)
+        where = f"WHERE {Embedded.text(key_field)} IS NOT NULL" if key_field is not None else ""
+        staging = f"{target_table}_staging"
+        col_list = ", ".join(columns)
+        select_list = ", ".join(f"{expr} AS {col}" for expr, col in zip(expressions, columns))
+
+        conn = Embedded.connect(db_parameters)
+        try:
+            cur = conn.cursor()
+            cur.execute(create_sql)
+            with Instrumentation.phase("read"):
+                cur.execute(f"CREATE OR REPLACE TEMP TABLE {staging} AS SELECT {select_list} FROM {source} {where};")
+                read = cur.rowcount
+            with Instrumentation.phase("merge"):
+                cur.execute(f"INSERT INTO {target_table} ({col_list}) SELECT {col_list} FROM {staging} {conflict_sql};")
+                merged = cur.rowcount
+            cur.execute(f"DROP TABLE {staging};")
+            conn.commit()
+        finally:
+            conn.close()
+
+        Instrumentation.add_rows(read)
+        elapsed = time.perf_counter() - started
+        rate = read / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Embedded load read {read} rows into `{target_table}` "
+            f"({merged} inserted/updated) in {elapsed:.2f}s ({rate:,.0f} rows/sec)."
+        )
+        return read
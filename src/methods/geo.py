@@ -0,0 +1,103 @@
+from methods.database import Database
+from methods.bulk_loader import BulkLoader
+from methods.instrumentation import Instrumentation
+
+import time
+
+import numpy as np
+
+
+class Geo:
+    """Great-circle distances for airline_routes, computed in NumPy and stored once."""
+
+    EARTH_RADIUS_KM = 6371.0088  # mean Earth radius
+
+    @staticmethod
+    def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """Vectorized haversine distance in km; NaN wherever a coordinate is missing."""
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * Geo.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    @staticmethod
+    def update_route_distances(cur, route_filter: str = "") -> int:
+        """
+        Fill airline_routes.distance_km for the routes matching route_filter
+        (a WHERE clause on alias r). Coordinates are streamed in server-side
+        cursor chunks, distances are computed one NumPy pass per chunk, and only
+        rows whose distance changed are written back through COPY + one UPDATE.
+        Returns rows updated.
+        """
+        cur.execute("ALTER TABLE airline_routes ADD COLUMN IF NOT EXISTS distance_km DOUBLE PRECISION;")
+        cur.execute("""
+            CREATE TEMP TABLE route_distances (
+                route_id    BIGINT PRIMARY KEY,
+                distance_km DOUBLE PRECISION
+            ) ON COMMIT DROP;
+        """)
+
+        chunks = Database.read_sql_chunks(cur.connection, f"""
+            SELECT
+                r.route_id,
+                s.latitude  AS source_lat,
+                s.longitude AS source_lon,
+                d.latitude  AS dest_lat,
+                d.longitude AS dest_lon
+            FROM airline_routes r
+            LEFT JOIN airports s ON s.airport_id = r.source_airport_id
+            LEFT JOIN airports d ON d.airport_id = r.dest_airport_id
+            {route_filter};
+        """)
+
+        def distances():
+            for routes in chunks:
+                if routes.empty:
+                    continue
+                distance = Geo.haversine_km(
+                    routes["source_lat"], routes["source_lon"], routes["dest_lat"], routes["dest_lon"]
+                )
+                yield from zip(
+                    routes["route_id"].astype(np.int64).tolist(),
+                    [None if np.isnan(km) else round(km, 3) for km in distance.tolist()],
+                )
+
+        copied = BulkLoader.copy_rows(cur, "route_distances", ("route_id", "distance_km"), distances())
+
+        updated = 0
+        if copied:
+            cur.execute("""
+                UPDATE airline_routes r
+                SET distance_km = rd.distance_km
+                FROM route_distances rd
+                WHERE r.route_id = rd.route_id
+                  AND r.distance_km IS DISTINCT FROM rd.distance_km;
+            """)
+            updated = cur.rowcount
+        cur.execute("DROP TABLE route_distances;")
+        return updated
+
+    @staticmethod
+    @Instrumentation.step()
+    def compute_route_distances(db_parameters: dict, missing_only: bool = False) -> int:
+        """
+        Post-load stage: great-circle distance for every route (or only routes
+        with no distance yet). Run again after airport coordinates change.
+        """
+        started = time.perf_counter()
+        route_filter = "WHERE r.distance_km IS NULL" if missing_only else ""
+
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                if missing_only and not Database.column_exists(cur, "airline_routes", "distance_km"):
+                    route_filter = ""
+                updated = Geo.update_route_distances(cur, route_filter)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        print(f"Route distances computed: {updated} routes updated in {time.perf_counter() - started:.2f}s.")
+        return updated
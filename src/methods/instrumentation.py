@@ -0,0 +1,245 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+
+class Span:
+    """One timed step or phase: wall/CPU time plus counter deltas since it opened."""
+
+    def __init__(self, name: str, counters: dict):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.counters_start = dict(counters)
+        self.phases = []
+        self.accumulated = {}  # name -> {"wall_s", "rows"} for timed_iter
+        self.fields = {}
+
+    def close(self, counters: dict) -> dict:
+        record = {
+            "wall_s": round(time.perf_counter() - self.wall_start, 6),
+            "cpu_s": round(time.thread_time() - self.cpu_start, 6),
+            **{key: counters[key] - self.counters_start[key] for key in counters},
+            **self.fields,
+        }
+        phases = self.phases + [
+            {"phase": name, **{k: round(v, 6) if isinstance(v, float) else v for k, v in totals.items()}}
+            for name, totals in self.accumulated.items()
+        ]
+        if phases:
+            record["phases"] = phases
+        return record
+
+
+class Instrumentation:
+    """
+    Timing for loaders, transforms and reports, written as JSON lines.
+
+    A span opened with no span active in the thread is a step and becomes one
+    line in LOG_PATH; spans opened inside it are its phases (nested). Every span
+    records wall and CPU time (CPU of the calling thread; process-pool workers
+    are not included) and the change in the thread's counters:
+
+    rows:           rows streamed to or from Postgres (COPY, server-side cursors)
+    bytes_read:     input file bytes (step(input_arg=...))
+    db_round_trips: statements, COPYs and FETCHes sent (Database cursors count them)
+    db_rows:        rows the server reported as affected/returned
+
+    Setting PROFILE_STEP (or configure(profile_step=...)) profiles that one step
+    with cProfile, or pyinstrument when PROFILER=pyinstrument.
+    """
+
+    # Run artifacts, not deliverables: kept out of git (see .gitignore)
+    OUTPUT_DIR = os.path.join("output data", "metrics")
+    LOG_PATH = os.environ.get("METRICS_LOG", os.path.join(OUTPUT_DIR, "metrics.jsonl"))
+    PROFILE_STEP = os.environ.get("PROFILE_STEP")
+    PROFILER = os.environ.get("PROFILER", "cprofile")
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", OUTPUT_DIR)
+    enabled = True
+
+    COUNTERS = ("rows", "bytes_read", "db_round_trips", "db_rows")
+    local = threading.local()
+    write_lock = threading.Lock()
+
+    @staticmethod
+    def configure(log_path: str = None, profile_step: str = None, profiler: str = None, enabled: bool = None):
+        """Override the environment defaults (arguments left as None are unchanged)."""
+        if log_path is not None:
+            Instrumentation.LOG_PATH = log_path
+        if profile_step is not None:
+            Instrumentation.PROFILE_STEP = profile_step
+        if profiler is not None:
+            if profiler not in ("cprofile", "pyinstrument"):
+                raise ValueError(f"Unknown profiler '{profiler}'; expected 'cprofile' or 'pyinstrument'.")
+            Instrumentation.PROFILER = profiler
+        if enabled is not None:
+            Instrumentation.enabled = enabled
+
+    @staticmethod
+    def state():
+        """(span stack, counters) of the current thread."""
+        local = Instrumentation.local
+        if not hasattr(local, "stack"):
+            local.stack = []
+            local.counters = dict.fromkeys(Instrumentation.COUNTERS, 0)
+        return local.stack, local.counters
+
+    @staticmethod
+    def add(counter: str, amount: int = 1):
+        _, counters = Instrumentation.state()
+        counters[counter] += amount
+
+    @staticmethod
+    def add_rows(amount: int):
+        Instrumentation.add("rows", amount)
+
+    @staticmethod
+    def add_bytes(amount: int):
+        Instrumentation.add("bytes_read", amount)
+
+    @staticmethod
+    def annotate(**fields):
+        """Attach extra fields (JSON-serializable) to the innermost open span."""
+        stack, _ = Instrumentation.state()
+        if stack:
+            stack[-1].fields.update(fields)
+
+    @staticmethod
+    @contextmanager
+    def phase(name: str):
+        """
+        with Instrumentation.phase("merge"): ...
+        A phase of the open step, or a step of its own when none is open.
+        """
+        stack, counters = Instrumentation.state()
+        span = Span(name, counters)
+        profiler = Instrumentation.start_profiler() if not stack and name == Instrumentation.PROFILE_STEP else None
+
+        stack.append(span)
+        status, error = "ok", None
+        try:
+            yield span
+        except BaseException as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            record = span.close(counters)
+            if status != "ok":
+                record.update(status=status, error=error)
+
+            if stack:
+                stack[-1].phases.append({"phase": name, **record})
+            else:
+                if profiler is not None:
+                    record["profile"] = Instrumentation.stop_profiler(profiler, name)
+                Instrumentation.write({
+                    "event": "step",
+                    "step": name,
+                    "started_at": span.started_at,
+                    "status": status,
+                    **record,
+                })
+
+    @staticmethod
+    def step(name: str = None, input_arg: str = None):
+        """
+        Decorator: run the function inside phase(name or Class.method).
+        input_arg names a file-path parameter whose size is added to bytes_read.
+        """
+        def decorate(func):
+            label = name or func.__qualname__
+            signature = inspect.signature(func) if input_arg else None
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Instrumentation.phase(label):
+                    if signature is not None:
+                        path = signature.bind_partial(*args, **kwargs).arguments.get(input_arg)
+                        if path and os.path.isfile(path):
+                            Instrumentation.add_bytes(os.path.getsize(path))
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    @staticmethod
+    def timed_iter(rows, name: str):
+        """
+        Yield from rows, charging the time spent producing each row (parsing,
+        for a file generator) to an accumulated phase `name` of the open span.
+        """
+        stack, _ = Instrumentation.state()
+        if not stack:
+            yield from rows
+            return
+
+        totals = stack[-1].accumulated.setdefault(name, {"wall_s": 0.0, "rows": 0})
+        clock = time.perf_counter
+        it = iter(rows)
+        while True:
+            started = clock()
+            try:
+                row = next(it)
+            except StopIteration:
+                return
+            finally:
+                totals["wall_s"] += clock() - started
+            totals["rows"] += 1
+            yield row
+
+    @staticmethod
+    def write(record: dict):
+        if not Instrumentation.enabled:
+            return
+        line = json.dumps(record, default=str)
+        with Instrumentation.write_lock:
+            directory = os.path.dirname(Instrumentation.LOG_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(Instrumentation.LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    @staticmethod
+    def start_profiler():
+        if Instrumentation.PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError as e:
+                raise ImportError("PROFILER=pyinstrument needs pyinstrument installed.") from e
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    @staticmethod
+    def stop_profiler(profiler, name: str) -> str:
+        """Stop and save the profile; returns the report path."""
+        os.makedirs(Instrumentation.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(Instrumentation.PROFILE_DIR, f"profile_{name}")
+
+        if hasattr(profiler, "start"):  # pyinstrument
+            profiler.stop()
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            return path
+
+        import pstats
+        profiler.disable()
+        profiler.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+        print(f"Profile of '{name}' written to {base}.prof / {base}.txt")
+        return base + ".prof"
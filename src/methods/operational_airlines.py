@@ -1,4 +1,5 @@
 from methods.database import Database
+from methods.instrumentation import Instrumentation
 
 import csv
 import psycopg2
@@ -7,6 +8,7 @@ from psycopg2.extras import execute_values
 class OperationalAirlines:
     
     @staticmethod
+    @Instrumentation.step()
     def create_table(db_parameters):
         """
         Creates a new table called operational_airlines
@@ -0,0 +1,159 @@
+from methods.instrumentation import Instrumentation
+
+import hashlib
+import os
+import threading
+import time
+from itertools import islice
+
+
+class ParsedCache:
+    """
+    Typed Parquet copies of parsed OpenFlights inputs, so an unchanged .dat
+    file is parsed once and memory-mapped afterwards.
+
+    A cache file is keyed by the source path plus the SHA-256 of its contents
+    and the dataset's column names and Arrow types, so editing the file (or
+    the schema) simply misses and re-parses; the stale copy for that source is
+    then deleted. The hash is also stored in the Parquet metadata and checked
+    on every read.
+    Parsing still goes through the loaders' own iter_*/parse_* functions, so
+    cached rows are exactly the rows a plain load would produce.
+    """
+
+    # Rebuildable from the inputs, so kept out of git (see .gitignore)
+    CACHE_DIR = os.environ.get("PARSED_CACHE_DIR", os.path.join("output data", "parsed cache"))
+    COMPRESSION = "zstd"
+    CHUNK_ROWS = 100000
+    METADATA_KEY = b"source_sha256"
+
+    # (abs path, size, mtime_ns) -> sha256, so a file is hashed once per process
+    hashes = {}
+    hashes_lock = threading.Lock()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with ParsedCache.hashes_lock:
+            digest = ParsedCache.hashes.get(key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+            with ParsedCache.hashes_lock:
+                ParsedCache.hashes[key] = digest
+        return digest
+
+    @staticmethod
+    def source_prefix(file_path: str) -> str:
+        """<basename>.<path tag>. -- same-named inputs in different directories keep separate caches."""
+        tag = hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:8]
+        return f"{os.path.basename(file_path)}.{tag}."
+
+    @staticmethod
+    def cache_path(file_path: str, digest: str, columns, types) -> str:
+        key = hashlib.sha256(f"{digest}|{','.join(columns)}|{','.join(types)}".encode()).hexdigest()[:16]
+        return os.path.join(ParsedCache.CACHE_DIR, f"{ParsedCache.source_prefix(file_path)}{key}.parquet")
+
+    @staticmethod
+    def schema(columns, types):
+        import pyarrow as pa
+        return pa.schema([(name, pa.type_for_alias(t)) for name, t in zip(columns, types)])
+
+    @staticmethod
+    def write(path: str, rows, schema, digest: str):
+        """
+        Stream row tuples (or a pyarrow Table) into a Parquet file CHUNK_ROWS
+        at a time (atomic rename at the end).
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = schema.with_metadata({ParsedCache.METADATA_KEY: digest.encode()})
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pq.ParquetWriter(tmp_path, schema, compression=ParsedCache.COMPRESSION) as writer:
+                if ParsedCache.is_table(rows):
+                    writer.write_table(rows.cast(schema), row_group_size=ParsedCache.CHUNK_ROWS)
+                it = () if ParsedCache.is_table(rows) else iter(rows)
+                while True:
+                    chunk = list(islice(it, ParsedCache.CHUNK_ROWS))
+                    if not chunk:
+                        break
+                    arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def read(path: str, digest: str):
+        """The memory-mapped table at path, or None when it is missing or from another source."""
+        import pyarrow.parquet as pq
+
+        if not os.path.exists(path):
+            return None
+        table = pq.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        if metadata.get(ParsedCache.METADATA_KEY) != digest.encode():
+            return None
+        return table
+
+    @staticmethod
+    def remove_stale(file_path: str, keep: str):
+        """Delete older cache files of file_path (other contents or schema) besides keep."""
+        prefix = ParsedCache.source_prefix(file_path)
+        for name in os.listdir(ParsedCache.CACHE_DIR):
+            path = os.path.join(ParsedCache.CACHE_DIR, name)
+            if name.startswith(prefix) and name.endswith(".parquet") and path != keep:
+                os.remove(path)
+
+    @staticmethod
+    def table(file_path: str, columns, types, parse):
+        """
+        Parsed rows of file_path as a pyarrow Table with the given columns and
+        Arrow types ("int32", "string", ...). parse(file_path) yields the row
+        tuples (or returns a Table) on a miss; a hit is read memory-mapped without touching the text.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("The parsed-input cache needs pyarrow installed.") from e
+
+        started = time.perf_counter()
+        with Instrumentation.phase("parse"):
+            digest = ParsedCache.file_hash(file_path)
+            path = ParsedCache.cache_path(file_path, digest, columns, types)
+            table = ParsedCache.read(path, digest)
+            hit = table is not None
+            if not hit:
+                os.makedirs(ParsedCache.CACHE_DIR, exist_ok=True)
+                ParsedCache.write(path, parse(file_path), ParsedCache.schema(columns, types), digest)
+                ParsedCache.remove_stale(file_path, path)
+                table = ParsedCache.read(path, digest)
+
+        Instrumentation.annotate(parsed_cache="hit" if hit else "miss")
+        print(
+            f"Parsed cache {'hit' if hit else 'miss'} for {file_path}: {table.num_rows} rows "
+            f"in {time.perf_counter() - started:.2f}s ({path})."
+        )
+        return table
+
+    @staticmethod
+    def is_table(rows) -> bool:
+        return hasattr(rows, "to_batches") and hasattr(rows, "schema")
+
+    @staticmethod
+    def iter_rows(rows, chunk_size: int = None):
+        """Row tuples from a cached table (batch by batch), or rows unchanged if already tuples."""
+        if not ParsedCache.is_table(rows):
+            yield from rows
+            return
+        for batch in rows.to_batches(max_chunksize=chunk_size or ParsedCache.CHUNK_ROWS):
+            yield from zip(*[column.to_pylist() for column in batch.columns])
+
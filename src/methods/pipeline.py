@@ -0,0 +1,363 @@
+from methods.database import Database
+from methods.airlines import Airlines
+from methods.airline_routes import AirlineRoutes
+from methods.airports import Airports
+from methods.aircraft import Aircraft
+from methods.operational_airlines import OperationalAirlines
+from methods.report import Report
+from methods.plot import Plot
+from methods.geo import Geo
+from methods.centrality import Centrality
+from methods.instrumentation import Instrumentation
+from methods.parsed_cache import ParsedCache
+
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class Step:
+    """
+    One pipeline step: a call into the existing static methods plus what it touches.
+
+    inputs:  files read (content-hashed)
+    reads:   tables read
+    writes:  tables written
+    outputs: files written (the step reruns if any is missing)
+    after:   extra step names that must finish first
+    """
+
+    def __init__(self, name, run, inputs=(), reads=(), writes=(), outputs=(), after=()):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+        self.outputs = tuple(outputs)
+        self.after = tuple(after)
+
+
+class Pipeline:
+    """
+    Dependency-ordered runner for the load -> transform -> report steps.
+
+    A step depends on every earlier step (in list order) that writes a table it
+    reads or writes, or reads a table it writes, plus anything in `after`.
+    Independent steps run concurrently.
+
+    Each step has a signature: its input file hashes plus the version of every
+    table it reads. A table's version is the signature of the step that last
+    wrote it (earlier in this pipeline, or the stored version otherwise). A step
+    whose signature matches its last successful run, and whose tables and output
+    files still exist, is skipped.
+    """
+
+    STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS pipeline_steps (
+        step_name    TEXT PRIMARY KEY,
+        signature    TEXT NOT NULL,
+        wall_seconds DOUBLE PRECISION,
+        finished_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE TABLE IF NOT EXISTS pipeline_table_versions (
+        table_name  TEXT PRIMARY KEY,
+        version     TEXT NOT NULL,
+        step_name   TEXT,
+        updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE TABLE IF NOT EXISTS pipeline_step_runs (
+        run_started  TIMESTAMPTZ NOT NULL,
+        step_name    TEXT NOT NULL,
+        status       TEXT NOT NULL,   -- ran / skipped / failed / blocked
+        wall_seconds DOUBLE PRECISION,
+        PRIMARY KEY (run_started, step_name)
+    );
+    """
+
+    @staticmethod
+    def default_steps(input_dir: str = "input data", use_copy: bool = True, use_cache: bool = False) -> list:
+        """
+        The main.py pipeline: four concurrent loaders, then transforms, then reports.
+        use_cache=True has the airline, route and airport loaders read ParsedCache.
+        """
+        airlines_path = os.path.join(input_dir, "airlines.dat.txt")
+        routes_path = os.path.join(input_dir, "routes.dat.txt")
+        airports_path = os.path.join(input_dir, "airports.dat.txt")
+        planes_path = os.path.join(input_dir, "planes.dat.txt")
+        countries_path = os.path.join(input_dir, "countries.dat.txt")
+
+        # route_equipment is rebuilt by the routes and aircraft loaders themselves,
+        # so readers depend on airline_routes + aircraft instead.
+        return [
+            Step(
+                "load_airlines",
+                lambda p: Airlines.load_airlines_to_db(airlines_path, p, use_copy=use_copy, use_cache=use_cache),
+                inputs=[airlines_path],
+                writes=["airlines"],
+            ),
+            Step(
+                "load_routes",
+                lambda p: AirlineRoutes.load_routes_to_db(routes_path, p, use_copy=use_copy, use_cache=use_cache),
+                inputs=[routes_path],
+                writes=["airline_routes"],
+            ),
+            Step(
+                "load_airports",
+                lambda p: Airports.load_airports_to_db(airports_path, p, use_copy=use_copy, use_cache=use_cache),
+                inputs=[airports_path],
+                writes=["airports"],
+            ),
+            Step(
+                "load_aircraft",
+                lambda p: Aircraft.load_aircraft_to_db(planes_path, p, use_copy=use_copy),
+                inputs=[planes_path],
+                writes=["aircraft"],
+            ),
+            Step(
+                "operational_airlines",
+                OperationalAirlines.create_table,
+                reads=["airlines"],
+                writes=["operational_airlines"],
+            ),
+            Step(
+                "map_asia_flags",
+                lambda p: AirlineRoutes.map_asia_flags(p, countries_path),
+                inputs=[countries_path],
+                reads=["airline_routes", "airports"],
+                writes=["airline_routes"],
+            ),
+            Step(
+                "route_distances",
+                Geo.compute_route_distances,
+                reads=["airline_routes", "airports"],
+                writes=["airline_routes"],
+            ),
+            Step(
+                "airport_columns",
+                Airports.add_columns,
+                reads=["airports"],
+                writes=["airports"],
+            ),
+            Step(
+                "flights_per_airport",
+                Airports.calculate_flights_per_airport,
+                reads=["airline_routes", "airports"],
+                writes=["airports"],
+            ),
+            Step(
+                "hub_centrality",
+                Centrality.compute_hub_centrality,
+                reads=["airline_routes", "airports"],
+                writes=["airports"],
+            ),
+            Step(
+                "asia_report",
+                Report.create_asia_report_table,
+                reads=["airline_routes", "airlines", "aircraft"],
+                writes=["asia_report"],
+                outputs=["output data/asia_report.xlsx"],
+            ),
+            Step(
+                "asia_report_pie",
+                lambda p: Plot.export_asia_report_flights_pie(
+                    p,
+                    output_png_path="output data/asia_report_flights_pie.png",
+                    top_n=10,
+                    also_export_excel=False,
+                    output_excel_path="output data/pie_chart_asia_report_flights.xlsx",
+                ),
+                reads=["asia_report"],
+                outputs=["output data/asia_report_flights_pie.png"],
+            ),
+            Step(
+                "top10_airports_report",
+                Report.get_airlines_using_top10_airports,
+                reads=["airports", "airline_routes", "airlines"],
+                outputs=["output data/top_airports_in_asia_report.xlsx"],
+            ),
+            Step(
+                "unique_airports_report",
+                Report.get_airlines_unique_airport_counts,
+                reads=["airline_routes", "airlines"],
+                outputs=["output data/airlines_unique_airports_report.xlsx"],
+            ),
+        ]
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        # Shared with ParsedCache, so a loader's cache lookup doesn't hash the file again
+        return ParsedCache.file_hash(path)
+
+    @staticmethod
+    def dependencies(steps: list) -> dict:
+        """step name -> set of step names it waits for."""
+        names = [s.name for s in steps]
+        if len(set(names)) != len(names):
+            raise ValueError("Pipeline step names must be unique.")
+
+        deps = {}
+        for i, step in enumerate(steps):
+            touched = set(step.reads) | set(step.writes)
+            deps[step.name] = {
+                earlier.name
+                for earlier in steps[:i]
+                # read/write after write, and write after read (e.g. ALTER TABLE under a running reader)
+                if touched & set(earlier.writes) or set(step.writes) & set(earlier.reads)
+            }
+            for name in step.after:
+                if name not in names[:i]:
+                    raise ValueError(f"Step '{step.name}' runs after unknown or later step '{name}'.")
+                deps[step.name].add(name)
+        return deps
+
+    @staticmethod
+    def upstream_writers(steps: list) -> dict:
+        """(step name, table) -> name of the closest earlier step writing that table (None if external)."""
+        writers = {}
+        last_writer = {}
+        for step in steps:
+            for table in step.reads:
+                writers[(step.name, table)] = last_writer.get(table)
+            for table in step.writes:
+                last_writer[table] = step.name
+        return writers
+
+    @staticmethod
+    def signature(step: Step, file_hashes: dict, table_version) -> str:
+        h = hashlib.sha256(step.name.encode())
+        for path in step.inputs:
+            h.update(f"file:{path}:{file_hashes[path]}".encode())
+        for table in step.reads:
+            h.update(f"table:{table}:{table_version(table)}".encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def is_current(cur, step: Step, signature: str) -> bool:
+        cur.execute("SELECT signature FROM pipeline_steps WHERE step_name = %s;", (step.name,))
+        row = cur.fetchone()
+        if row is None or row[0] != signature:
+            return False
+        if not all(Database.table_exists(cur, table) for table in step.writes):
+            return False
+        return all(os.path.exists(path) for path in step.outputs)
+
+    @staticmethod
+    def run(steps: list, db_parameters: dict, max_workers: int = 4, force: bool = False) -> dict:
+        """
+        Run the steps, concurrently where the DAG allows, skipping up-to-date ones
+        (force=True reruns everything). Returns {step name: (status, wall seconds)}
+        and raises RuntimeError afterwards if any step failed.
+        """
+        deps = Pipeline.dependencies(steps)
+        writers = Pipeline.upstream_writers(steps)
+        by_name = {s.name: s for s in steps}
+
+        file_hashes = {path: Pipeline.file_hash(path) for s in steps for path in s.inputs}
+
+        with Database.connection(db_parameters) as conn:
+            with conn.cursor() as cur:
+                cur.execute(Pipeline.STATE_SQL)
+                cur.execute("SELECT table_name, version FROM pipeline_table_versions;")
+                stored_versions = dict(cur.fetchall())
+                cur.execute("SELECT now();")
+                run_started = cur.fetchone()[0]
+            conn.commit()
+
+        signatures = {}
+        results = {}
+        failed_after = {}  # wall time of steps that raised
+
+        def execute(step: Step):
+            signature = Pipeline.signature(
+                step,
+                file_hashes,
+                lambda table: signatures[writer] if (writer := writers[(step.name, table)]) else stored_versions.get(table, ""),
+            )
+            signatures[step.name] = signature
+
+            if not force:
+                with Database.connection(db_parameters) as conn:
+                    with conn.cursor() as cur:
+                        current = Pipeline.is_current(cur, step, signature)
+                if current:
+                    return "skipped", 0.0
+
+            started = time.perf_counter()
+            try:
+                # One metrics line per step; the loader/report methods it calls become its phases
+                with Instrumentation.phase(step.name):
+                    step.run(db_parameters)
+            finally:
+                elapsed = time.perf_counter() - started
+                failed_after[step.name] = elapsed
+
+            with Database.connection(db_parameters) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        INSERT INTO pipeline_steps (step_name, signature, wall_seconds, finished_at)
+                        VALUES (%s, %s, %s, now())
+                        ON CONFLICT (step_name) DO UPDATE
+                        SET signature = EXCLUDED.signature,
+                            wall_seconds = EXCLUDED.wall_seconds,
+                            finished_at = EXCLUDED.finished_at;
+                    """, (step.name, signature, elapsed))
+                    for table in step.writes:
+                        cur.execute("""
+                            INSERT INTO pipeline_table_versions (table_name, version, step_name, updated_at)
+                            VALUES (%s, %s, %s, now())
+                            ON CONFLICT (table_name) DO UPDATE
+                            SET version = EXCLUDED.version,
+                                step_name = EXCLUDED.step_name,
+                                updated_at = EXCLUDED.updated_at;
+                        """, (table, signature, step.name))
+                conn.commit()
+            return "ran", elapsed
+
+        pending = set(by_name)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                # Steps behind a failure never run
+                for name in sorted(pending):
+                    if any(results.get(d, ("",))[0] in ("failed", "blocked") for d in deps[name]):
+                        results[name] = ("blocked", 0.0)
+                        pending.discard(name)
+
+                ready = [s.name for s in steps if s.name in pending and all(d in results for d in deps[s.name])]
+                for name in ready:
+                    pending.discard(name)
+                    running[pool.submit(execute, by_name[name])] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"Step '{name}' failed: {e}")
+                        results[name] = ("failed", failed_after.get(name, 0.0))
+
+        with Database.connection(db_parameters) as conn:
+            with conn.cursor() as cur:
+                for name, (status, elapsed) in results.items():
+                    cur.execute(
+                        "INSERT INTO pipeline_step_runs (run_started, step_name, status, wall_seconds) VALUES (%s, %s, %s, %s);",
+                        (run_started, name, status, elapsed),
+                    )
+            conn.commit()
+
+        print("step                     | status  | wall time")
+        for step in steps:
+            status, elapsed = results[step.name]
+            print(f"{step.name:<24} | {status:<7} | {elapsed:>8.2f}s")
+
+        failed = [name for name, (status, _) in results.items() if status == "failed"]
+        if failed:
+            raise RuntimeError(f"Pipeline steps failed: {', '.join(failed)}")
+        return results
@@ -1,4 +1,9 @@
 from methods.database import Database
+from methods.instrumentation import Instrumentation
+from methods.parsed_cache import ParsedCache
+from methods.report import Report
+
+import itertools
 
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -6,13 +11,20 @@ import matplotlib.pyplot as plt
 
 class Plot:
     @staticmethod
+    @Instrumentation.step()
     def export_asia_report_flights_pie(
         db_parameters,
         output_png_path,
         top_n,
         also_export_excel,
         output_excel_path,
+        data=None,
     ):
+        """
+        Pie chart of asia_report flights by airline (top N + Other).
+        data (a DataFrame or pyarrow Table with airline_name and
+        total_flights_to_asia) is plotted instead of querying asia_report.
+        """
 
         sql = """
             SELECT
@@ -23,28 +35,56 @@ class Plot:
             ORDER BY total_flights_to_asia DESC;
         """
 
-        conn = Database.get_connection(db_parameters)
+        conn = Database.get_connection(db_parameters) if data is None else None
 
         try:
-            df = pd.read_sql(sql, conn)
-
-            if df.empty:
+            if conn is not None:
+                # Streamed: only the top N rows and the running "Other" sum are kept
+                stats = Database.query_stats()
+                frames = Database.read_sql_chunks(conn, sql, stats=stats)
+            else:
+                # Same filter and order as the query, over rows already in hand
+                df = data.to_pandas() if ParsedCache.is_table(data) else data.copy()
+                df = df[["airline_name", "total_flights_to_asia"]].fillna({"total_flights_to_asia": 0})
+                df = df[df["total_flights_to_asia"] > 0]
+                df = df.sort_values("total_flights_to_asia", ascending=False, kind="stable").reset_index(drop=True)
+                frames = iter([df])
+
+            # Only the first chunk can be empty, and then the whole result is
+            first = next(frames)
+            if first.empty:
                 raise ValueError(
                     "asia_report returned 0 rows (or total_flights_to_asia is all 0)."
                 )
 
-            # Use airline_name directly for labels
-            df["label"] = df["airline_name"].fillna("(unknown)").str.strip()
-
-            # Top N airlines + Other
-            df_top = df.head(top_n).copy()
-            df_rest = df.iloc[top_n:].copy()
+            labels, values = [], []
+            other = {"sum": 0.0}
+
+            def rows():
+                for chunk in itertools.chain([first], frames):
+                    # Use airline_name directly for labels
+                    chunk_labels = chunk["airline_name"].fillna("(unknown)").str.strip()
+                    for name, total, label in zip(chunk["airline_name"], chunk["total_flights_to_asia"], chunk_labels):
+                        # Top N airlines + Other
+                        if len(labels) < top_n:
+                            labels.append(label)
+                            values.append(float(total))
+                        else:
+                            other["sum"] += float(total)
+                        yield name, total, label
 
-            labels = df_top["label"].tolist()
-            values = df_top["total_flights_to_asia"].astype(float).tolist()
+            if also_export_excel:
+                Report.write_excel_rows(
+                    output_excel_path, ["airline_name", "total_flights_to_asia", "label"], rows(), highlight_column=None
+                )
+            else:
+                for _ in rows():
+                    pass
+            if conn is not None:
+                Database.print_query_stats("asia_report pie query", stats)
 
             # Combine remaining airlines into "Other"
-            other_sum = float(df_rest["total_flights_to_asia"].sum()) if not df_rest.empty else 0.0
+            other_sum = other["sum"]
             if other_sum > 0:
                 labels.append("Other")
                 values.append(other_sum)
@@ -94,14 +134,11 @@ class Plot:
             plt.savefig(output_png_path, dpi=200)
             plt.close()
 
-            # Optional Excel export
-            if also_export_excel:
-                df.to_excel(output_excel_path, index=False)
-
             print(f"Pie chart saved to: {output_png_path}")
 
             if also_export_excel:
                 print(f"Excel export saved to: {output_excel_path}")
 
         finally:
-            conn.close()
+            if conn is not None:
+                conn.close()
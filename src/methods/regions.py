@@ -0,0 +1,278 @@
+from methods.database import Database
+
+import csv
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+
+class Regions:
+    """
+    Region registry keyed on ISO 3166-1 alpha-2 codes (countries.dat.txt).
+
+    Each region gets a small integer id (1..127, 0 = not in any region), so an
+    airport has one region_id and a route one region_pair code:
+        region_pair = source_region * PAIR_BASE + dest_region
+    New regions are new registry entries, not new flag columns on airline_routes.
+    """
+
+    PAIR_BASE = 128
+    COUNTRIES_PATH = "input data/countries.dat.txt"
+
+    # The Asia definition the Asia reports have always used
+    ASIA = (
+        "AF", "AM", "AZ", "BH", "BD", "BT", "BN", "KH", "CN", "CY", "GE", "IN", "ID",
+        "IR", "IQ", "IL", "JP", "JO", "KZ", "KW", "KG", "LA", "LB", "MY", "MV", "MN",
+        "MM", "NP", "KP", "OM", "PK", "PS", "PH", "QA", "SA", "SG", "KR", "LK", "SY",
+        "TW", "TJ", "TH", "TL", "TR", "TM", "AE", "UZ", "VN", "YE", "HK", "MO",
+    )
+
+    MIDDLE_EAST = (
+        "AE", "BH", "CY", "EG", "IL", "IQ", "IR", "JO", "KW", "LB", "OM", "PS",
+        "QA", "SA", "SY", "TR", "YE",
+    )
+
+    EUROPE = (
+        "AD", "AL", "AT", "BA", "BE", "BG", "BY", "CH", "CZ", "DE", "DK", "EE", "ES",
+        "FI", "FO", "FR", "GB", "GG", "GI", "GR", "HR", "HU", "IE", "IM", "IS", "IT",
+        "JE", "LI", "LT", "LU", "LV", "MC", "MD", "ME", "MK", "MT", "NL", "NO", "PL",
+        "PT", "RO", "RS", "RU", "SE", "SI", "SJ", "SK", "SM", "UA", "VA", "XK",
+    )
+
+    # airports.dat country names that don't match a countries.dat name
+    COUNTRY_ALIASES = {
+        "Brunei": "BN",
+        "Burma": "MM",
+        "Cape Verde": "CV",
+        "Congo (Brazzaville)": "CG",
+        "Congo (Kinshasa)": "CD",
+        "East Timor": "TL",
+        "Faroe Islands": "FO",
+        "Kyrgyzstan": "KG",
+        "Macau": "MO",
+        "Micronesia": "FM",
+        "Saint Helena": "SH",
+        "Saint Kitts and Nevis": "KN",
+        "Saint Lucia": "LC",
+        "Saint Pierre and Miquelon": "PM",
+        "Saint Vincent and the Grenadines": "VC",
+        "Svalbard": "SJ",
+        "Swaziland": "SZ",
+        "Virgin Islands": "VI",
+        "Wallis and Futuna": "WF",
+        "West Bank": "PS",
+    }
+
+    def __init__(self, regions, countries_path: str = None):
+        """
+        regions: ordered [(name, iso_codes), ...]; region ids are assigned 1..n.
+        A country may belong to one region only.
+        """
+        if len(regions) >= Regions.PAIR_BASE:
+            raise ValueError(f"At most {Regions.PAIR_BASE - 1} regions are supported, got {len(regions)}.")
+
+        self.names = {0: None}
+        self.iso_to_region = {}
+        for region_id, (name, iso_codes) in enumerate(regions, start=1):
+            self.names[region_id] = name
+            for iso in iso_codes:
+                if iso in self.iso_to_region:
+                    other = self.names[self.iso_to_region[iso]]
+                    raise ValueError(f"Country {iso} is in both '{other}' and '{name}'.")
+                self.iso_to_region[iso] = region_id
+
+        self.countries_path = countries_path or Regions.COUNTRIES_PATH
+        self.country_to_region = {
+            country: self.iso_to_region[iso]
+            for country, iso in Regions.country_iso_codes(self.countries_path).items()
+            if iso in self.iso_to_region
+        }
+
+    @staticmethod
+    def asia(countries_path: str = None) -> "Regions":
+        """Single-region registry matching the existing Asia reports."""
+        return Regions([("asia", Regions.ASIA)], countries_path)
+
+    @staticmethod
+    def standard(countries_path: str = None) -> "Regions":
+        """Asia, Middle East and Europe; Middle East countries are carved out of Asia."""
+        asia = tuple(iso for iso in Regions.ASIA if iso not in Regions.MIDDLE_EAST)
+        return Regions(
+            [("asia", asia), ("middle_east", Regions.MIDDLE_EAST), ("europe", Regions.EUROPE)],
+            countries_path,
+        )
+
+    @staticmethod
+    def country_iso_codes(countries_path: str) -> dict:
+        """Country name (as used in airports.country) -> ISO code, from countries.dat plus aliases."""
+        names = {}
+        with open(countries_path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[0] or not row[1]:
+                    continue
+                names[row[0]] = row[1]
+        names.update(Regions.COUNTRY_ALIASES)
+        return names
+
+    @staticmethod
+    def country_names(iso_codes, countries_path: str = None) -> list:
+        """All airports.country spellings for the given ISO codes."""
+        wanted = set(iso_codes)
+        mapping = Regions.country_iso_codes(countries_path or Regions.COUNTRIES_PATH)
+        return sorted(name for name, iso in mapping.items() if iso in wanted)
+
+    def region_id(self, name: str) -> int:
+        for region_id, region_name in self.names.items():
+            if region_name == name:
+                return region_id
+        raise KeyError(f"Unknown region '{name}'.")
+
+    @staticmethod
+    def split_pair(pairs):
+        """region_pair -> (source_region, dest_region); works on ints and NumPy arrays."""
+        return pairs // Regions.PAIR_BASE, pairs % Regions.PAIR_BASE
+
+    def classify_airports(self, countries) -> np.ndarray:
+        """Vectorized: array of airport country names -> int16 region ids (0 = none)."""
+        lookup = self.country_to_region
+        return np.fromiter((lookup.get(c, 0) for c in countries), dtype=np.int16, count=len(countries))
+
+    def classify_routes(self, graph) -> np.ndarray:
+        """
+        One vectorized pass over a RouteGraph: int16 region_pair per route.
+        Routes with a NULL or unknown airport count as region 0 on that end.
+        """
+        node_region = np.zeros(len(graph.node_ids) + 1, dtype=np.int16)  # last slot = NULL node
+        known = np.searchsorted(graph.node_ids, graph.airport_ids)
+        node_region[known] = self.classify_airports(graph.airport_country)
+
+        return node_region[graph.source_node] * Regions.PAIR_BASE + node_region[graph.dest_node]
+
+    @staticmethod
+    def region_pair_sql(route_filter: str = "") -> str:
+        """One-pass UPDATE of airline_routes.region_pair from airports.region_id; unchanged rows are skipped."""
+        return f"""
+        UPDATE airline_routes r
+        SET region_pair = x.region_pair
+        FROM (
+            SELECT
+                r2.route_id,
+                (COALESCE(s.region_id, 0) * {Regions.PAIR_BASE} + COALESCE(d.region_id, 0))::SMALLINT AS region_pair
+            FROM airline_routes r2
+            LEFT JOIN airports s ON s.airport_id = r2.source_airport_id
+            LEFT JOIN airports d ON d.airport_id = r2.dest_airport_id
+            {route_filter}
+        ) x
+        WHERE r.route_id = x.route_id
+          AND r.region_pair IS DISTINCT FROM x.region_pair;
+        """
+
+    @staticmethod
+    def mark_report_dirty(cur, route_filter: str = ""):
+        """Queue the airlines of the airline_routes rows r matching route_filter for refresh_regional_flow_report."""
+        if Database.table_exists(cur, "regional_report_dirty_airlines"):
+            cur.execute(f"""
+                INSERT INTO regional_report_dirty_airlines (airline_id)
+                SELECT DISTINCT r.airline_id FROM airline_routes r {route_filter};
+            """)
+
+    @staticmethod
+    def classify_new_routes(cur) -> int:
+        """
+        region_pair for routes a full load added since apply_to_db (still NULL),
+        with their airlines queued for the regional report. A no-op until
+        apply_to_db has added the column. Returns the routes classified.
+        """
+        if not Database.column_exists(cur, "airline_routes", "region_pair"):
+            return 0
+        Regions.mark_report_dirty(cur, "WHERE r.region_pair IS NULL")
+        cur.execute(Regions.region_pair_sql("WHERE r2.region_pair IS NULL"))
+        return cur.rowcount
+
+    def apply_to_db(self, db_parameters: dict):
+        """
+        Store the registry (regions, country_regions), give every airport a
+        region_id, then classify all routes into region_pair in one UPDATE pass.
+        Only routes whose region_pair actually changes are rewritten.
+        """
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS regions (
+                        region_id SMALLINT PRIMARY KEY,
+                        name      TEXT UNIQUE NOT NULL
+                    );
+
+                    CREATE TABLE IF NOT EXISTS country_regions (
+                        country   TEXT PRIMARY KEY,   -- airports.country spelling
+                        region_id SMALLINT NOT NULL REFERENCES regions(region_id)
+                    );
+
+                    TRUNCATE country_regions, regions;
+
+                    ALTER TABLE airports ADD COLUMN IF NOT EXISTS region_id SMALLINT;
+                    ALTER TABLE airline_routes ADD COLUMN IF NOT EXISTS region_pair SMALLINT;
+                """)
+
+                execute_values(
+                    cur,
+                    "INSERT INTO regions (region_id, name) VALUES %s;",
+                    [(rid, name) for rid, name in self.names.items() if rid > 0],
+                )
+                execute_values(
+                    cur,
+                    "INSERT INTO country_regions (country, region_id) VALUES %s;",
+                    list(self.country_to_region.items()),
+                )
+
+                cur.execute("""
+                    UPDATE airports a
+                    SET region_id = COALESCE(cr.region_id, 0)
+                    FROM airports a2
+                    LEFT JOIN country_regions cr ON cr.country = a2.country
+                    WHERE a.airport_id = a2.airport_id
+                      AND a.region_id IS DISTINCT FROM COALESCE(cr.region_id, 0);
+                """)
+                airports_changed = cur.rowcount
+
+                dirty_report = Database.table_exists(cur, "regional_report_dirty_airlines")
+                if dirty_report and Database.is_embedded(db_parameters):
+                    # DuckDB has no DML in CTEs: collect the airlines through RETURNING instead
+                    cur.execute(Regions.region_pair_sql().strip().rstrip(";") + "\nRETURNING r.airline_id;")
+                    changed = cur.fetchall()
+                    routes_changed = len(changed)
+                    if changed:
+                        execute_values(
+                            cur,
+                            "INSERT INTO regional_report_dirty_airlines (airline_id) VALUES %s;",
+                            list({row for row in changed}),
+                        )
+                elif dirty_report:
+                    # Mark airlines of reclassified routes for the regional flow report
+                    cur.execute(f"""
+                        WITH changed AS (
+                            {Regions.region_pair_sql().strip().rstrip(";")}
+                            RETURNING r.airline_id
+                        ), dirty AS (
+                            INSERT INTO regional_report_dirty_airlines (airline_id)
+                            SELECT DISTINCT airline_id FROM changed
+                        )
+                        SELECT COUNT(*) FROM changed;
+                    """)
+                    routes_changed = cur.fetchone()[0]
+                else:
+                    cur.execute(Regions.region_pair_sql())
+                    routes_changed = cur.rowcount
+
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_airline_routes_region_pair ON airline_routes(region_pair);")
+            conn.commit()
+            print(
+                f"Regions applied ({len(self.names) - 1} regions): "
+                f"{airports_changed} airports and {routes_changed} routes reclassified."
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
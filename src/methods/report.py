@@ -1,45 +1,109 @@
 from methods.database import Database
 
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 import psycopg2
 
+from methods.airline_routes import AirlineRoutes
+from methods.regions import Regions
+from methods.coverage import Coverage
+from methods.centrality import Centrality
+from methods.instrumentation import Instrumentation
 
 
 class Report:
+  # Airlines highlighted in the hub reports (the top-10-airport carriers)
+  AIRLINE_COLORS = {
+      "China Southern Airlines": "#1f77b4",
+      "China Eastern Airlines":  "#ff7f0e",
+      "Air China":               "#2ca02c",
+      "Shenzhen Airlines":       "#d62728",
+      "Turkish Airlines":        "#9467bd",
+      "All Nippon Airways":      "#8c564b",
+      "Hainan Airlines":         "#e377c2",
+      "Sichuan Airlines":        "#7f7f7f",
+      "Air India Limited":       "#bcbd22",
+      "Xiamen Airlines":         "#17becf",
+  }
+
+  @staticmethod
+  def aircraft_join(cur, routes_table="airline_routes"):
+      """
+      Pick the best available join from airline_routes r (or routes_table,
+      e.g. airline_routes_decoded) -> aircraft ac.
+      Returns (LEFT JOIN clause exposing ac.seat_capacity, join description or None).
+      """
+      # Get columns for the routes relation
+      cur.execute("""
+          SELECT column_name
+          FROM information_schema.columns
+          WHERE table_schema = 'public'
+            AND table_name = %s;
+      """, (routes_table,))
+      routes_cols = {r[0] for r in cur.fetchall()}
+
+      join_sql = None
+      aircraft_source = "aircraft ac"
+
+      if Database.table_exists(cur, "route_equipment"):
+          # Bridge table: every plane type on the route, plain indexed equi-join
+          aircraft_source = """(
+            SELECT re.route_id, SUM(COALESCE(a.seat_capacity, 0)) AS seat_capacity
+            FROM route_equipment re
+            JOIN aircraft a ON a.aircraft_id = re.aircraft_id
+            GROUP BY re.route_id
+          ) ac"""
+          join_sql = "ON ac.route_id = r.route_id"
+      elif "aircraft_id" in routes_cols:
+          join_sql = "ON ac.aircraft_id = r.aircraft_id"
+      elif "iata_code" in routes_cols:
+          join_sql = "ON ac.iata_code = r.iata_code"
+      elif "icao_code" in routes_cols:
+          join_sql = "ON ac.icao_code = r.icao_code"
+      elif "equipment" in routes_cols:
+          join_sql = "ON (ac.iata_code = r.equipment OR ac.icao_code = r.equipment)"
+
+      aircraft_join_clause = (
+          f"LEFT JOIN {aircraft_source} {join_sql}"
+          if join_sql
+          else "LEFT JOIN aircraft ac ON 1=0"
+      )
+      return aircraft_join_clause, join_sql
+
   @staticmethod
+  @Instrumentation.step()
   def create_asia_report_table(db_parameters):
       conn = Database.get_connection(db_parameters)
 
       try:
           with conn.cursor() as cur:
-              # Get columns for airline_routes
-              cur.execute("""
-                  SELECT column_name
-                  FROM information_schema.columns
-                  WHERE table_schema = 'public'
-                    AND table_name = 'airline_routes';
-              """)
-              routes_cols = {r[0] for r in cur.fetchall()}
-
-              # Pick the best available join from airline_routes -> aircraft
-              join_sql = None
-
-              if "aircraft_id" in routes_cols:
-                  join_sql = "ON ac.aircraft_id = r.aircraft_id"
-              elif "iata_code" in routes_cols:
-                  join_sql = "ON ac.iata_code = r.iata_code"
-              elif "icao_code" in routes_cols:
-                  join_sql = "ON ac.icao_code = r.icao_code"
-              elif "equipment" in routes_cols:
-                  join_sql = "ON (ac.iata_code = r.equipment OR ac.icao_code = r.equipment)"
-
-              aircraft_join_clause = (
-                  f"LEFT JOIN aircraft ac {join_sql}"
-                  if join_sql
-                  else "LEFT JOIN aircraft ac ON 1=0"
-              )
+              # Text airline codes come from the decoded view on the code-id schema
+              routes = AirlineRoutes.routes_source(cur)
+              aircraft_join_clause, join_sql = Report.aircraft_join(cur, routes)
+
+              # Seat-km (ASK-style) totals once Geo.compute_route_distances has run
+              seat_km_sql = ""
+              if Database.column_exists(cur, "airline_routes", "distance_km"):
+                  seat_km_sql = """,
+
+                -- Seat-km: seat capacity x great-circle distance
+                ROUND(SUM(COALESCE(ac.seat_capacity, 0) * r.distance_km) FILTER (
+                  WHERE r.source_in_asia = TRUE AND r.dest_in_asia = FALSE
+                ))::BIGINT AS seat_km_out_of_asia,
+
+                ROUND(SUM(COALESCE(ac.seat_capacity, 0) * r.distance_km) FILTER (
+                  WHERE r.source_in_asia = FALSE AND r.dest_in_asia = TRUE
+                ))::BIGINT AS seat_km_in_asia,
+
+                ROUND(SUM(COALESCE(ac.seat_capacity, 0) * r.distance_km) FILTER (
+                  WHERE r.source_in_asia = TRUE AND r.dest_in_asia = TRUE
+                ))::BIGINT AS seat_km_within_asia,
+
+                ROUND(SUM(COALESCE(ac.seat_capacity, 0) * r.distance_km) FILTER (
+                  WHERE r.source_in_asia = TRUE OR r.dest_in_asia = TRUE
+                ))::BIGINT AS seat_km_total_to_asia"""
 
               cur.execute("DROP TABLE IF EXISTS asia_report;")
 
@@ -87,9 +151,9 @@ class Report:
                 -- pax total includes out + in + within (touches Asia)
                 SUM(COALESCE(ac.seat_capacity, 0)) FILTER (
                   WHERE r.source_in_asia = TRUE OR r.dest_in_asia = TRUE
-                ) AS pax_total_to_asia
+                ) AS pax_total_to_asia{seat_km_sql}
 
-              FROM airline_routes r
+              FROM {routes} r
               LEFT JOIN airlines al
                 ON al.airline_id = r.airline_id
               {aircraft_join_clause}
@@ -111,11 +175,8 @@ class Report:
           else:
               print(f"Aircraft join used: {join_sql}")
               
-          # Load table into DataFrame
-          df = pd.read_sql("SELECT * FROM asia_report;", conn)
-
-          # Export to Excel
-          df.to_excel("output data/asia_report.xlsx", index=False)
+          # Stream the table straight into Excel (no highlighting on this report)
+          Report.stream_query_to_excel(conn, "SELECT * FROM asia_report;", "output data/asia_report.xlsx", highlight_column=None)
 
       except Exception as e:
           conn.rollback()
@@ -131,20 +192,79 @@ class Report:
       return "FF" + h
 
   @staticmethod
-  def apply_airline_highlights(excel_path: str):
-      airline_colors = {
-          "China Southern Airlines": "#1f77b4",
-          "China Eastern Airlines":  "#ff7f0e",
-          "Air China":               "#2ca02c",
-          "Shenzhen Airlines":       "#d62728",
-          "Turkish Airlines":        "#9467bd",
-          "All Nippon Airways":      "#8c564b",
-          "Hainan Airlines":         "#e377c2",
-          "Sichuan Airlines":        "#7f7f7f",
-          "Air India Limited":       "#bcbd22",
-          "Xiamen Airlines":         "#17becf",
-      }
+  def airline_fills() -> dict:
+      """airline name -> solid PatternFill from AIRLINE_COLORS."""
+      fills = {}
+      for name, color in Report.AIRLINE_COLORS.items():
+          argb = Report.hex_to_argb(color)
+          fills[name] = PatternFill(start_color=argb, end_color=argb, fill_type="solid")
+      return fills
 
+  @staticmethod
+  def write_excel_rows(excel_path: str, columns, rows, highlight_column: str = "airline_name") -> int:
+      """
+      Write rows into a write-only workbook one at a time, so memory stays flat.
+      Cells in highlight_column get their AIRLINE_COLORS fill as they are written
+      (highlight_column=None writes plain cells).
+      Returns the number of data rows written.
+      """
+      columns = list(columns)
+      if highlight_column is not None and highlight_column not in columns:
+          raise KeyError(f"Column '{highlight_column}' not found in the report columns.")
+      highlight_idx = columns.index(highlight_column) if highlight_column is not None else None
+      fills = Report.airline_fills()
+
+      wb = Workbook(write_only=True)
+      ws = wb.create_sheet()
+      ws.append(columns)
+
+      count = 0
+      for row in rows:
+          row = list(row)
+          fill = fills.get(row[highlight_idx]) if highlight_idx is not None else None
+          if fill is not None:
+              cell = WriteOnlyCell(ws, value=row[highlight_idx])
+              cell.fill = fill
+              row[highlight_idx] = cell
+          ws.append(row)
+          count += 1
+
+      with Instrumentation.phase("excel_save"):
+          wb.save(excel_path)
+      return count
+
+  @staticmethod
+  def stream_query_to_excel(conn, sql: str, excel_path: str, params=None,
+                            highlight_column: str = "airline_name", itersize: int = 5000) -> int:
+      """
+      Stream sql through Database.iter_rows (server-side cursor, itersize rows
+      per round trip) straight into a highlighted write-only workbook.
+      """
+      stats = Database.query_stats()
+      batches = Database.iter_rows(conn, sql, params, itersize, stats)
+      columns, first = next(batches)
+
+      def rows():
+          yield from first
+          for _, batch in batches:
+              yield from batch
+
+      # Rows are fetched lazily while the sheet is written; fetch time is reported on its own
+      count = Report.write_excel_rows(excel_path, columns, Instrumentation.timed_iter(rows(), "fetch"), highlight_column)
+      Database.print_query_stats(excel_path, stats)
+
+      conn.commit()
+      return count
+
+  @staticmethod
+  def frame_to_excel(df: pd.DataFrame, excel_path: str, highlight_column: str = "airline_name") -> int:
+      """DataFrame (e.g. from a RouteGraph) -> highlighted write-only workbook; NaN/None become empty cells."""
+      df = df.astype(object).where(df.notna(), None)
+      return Report.write_excel_rows(excel_path, df.columns, df.itertuples(index=False, name=None), highlight_column)
+
+  @staticmethod
+  def apply_airline_highlights(excel_path: str):
+      """Highlight an already-written workbook in place (the export functions now fill while writing)."""
       wb = load_workbook(excel_path)
       ws = wb.active
 
@@ -160,82 +280,133 @@ class Report:
           raise KeyError("Column 'airline_name' not found in the exported Excel file.")
 
       airline_name_col = headers["airline_name"]
+      fills = Report.airline_fills()
 
       for r in range(header_row + 1, ws.max_row + 1):
           name = ws.cell(row=r, column=airline_name_col).value
-          if isinstance(name, str) and name in airline_colors:
-              argb = Report.hex_to_argb(airline_colors[name])
-              fill = PatternFill(start_color=argb, end_color=argb, fill_type="solid")
-              ws.cell(row=r, column=airline_name_col).fill = fill
+          if isinstance(name, str) and name in fills:
+              ws.cell(row=r, column=airline_name_col).fill = fills[name]
 
       wb.save(excel_path)
       wb.close()
 
 
 
-  def get_airlines_using_top10_airports(db_parameters):
-      conn = Database.get_connection(db_parameters)
-      sql = """
-      WITH top_airports AS (
-          SELECT airport_id, name, iata, total_in_out
-          FROM airports
-          ORDER BY total_in_out DESC
-          LIMIT 10
-      ),
-      routes_touching_top AS (
-          SELECT r.airline_id, r.source_airport_id AS airport_id
-          FROM airline_routes r
-          JOIN top_airports ta ON ta.airport_id = r.source_airport_id
-
-          UNION ALL
-
-          SELECT r.airline_id, r.dest_airport_id AS airport_id
-          FROM airline_routes r
-          JOIN top_airports ta ON ta.airport_id = r.dest_airport_id
-      ),
-      airline_usage AS (
-          SELECT
-              airport_id,
-              airline_id,
-              COUNT(*) AS route_records_touching_airport
-          FROM routes_touching_top
-          WHERE airline_id IS NOT NULL
-          GROUP BY airport_id, airline_id
-      )
+  # Top-K hubs from the precomputed hub index: one range scan on each index
+  TOP_AIRPORTS_INDEX_SQL = """
+  SELECT
+      a.airport_id,
+      a.iata AS airport_iata,
+      a.name AS airport_name,
+      a.total_in_out,
+      al.airline_id,
+      al.name AS airline_name,
+      al.iata AS airline_iata,
+      al.icao AS airline_icao,
+      u.route_records AS route_records_touching_airport
+  FROM airport_hub_rank h
+  JOIN airports a ON a.airport_id = h.airport_id
+  JOIN airport_airline_usage u ON u.airport_id = h.airport_id
+  LEFT JOIN airlines al ON al.airline_id = u.airline_id
+  WHERE h.metric = %(metric)s
+    AND h.hub_rank <= %(k)s
+  ORDER BY
+      h.hub_rank,
+      u.route_records DESC,
+      airline_name;
+  """
+
+  # Fallback before Airports.refresh_hub_index has built the index
+  TOP_AIRPORTS_SCAN_SQL = """
+  WITH top_airports AS (
+      SELECT airport_id, name, iata, total_in_out, {rank_by} AS rank_score
+      FROM airports
+      ORDER BY {rank_by} DESC, airport_id
+      LIMIT %(k)s
+  ),
+  routes_touching_top AS (
+      SELECT r.airline_id, r.source_airport_id AS airport_id
+      FROM airline_routes r
+      JOIN top_airports ta ON ta.airport_id = r.source_airport_id
+
+      UNION ALL
+
+      SELECT r.airline_id, r.dest_airport_id AS airport_id
+      FROM airline_routes r
+      JOIN top_airports ta ON ta.airport_id = r.dest_airport_id
+  ),
+  airline_usage AS (
       SELECT
-          ta.airport_id,
-          ta.iata AS airport_iata,
-          ta.name AS airport_name,
-          ta.total_in_out,
-          al.airline_id,
-          al.name AS airline_name,
-          al.iata AS airline_iata,
-          al.icao AS airline_icao,
-          au.route_records_touching_airport
-      FROM airline_usage au
-      JOIN top_airports ta ON ta.airport_id = au.airport_id
-      LEFT JOIN airlines al ON al.airline_id = au.airline_id
-      ORDER BY
-          ta.total_in_out DESC,
-          ta.airport_id,
-          au.route_records_touching_airport DESC,
-          airline_name;
+          airport_id,
+          airline_id,
+          COUNT(*) AS route_records_touching_airport
+      FROM routes_touching_top
+      WHERE airline_id IS NOT NULL
+      GROUP BY airport_id, airline_id
+  )
+  SELECT
+      ta.airport_id,
+      ta.iata AS airport_iata,
+      ta.name AS airport_name,
+      ta.total_in_out,
+      al.airline_id,
+      al.name AS airline_name,
+      al.iata AS airline_iata,
+      al.icao AS airline_icao,
+      au.route_records_touching_airport
+  FROM airline_usage au
+  JOIN top_airports ta ON ta.airport_id = au.airport_id
+  LEFT JOIN airlines al ON al.airline_id = au.airline_id
+  ORDER BY
+      ta.rank_score DESC,
+      ta.airport_id,
+      au.route_records_touching_airport DESC,
+      airline_name;
+  """
+
+  @staticmethod
+  @Instrumentation.step()
+  def get_airlines_using_top_airports(db_parameters, k=10, graph=None, excel_path=None, rank_by="total_in_out"):
+      """
+      Export airline usage of the k top airports by rank_by: 'total_in_out' or
+      one of Centrality.METRICS. Reads the hub index (airport_hub_rank +
+      airport_airline_usage) when it exists, so any k is a range scan; a loaded
+      RouteGraph skips the SQL entirely (total_in_out ranking only).
       """
+      if rank_by != "total_in_out" and rank_by not in Centrality.METRICS:
+          raise ValueError(f"Unknown rank_by '{rank_by}'; expected 'total_in_out' or one of {Centrality.METRICS}.")
+      suffix = "" if rank_by == "total_in_out" else f"_by_{rank_by}"
+      excel_path = excel_path or f"output data/top{k}_airports{suffix}_report.xlsx"
 
-      excel_path = "output data/top_airports_in_asia_report.xlsx"
+      if graph is not None and rank_by == "total_in_out":
+          Report.frame_to_excel(graph.airlines_using_top_airports(k), excel_path)
+          return
 
+      conn = Database.get_connection(db_parameters)
       try:
-          df = pd.read_sql(sql, conn)
-          df.to_excel(excel_path, index=False)
-
-          Report.apply_airline_highlights(excel_path)
-
+          with conn.cursor() as cur:
+              indexed = Database.table_exists(cur, "airport_hub_rank")
+              if indexed:
+                  cur.execute("SELECT 1 FROM airport_hub_rank WHERE metric = %s LIMIT 1;", (rank_by,))
+                  indexed = cur.fetchone() is not None
+          sql = Report.TOP_AIRPORTS_INDEX_SQL if indexed else Report.TOP_AIRPORTS_SCAN_SQL.format(rank_by=rank_by)
+          Report.stream_query_to_excel(conn, sql, excel_path, params={"metric": rank_by, "k": k})
       finally:
           conn.close()
-          
-  def get_airlines_unique_airport_counts(db_parameters):
-        conn = Database.get_connection(db_parameters)
 
+  @Instrumentation.step()
+  def get_airlines_using_top10_airports(db_parameters, graph=None):
+      """Export airline usage of the 10 busiest airports. A loaded RouteGraph skips the SQL."""
+      Report.get_airlines_using_top_airports(
+          db_parameters,
+          k=10,
+          graph=graph,
+          excel_path="output data/top_airports_in_asia_report.xlsx",
+      )
+          
+  @Instrumentation.step()
+  def get_airlines_unique_airport_counts(db_parameters, graph=None):
+        """Export unique airports touched per airline. A loaded RouteGraph skips the SQL (bitmap popcounts)."""
         sql = """
         WITH airline_airports AS (
 
@@ -277,11 +448,180 @@ class Report:
 
         excel_path = "output data/airlines_unique_airports_report.xlsx"
 
-        try:
-            df = pd.read_sql(sql, conn)
-            df.to_excel(excel_path, index=False)
+        if graph is not None:
+            Report.frame_to_excel(Coverage.from_graph(graph).unique_counts(), excel_path)
+        else:
+            conn = Database.get_connection(db_parameters)
+            try:
+                Report.stream_query_to_excel(conn, sql, excel_path)
+            finally:
+                conn.close()
+
+  REGIONAL_REPORT_SQL = """
+  CREATE TABLE IF NOT EXISTS regional_flow_report (
+      airline_id      INTEGER,
+      airline_code    TEXT,
+      region_id       SMALLINT NOT NULL,
+      flights_out     BIGINT,   -- region -> elsewhere
+      flights_in      BIGINT,   -- elsewhere -> region
+      flights_within  BIGINT,   -- region -> region
+      flights_total   BIGINT,   -- out + in + within
+      pax_out         BIGINT,
+      pax_in          BIGINT,
+      pax_within      BIGINT,
+      pax_total       BIGINT
+  );
+
+  CREATE INDEX IF NOT EXISTS idx_regional_flow_report_region ON regional_flow_report(region_id);
+  CREATE INDEX IF NOT EXISTS idx_regional_flow_report_airline ON regional_flow_report(airline_id);
+
+  -- airlines whose routes or seat figures changed since the last refresh (filled by the
+  -- route loaders, Regions.apply_to_db and route_equipment rebuilds)
+  CREATE TABLE IF NOT EXISTS regional_report_dirty_airlines (
+      airline_id INTEGER
+  );
+  """
+
+  @staticmethod
+  @Instrumentation.step()
+  def refresh_regional_flow_report(db_parameters, full=False):
+      """
+      Materialize flights/pax in, out, within and total for every
+      (airline, region) in one scan of airline_routes, using region_pair from
+      Regions.apply_to_db. Each route emits one row for its source region
+      (out, or within when both ends share a region) and one for its
+      destination region (in).
+
+      After the first build only airlines listed in
+      regional_report_dirty_airlines are recomputed, unless full=True.
+      """
+      conn = Database.get_connection(db_parameters)
+
+      try:
+          with conn.cursor() as cur:
+              if not Database.column_exists(cur, "airline_routes", "region_pair"):
+                  raise RuntimeError("airline_routes.region_pair is missing; run Regions(...).apply_to_db first.")
+
+              first_build = not Database.table_exists(cur, "regional_flow_report")
+              cur.execute(Report.REGIONAL_REPORT_SQL)
+
+              if full or first_build:
+                  cur.execute("TRUNCATE regional_flow_report;")
+                  airline_filter = ""
+              else:
+                  cur.execute("""
+                      DELETE FROM regional_flow_report f
+                      WHERE EXISTS (
+                          SELECT 1 FROM regional_report_dirty_airlines d
+                          WHERE d.airline_id IS NOT DISTINCT FROM f.airline_id
+                      );
+                  """)
+                  airline_filter = """
+                    AND EXISTS (
+                        SELECT 1 FROM regional_report_dirty_airlines d
+                        WHERE d.airline_id IS NOT DISTINCT FROM r.airline_id
+                    )"""
+
+              routes = AirlineRoutes.routes_source(cur)
+              aircraft_join_clause, _ = Report.aircraft_join(cur, routes)
+              base = Regions.PAIR_BASE
+
+              cur.execute(f"""
+              INSERT INTO regional_flow_report
+              SELECT
+                f.airline_id,
+                f.airline_code,
+                f.region_id,
+
+                COUNT(*) FILTER (WHERE f.direction = 'out')    AS flights_out,
+                COUNT(*) FILTER (WHERE f.direction = 'in')     AS flights_in,
+                COUNT(*) FILTER (WHERE f.direction = 'within') AS flights_within,
+                COUNT(*)                                       AS flights_total,
+
+                SUM(f.seats) FILTER (WHERE f.direction = 'out')    AS pax_out,
+                SUM(f.seats) FILTER (WHERE f.direction = 'in')     AS pax_in,
+                SUM(f.seats) FILTER (WHERE f.direction = 'within') AS pax_within,
+                SUM(f.seats)                                       AS pax_total
+
+              FROM (
+                SELECT
+                  r.airline_id,
+                  r.airline_code,
+                  v.region_id,
+                  v.direction,
+                  COALESCE(ac.seat_capacity, 0) AS seats
+                FROM {routes} r
+                {aircraft_join_clause}
+                CROSS JOIN LATERAL (VALUES
+                  (r.region_pair / {base},
+                   CASE WHEN r.region_pair / {base} = r.region_pair % {base} THEN 'within' ELSE 'out' END),
+                  (r.region_pair % {base},
+                   CASE WHEN r.region_pair / {base} = r.region_pair % {base} THEN NULL ELSE 'in' END)
+                ) AS v(region_id, direction)
+                WHERE v.region_id > 0
+                  AND v.direction IS NOT NULL
+                  {airline_filter}
+              ) f
+              GROUP BY f.airline_id, f.airline_code, f.region_id;
+              """)
+              rows = cur.rowcount
+
+              cur.execute("TRUNCATE regional_report_dirty_airlines;")
 
-            Report.apply_airline_highlights(excel_path)
+          conn.commit()
+          scope = "full" if (full or first_build) else "incremental"
+          print(f"regional_flow_report refreshed ({scope}): {rows} airline/region rows written.")
 
-        finally:
-            conn.close()
+      except Exception:
+          conn.rollback()
+          raise
+
+      finally:
+          conn.close()
+
+  @staticmethod
+  @Instrumentation.step()
+  def export_regional_report(db_parameters, region_name, excel_path=None):
+      """
+      Export one region from regional_flow_report (index lookup on region_id),
+      streamed straight into Excel. Returns the number of airlines written.
+      """
+      excel_path = excel_path or f"output data/{region_name}_regional_report.xlsx"
+
+      sql = """
+      SELECT
+        f.airline_id,
+        f.airline_code,
+        COALESCE(al.name, '(unknown)') AS airline_name,
+        g.name AS region,
+        f.flights_out,
+        f.flights_in,
+        f.flights_within,
+        f.flights_total,
+        f.pax_out,
+        f.pax_in,
+        f.pax_within,
+        f.pax_total
+      FROM regional_flow_report f
+      JOIN regions g ON g.region_id = f.region_id
+      LEFT JOIN airlines al ON al.airline_id = f.airline_id
+      WHERE g.name = %(region)s
+      ORDER BY f.flights_total DESC, airline_name;
+      """
+
+      conn = Database.get_connection(db_parameters)
+      try:
+          count = Report.stream_query_to_excel(conn, sql, excel_path, params={"region": region_name})
+      finally:
+          conn.close()
+
+      print(f"{region_name} regional report saved to: {excel_path} ({count} airlines)")
+      return count
+
+  @staticmethod
+  @Instrumentation.step()
+  def create_regional_reports(db_parameters, region_names, full=False):
+      """Refresh the materialized report once, then export each region from it."""
+      Report.refresh_regional_flow_report(db_parameters, full=full)
+      for region_name in region_names:
+          Report.export_regional_report(db_parameters, region_name)
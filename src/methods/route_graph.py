@@ -0,0 +1,360 @@
+from methods.database import Database
+from methods.airline_routes import AirlineRoutes
+from methods.airlines import Airlines
+from methods.airports import Airports
+from methods.parsed_cache import ParsedCache
+from methods.regions import Regions
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class RouteGraph:
+    """
+    In-process columnar copy of `airline_routes` plus the airport/airline lookups
+    the reports need. Load once (RouteGraph.from_db, or from_files straight from
+    the parsed-input cache), then answer the report queries with vectorized
+    group-bys instead of rescanning Postgres.
+
+    Route columns are int32 arrays; NULL ids use NULL_ID. The Asia flags are
+    int8 (1 TRUE, 0 FALSE, -1 NULL) so SQL three-valued filters match exactly.
+    Airports are re-indexed densely (0..n-1) for the CSR adjacency index:
+    out_routes[out_ptr[i]:out_ptr[i + 1]] are the routes departing airport i.
+    """
+
+    NULL_ID = np.iinfo(np.int32).min
+
+    def __init__(self, routes: pd.DataFrame, airports: pd.DataFrame, airlines: pd.DataFrame,
+                 airline_codes: pd.DataFrame = None):
+        self.airline_id = RouteGraph.int_column(routes["airline_id"])
+        self.source_id = RouteGraph.int_column(routes["source_airport_id"])
+        self.dest_id = RouteGraph.int_column(routes["dest_airport_id"])
+
+        # airline_code[i] indexes airline_codes, -1 for NULL
+        if "airline_code_id" in routes:
+            # Code-id schema: the ids already intern the codes (airline_codes dimension table)
+            airline_codes = airline_codes.sort_values("code_id")
+            code_ids = airline_codes["code_id"].to_numpy(dtype=np.int64)
+            ids = pd.to_numeric(routes["airline_code_id"]).fillna(-1).to_numpy(dtype=np.int64)
+            self.airline_code = np.where(ids >= 0, np.searchsorted(code_ids, ids), -1).astype(np.int32)
+            self.airline_codes = airline_codes["code"].to_numpy(dtype=object)
+        else:
+            codes, uniques = pd.factorize(routes["airline_code"])
+            self.airline_code = codes.astype(np.int32)
+            self.airline_codes = np.asarray(uniques, dtype=object)
+
+        self.source_in_asia = RouteGraph.flag_column(routes.get("source_in_asia"), len(routes))
+        self.dest_in_asia = RouteGraph.flag_column(routes.get("dest_in_asia"), len(routes))
+
+        # Airport lookup, sorted by airport_id
+        airports = airports.sort_values("airport_id")
+        self.airport_ids = airports["airport_id"].to_numpy(dtype=np.int64)
+        self.airport_names = airports["name"].to_numpy(dtype=object)
+        self.airport_iata = airports["iata"].to_numpy(dtype=object)
+        self.airport_country = (
+            airports["country"].to_numpy(dtype=object) if "country" in airports else np.full(len(airports), None)
+        )
+        total = airports["total_in_out"] if "total_in_out" in airports else pd.Series(np.nan, index=airports.index)
+        self.airport_total = pd.to_numeric(total).to_numpy(dtype=np.float64)
+        self.airport_lat = RouteGraph.float_column(airports.get("latitude"), len(airports))
+        self.airport_lon = RouteGraph.float_column(airports.get("longitude"), len(airports))
+
+        # Airline lookup, sorted by airline_id
+        airlines = airlines.sort_values("airline_id")
+        self.airline_ids = airlines["airline_id"].to_numpy(dtype=np.int64)
+        self.airline_names = airlines["name"].to_numpy(dtype=object)
+        self.airline_iata = airlines["iata"].to_numpy(dtype=object)
+        self.airline_icao = airlines["icao"].to_numpy(dtype=object)
+
+        # Dense airport index over every id seen in airports or routes
+        route_ids = np.concatenate([self.source_id, self.dest_id])
+        self.node_ids = np.unique(np.concatenate([self.airport_ids, route_ids[route_ids != RouteGraph.NULL_ID]]))
+        self.source_node = self.to_node(self.source_id)
+        self.dest_node = self.to_node(self.dest_id)
+
+        self.out_ptr, self.out_routes = RouteGraph.build_csr(self.source_node, len(self.node_ids))
+        self.in_ptr, self.in_routes = RouteGraph.build_csr(self.dest_node, len(self.node_ids))
+
+        # Dense airline index: route_airlines[route_airline[i]] == airline_id[i]
+        self.route_airlines, route_airline = np.unique(self.airline_id, return_inverse=True)
+        self.route_airline = route_airline.astype(np.int32)
+
+    @staticmethod
+    def int_column(series: pd.Series) -> np.ndarray:
+        return pd.to_numeric(series).fillna(RouteGraph.NULL_ID).to_numpy(dtype=np.int32)
+
+    @staticmethod
+    def float_column(series, length: int) -> np.ndarray:
+        if series is None:
+            return np.full(length, np.nan)
+        return pd.to_numeric(series).to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def flag_column(series, length: int) -> np.ndarray:
+        if series is None:
+            return np.full(length, -1, dtype=np.int8)
+        if series.dtype == np.int8:  # already converted (read_sql_columns)
+            return series.to_numpy()
+        return series.map({True: 1, False: 0}).fillna(-1).to_numpy(dtype=np.int8)
+
+    @staticmethod
+    def build_csr(nodes: np.ndarray, n_nodes: int):
+        """CSR index (ptr, route indices) grouping routes by node; NULL nodes (-1) are left out."""
+        valid = np.flatnonzero(nodes >= 0)
+        order = valid[np.argsort(nodes[valid], kind="stable")]
+        counts = np.bincount(nodes[valid], minlength=n_nodes)
+        ptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=ptr[1:])
+        return ptr, order.astype(np.int32)
+
+    @staticmethod
+    def from_frames(routes: pd.DataFrame, airports: pd.DataFrame, airlines: pd.DataFrame,
+                    airline_codes: pd.DataFrame = None) -> "RouteGraph":
+        return RouteGraph(routes, airports, airlines, airline_codes)
+
+    @staticmethod
+    def from_db(db_parameters: dict) -> "RouteGraph":
+        """Read airline_routes, airports and airlines once and build the graph."""
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                has_flags = Database.column_exists(cur, "airline_routes", "source_in_asia")
+                has_totals = Database.column_exists(cur, "airports", "total_in_out")
+                coded = AirlineRoutes.is_coded(cur)
+
+            flag_cols = ", source_in_asia, dest_in_asia" if has_flags else ""
+            total_col = ", total_in_out" if has_totals else ""
+            code_col = "airline_code_id" if coded else "airline_code"
+
+            stats = Database.query_stats()
+            # Routes are converted to the graph's int32/int8 columns chunk by chunk
+            ids = ("airline_id", "airline_code_id", "source_airport_id", "dest_airport_id")
+            flags = ("source_in_asia", "dest_in_asia")
+            routes = Database.read_sql_columns(
+                conn,
+                f"SELECT airline_id, {code_col}, source_airport_id, dest_airport_id{flag_cols} FROM airline_routes;",
+                {
+                    **{col: RouteGraph.int_column for col in ids},
+                    **{col: lambda series: RouteGraph.flag_column(series, len(series)) for col in flags},
+                },
+                stats=stats,
+            )
+            airline_codes = (
+                Database.read_sql_frame(conn, "SELECT code_id, code FROM airline_codes;", stats=stats) if coded else None
+            )
+            airports = Database.read_sql_frame(
+                conn, f"SELECT airport_id, name, iata, country, latitude, longitude{total_col} FROM airports;", stats=stats
+            )
+            airlines = Database.read_sql_frame(conn, "SELECT airline_id, name, iata, icao FROM airlines;", stats=stats)
+            Database.print_query_stats("RouteGraph.from_db", stats)
+        finally:
+            conn.close()
+
+        return RouteGraph.from_frames(routes, airports, airlines, airline_codes)
+
+    @staticmethod
+    def from_tables(routes, airports, airlines, countries_path: str = None) -> "RouteGraph":
+        """
+        Build the graph from parsed inputs (ParsedCache tables or DataFrames with
+        the loaders' columns) without a database, matching what the pipeline
+        would have stored: routes de-duplicated like airline_routes_uk (rows with
+        a NULL never conflict), the last row per airport/airline id kept like the
+        upserts, total_in_out recounted from the routes and the Asia flags as
+        map_asia_flags sets them (unknown airports are not in Asia).
+        """
+        routes, airports, airlines = (
+            t.to_pandas() if ParsedCache.is_table(t) else t for t in (routes, airports, airlines)
+        )
+        routes = routes[routes.isna().any(axis=1) | ~routes.duplicated()].reset_index(drop=True)
+        airports = airports.drop_duplicates("airport_id", keep="last").copy()
+        airlines = airlines.drop_duplicates("airline_id", keep="last")
+
+        outbound = routes["source_airport_id"].value_counts()
+        inbound = routes["dest_airport_id"].value_counts()
+        airports["total_in_out"] = (
+            airports["airport_id"].map(outbound).fillna(0) + airports["airport_id"].map(inbound).fillna(0)
+        ).astype(np.int64)
+
+        asia = set(Regions.country_names(Regions.ASIA, countries_path))
+        in_asia = airports.set_index("airport_id")["country"].isin(asia)
+        routes["source_in_asia"] = routes["source_airport_id"].map(in_asia).fillna(False).astype(bool)
+        routes["dest_in_asia"] = routes["dest_airport_id"].map(in_asia).fillna(False).astype(bool)
+
+        return RouteGraph.from_frames(routes, airports, airlines)
+
+    @staticmethod
+    def from_files(input_dir: str = "input data", countries_path: str = None, workers: int = 1) -> "RouteGraph":
+        """from_tables over the ParsedCache copies of the input files (parsed on first use)."""
+        return RouteGraph.from_tables(
+            AirlineRoutes.read_routes(os.path.join(input_dir, "routes.dat.txt"), workers, use_cache=True),
+            Airports.read_airports(os.path.join(input_dir, "airports.dat.txt"), use_cache=True),
+            Airlines.read_airlines(os.path.join(input_dir, "airlines.dat.txt"), use_cache=True),
+            countries_path or os.path.join(input_dir, "countries.dat.txt"),
+        )
+
+    def to_node(self, ids: np.ndarray) -> np.ndarray:
+        """Map airport ids to dense node indices (-1 for NULL)."""
+        nodes = np.searchsorted(self.node_ids, ids).astype(np.int32)
+        nodes[ids == RouteGraph.NULL_ID] = -1
+        return nodes
+
+    def node_coordinates(self):
+        """(lat, lon) per dense node; NaN for airports that only appear in routes."""
+        lat = np.full(len(self.node_ids), np.nan)
+        lon = np.full(len(self.node_ids), np.nan)
+        known = np.searchsorted(self.node_ids, self.airport_ids)
+        lat[known] = self.airport_lat
+        lon[known] = self.airport_lon
+        return lat, lon
+
+    def lookup_airlines(self, ids: np.ndarray):
+        """Index into the airlines lookup for each id, plus a found mask (LEFT JOIN airlines)."""
+        if len(self.airline_ids) == 0:
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.airline_ids, ids), len(self.airline_ids) - 1)
+        return pos, self.airline_ids[pos] == ids
+
+    def airline_columns(self, ids: np.ndarray) -> dict:
+        """airline_id/name/iata/icao columns as produced by LEFT JOIN airlines al."""
+        pos, found = self.lookup_airlines(ids)
+
+        def pick(values):
+            out = np.full(len(ids), None, dtype=object)
+            out[found] = values[pos[found]]
+            return out
+
+        return {
+            "airline_id": pick(self.airline_ids),
+            "airline_name": pick(self.airline_names),
+            "airline_iata": pick(self.airline_iata),
+            "airline_icao": pick(self.airline_icao),
+        }
+
+    def region_pairs(self, regions) -> np.ndarray:
+        """int16 region_pair per route for a Regions registry (see Regions.classify_routes)."""
+        return regions.classify_routes(self)
+
+    def count_asia_routes(self):
+        """(source_in_asia, dest_in_asia, both_in_asia, touches_asia), as in AirlineRoutes.count_asia_routes."""
+        src = self.source_in_asia == 1
+        dst = self.dest_in_asia == 1
+        return (
+            int(src.sum()),
+            int(dst.sum()),
+            int((src & dst).sum()),
+            int((src | dst).sum()),
+        )
+
+    def asia_airline_frequencies(self, limit: int = 50) -> pd.DataFrame:
+        """Same rows and order as AirlineRoutes.report_asia_airline_frequencies, grouped by (airline_id, airline_code)."""
+        s, d = self.source_in_asia, self.dest_in_asia
+        within = (s == 1) & (d == 1)
+        out_of = (s == 1) & (d == 0)
+        into = (s == 0) & (d == 1)
+        touches = (s == 1) | (d == 1)
+
+        n_codes = len(self.airline_codes) + 1
+        keys = (self.airline_id.astype(np.int64) - RouteGraph.NULL_ID) * n_codes + (self.airline_code + 1)
+        group_keys, groups = np.unique(keys, return_inverse=True)
+        n_groups = len(group_keys)
+
+        sums = {
+            name: np.bincount(groups, weights=mask, minlength=n_groups).astype(np.int64)
+            for name, mask in (("within_asia", within), ("out_of_asia", out_of), ("into_asia", into), ("touches_asia_total", touches))
+        }
+
+        # Ties are broken by airline_id, then airline_code (NULLs last), as in the SQL;
+        # a NULL code (-1) picks the appended rank that sorts after every code
+        group_ids = group_keys // n_codes + RouteGraph.NULL_ID
+        group_codes = group_keys % n_codes - 1
+        code_rank = np.append(np.argsort(np.argsort(self.airline_codes.astype(str), kind="stable")), len(self.airline_codes))
+        id_rank = np.where(group_ids == RouteGraph.NULL_ID, np.iinfo(np.int64).max, group_ids)
+
+        keep = np.flatnonzero(sums["within_asia"] > 0)
+        order = keep[np.lexsort((
+            code_rank[group_codes[keep]],
+            id_rank[keep],
+            -sums["within_asia"][keep],
+            -sums["touches_asia_total"][keep],
+        ))][:limit]
+
+        airline_ids = group_ids[order]
+        code_idx = group_codes[order]
+        names = self.airline_columns(airline_ids)["airline_name"]
+
+        return pd.DataFrame({
+            "airline_id": np.where(airline_ids == RouteGraph.NULL_ID, None, airline_ids),
+            "airline_code": [self.airline_codes[i] if i >= 0 else None for i in code_idx],
+            "airline_name": np.where(pd.isna(names), "(unknown)", names),
+            **{name: values[order] for name, values in sums.items()},
+        })
+
+    def top_airports(self, k: int = 10) -> np.ndarray:
+        """Positions in the airports lookup ordered like ORDER BY total_in_out DESC (NULLS FIRST) LIMIT k."""
+        total = self.airport_total
+        order = np.lexsort((self.airport_ids, -np.nan_to_num(total, nan=0.0), ~np.isnan(total)))
+        return order[:k]
+
+    def airlines_using_top_airports(self, k: int = 10) -> pd.DataFrame:
+        """Same rows and order as Report.get_airlines_using_top10_airports."""
+        top = self.top_airports(k)
+        ranks, airports, airlines, counts = [], [], [], []
+        for rank, pos in enumerate(top):
+            node = np.searchsorted(self.node_ids, self.airport_ids[pos])
+            routes = np.concatenate([
+                self.out_routes[self.out_ptr[node]:self.out_ptr[node + 1]],
+                self.in_routes[self.in_ptr[node]:self.in_ptr[node + 1]],
+            ])
+            per_airline = np.bincount(self.route_airline[routes], minlength=len(self.route_airlines))
+            used = np.flatnonzero((per_airline > 0) & (self.route_airlines != RouteGraph.NULL_ID))
+
+            ranks.append(np.full(len(used), rank))
+            airports.append(np.full(len(used), pos))
+            airlines.append(self.route_airlines[used].astype(np.int64))
+            counts.append(per_airline[used])
+
+        if not ranks:
+            return pd.DataFrame()
+
+        airports = np.concatenate(airports)
+        totals = self.airport_total[airports]
+        df = pd.DataFrame({
+            "rank": np.concatenate(ranks),
+            "airport_id": self.airport_ids[airports],
+            "airport_iata": self.airport_iata[airports],
+            "airport_name": self.airport_names[airports],
+            "total_in_out": np.where(np.isnan(totals), None, totals.astype(np.int64)),
+            **self.airline_columns(np.concatenate(airlines)),
+            "route_records_touching_airport": np.concatenate(counts),
+        })
+        df = df.sort_values(
+            ["rank", "route_records_touching_airport", "airline_name"],
+            ascending=[True, False, True],
+            na_position="last",
+            kind="stable",
+        )
+        return df.drop(columns="rank").reset_index(drop=True)
+
+    def airlines_unique_airport_counts(self) -> pd.DataFrame:
+        """Same rows and order as Report.get_airlines_unique_airport_counts."""
+        n_nodes = len(self.node_ids)
+        touched = np.zeros((len(self.route_airlines), n_nodes + 1), dtype=bool)
+        touched[self.route_airline, self.source_node] = True  # NULL airports (-1) land in the last column
+        touched[self.route_airline, self.dest_node] = True
+
+        keep = self.route_airlines != RouteGraph.NULL_ID
+        unique_counts = touched[keep, :n_nodes].sum(axis=1)
+
+        df = pd.DataFrame({
+            **self.airline_columns(self.route_airlines[keep].astype(np.int64)),
+            "unique_airports_touched": unique_counts,
+        })
+        df = df.sort_values(
+            ["unique_airports_touched", "airline_name"],
+            ascending=[False, True],
+            na_position="last",
+            kind="stable",
+        )
+        return df.reset_index(drop=True)
@@ -0,0 +1,390 @@
+from methods.route_graph import RouteGraph
+from methods.geo import Geo
+from methods.spatial_index import SpatialIndex
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class RouteNetwork:
+    """
+    Directed airport graph for one airline or a group of airlines (an alliance
+    is just a list of airline ids), built from a RouteGraph.
+
+    Parallel routes are collapsed into one edge per (source, dest) airport pair,
+    stored as forward and reverse CSR arrays over the RouteGraph dense node
+    index: out_adj[out_ptr[i]:out_ptr[i + 1]] are the airports reachable nonstop
+    from node i, with great-circle lengths in out_km (inf when an airport has no
+    coordinates, so such edges count for hops but never for distance) and the
+    number of route records behind each edge in out_records.
+
+    Hop queries are level-synchronous BFS (bidirectional for point-to-point),
+    distance queries are bidirectional Dijkstra guided by great-circle
+    potentials. "Stops" are intermediate airports: max_stops=0 means nonstop,
+    1 means at most one connection.
+    """
+
+    UNREACHED = -1
+
+    def __init__(self, graph: RouteGraph, airline_ids=None):
+        self.graph = graph
+        self.n_nodes = len(graph.node_ids)
+
+        keep = (graph.source_node >= 0) & (graph.dest_node >= 0) & (graph.source_node != graph.dest_node)
+        if airline_ids is not None:
+            self.airline_ids = np.unique(np.asarray(list(airline_ids), dtype=np.int64))
+            keep &= np.isin(graph.airline_id, self.airline_ids)
+        else:
+            self.airline_ids = None
+
+        # One edge per airport pair, sorted by (source, dest)
+        edges, records = np.unique(
+            graph.source_node[keep].astype(np.int64) * self.n_nodes + graph.dest_node[keep], return_counts=True
+        )
+        src = (edges // self.n_nodes).astype(np.int32)
+        dst = (edges % self.n_nodes).astype(np.int32)
+
+        lat, lon = graph.node_coordinates()
+        km = Geo.haversine_km(lat[src], lon[src], lat[dst], lon[dst])
+        km[np.isnan(km)] = np.inf
+
+        self.out_ptr = RouteNetwork.offsets(src, self.n_nodes)
+        self.out_adj = dst
+        self.out_km = km
+        self.out_records = records  # route records (airline + pair rows) behind each edge
+
+        rev = np.lexsort((src, dst))
+        self.in_ptr = RouteNetwork.offsets(dst[rev], self.n_nodes)
+        self.in_adj = src[rev]
+        self.in_km = km[rev]
+        self.in_records = records[rev]
+
+        # Nodes with at least one edge of known length, and their unit vectors (distance potentials)
+        finite = np.isfinite(km)
+        self.located = np.unique(np.concatenate([src[finite], dst[finite]]))
+        self.located_xyz = SpatialIndex.to_xyz(lat[self.located], lon[self.located])
+
+        self.adjacency = None  # per-node Python lists for Dijkstra, built on first use
+
+    @staticmethod
+    def for_airline(graph: RouteGraph, airline_id: int) -> "RouteNetwork":
+        return RouteNetwork(graph, [airline_id])
+
+    @staticmethod
+    def for_group(graph: RouteGraph, airline_ids) -> "RouteNetwork":
+        """Combined network of several airlines (e.g. an alliance)."""
+        return RouteNetwork(graph, airline_ids)
+
+    @staticmethod
+    def airline_groups(graph: RouteGraph, airline_names) -> dict:
+        """airline name -> airline ids with that exact name (names without routes map to [])."""
+        return {
+            name: graph.airline_ids[graph.airline_names == name].tolist()
+            for name in airline_names
+        }
+
+    @staticmethod
+    def offsets(nodes: np.ndarray, n_nodes: int) -> np.ndarray:
+        ptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(nodes, minlength=n_nodes), out=ptr[1:])
+        return ptr
+
+    @staticmethod
+    def expand(ptr: np.ndarray, adj: np.ndarray, frontier: np.ndarray):
+        """(neighbour, from_node) for every edge leaving the frontier nodes."""
+        starts = ptr[frontier]
+        counts = ptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return adj[:0], frontier[:0]
+        # Edge positions: each node's slice start, plus 0..count-1 within the slice
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return adj[positions], np.repeat(frontier, counts)
+
+    @staticmethod
+    def bfs_hops(ptr: np.ndarray, adj: np.ndarray, source: int, max_hops: int = None) -> np.ndarray:
+        """Hop count from source to every node (UNREACHED where there is no path within max_hops)."""
+        hops = np.full(len(ptr) - 1, RouteNetwork.UNREACHED, dtype=np.int32)
+        hops[source] = 0
+        frontier = np.array([source], dtype=np.int32)
+        level = 0
+        while len(frontier) and (max_hops is None or level < max_hops):
+            level += 1
+            nbrs, _ = RouteNetwork.expand(ptr, adj, frontier)
+            frontier = np.unique(nbrs[hops[nbrs] == RouteNetwork.UNREACHED])
+            hops[frontier] = level
+        return hops
+
+    @staticmethod
+    def hop_rows(task: tuple) -> np.ndarray:
+        """Process-pool worker: hop counts from each source node to the target nodes."""
+        ptr, adj, sources, targets = task
+        return np.stack([RouteNetwork.bfs_hops(ptr, adj, s)[targets] for s in sources])
+
+    def node(self, airport_id: int) -> int:
+        pos = np.searchsorted(self.graph.node_ids, airport_id)
+        if pos >= self.n_nodes or self.graph.node_ids[pos] != airport_id:
+            raise KeyError(f"Airport {airport_id} is not in the route graph.")
+        return int(pos)
+
+    def edge_count(self) -> int:
+        return len(self.out_adj)
+
+    def airport_frame(self, nodes: np.ndarray) -> pd.DataFrame:
+        g = self.graph
+        ids = g.node_ids[nodes]
+        pos = np.minimum(np.searchsorted(g.airport_ids, ids), max(len(g.airport_ids) - 1, 0))
+        known = g.airport_ids[pos] == ids if len(g.airport_ids) else np.zeros(len(ids), dtype=bool)
+
+        def pick(values):
+            return np.where(known, values[pos], None) if len(values) else np.full(len(ids), None)
+
+        return pd.DataFrame({
+            "airport_id": ids,
+            "iata": pick(g.airport_iata),
+            "name": pick(g.airport_names),
+            "country": pick(g.airport_country),
+        })
+
+    def reachable(self, airport_id: int, max_stops: int = 1) -> pd.DataFrame:
+        """Airports reachable from airport_id with at most max_stops connections, fewest hops first."""
+        hops = RouteNetwork.bfs_hops(self.out_ptr, self.out_adj, self.node(airport_id), max_stops + 1)
+        nodes = np.flatnonzero(hops > 0)
+        nodes = nodes[np.lexsort((self.graph.node_ids[nodes], hops[nodes]))]
+
+        df = self.airport_frame(nodes)
+        df["hops"] = hops[nodes]
+        return df
+
+    def min_hop_nodes(self, source: int, target: int, max_hops: int = None):
+        """
+        Fewest-hop node path (list) from source to target, or None.
+
+        Bidirectional BFS: each round expands one full level of whichever side
+        has fewer edges to scan. The first level that touches the other side
+        gives a shortest path, because no shorter path could have been missed
+        by the earlier rounds.
+        """
+        if source == target:
+            return [source]
+
+        unseen = -2
+        parent_f = np.full(self.n_nodes, unseen, dtype=np.int32)
+        parent_b = np.full(self.n_nodes, unseen, dtype=np.int32)
+        parent_f[source] = parent_b[target] = -1
+        front_f = np.array([source], dtype=np.int32)
+        front_b = np.array([target], dtype=np.int32)
+
+        rounds = 0
+        while len(front_f) and len(front_b) and (max_hops is None or rounds < max_hops):
+            rounds += 1
+            cost_f = int((self.out_ptr[front_f + 1] - self.out_ptr[front_f]).sum())
+            cost_b = int((self.in_ptr[front_b + 1] - self.in_ptr[front_b]).sum())
+            if cost_f <= cost_b:
+                ptr, adj, parent, other, front = self.out_ptr, self.out_adj, parent_f, parent_b, front_f
+            else:
+                ptr, adj, parent, other, front = self.in_ptr, self.in_adj, parent_b, parent_f, front_b
+
+            nbrs, via = RouteNetwork.expand(ptr, adj, front)
+            new = parent[nbrs] == unseen
+            nbrs, first = np.unique(nbrs[new], return_index=True)
+            parent[nbrs] = via[new][first]
+            if cost_f <= cost_b:
+                front_f = nbrs
+            else:
+                front_b = nbrs
+
+            meet = nbrs[other[nbrs] != unseen]
+            if len(meet):
+                return RouteNetwork.join_paths(parent_f, parent_b, int(meet[0]))
+        return None
+
+    @staticmethod
+    def join_paths(parent_f, parent_b, meet: int) -> list:
+        path = [meet]
+        while parent_f[path[-1]] >= 0:
+            path.append(int(parent_f[path[-1]]))
+        path.reverse()
+        while parent_b[path[-1]] >= 0:
+            path.append(int(parent_b[path[-1]]))
+        return path
+
+    def adjacency_lists(self):
+        """(out, in) lists of [(node, km), ...] per node, skipping edges without a distance."""
+        if self.adjacency is None:
+            lists = []
+            for ptr, adj, km in ((self.out_ptr, self.out_adj, self.out_km), (self.in_ptr, self.in_adj, self.in_km)):
+                finite = np.isfinite(km)
+                adj_l, km_l, ptr_l = adj.tolist(), km.tolist(), ptr.tolist()
+                fin_l = finite.tolist()
+                lists.append([
+                    [(adj_l[e], km_l[e]) for e in range(ptr_l[i], ptr_l[i + 1]) if fin_l[e]]
+                    for i in range(self.n_nodes)
+                ])
+            self.adjacency = tuple(lists)
+        return self.adjacency
+
+    def potentials(self, source: int, target: int) -> dict:
+        """
+        node -> half the difference of its great-circle distance to target and
+        to source. Edge lengths are great-circle distances, so by the triangle
+        inequality this is a feasible potential for both search directions.
+        """
+        pos = np.searchsorted(self.located, [source, target])
+        chord_t = np.sqrt(((self.located_xyz - self.located_xyz[pos[1]]) ** 2).sum(axis=1))
+        chord_s = np.sqrt(((self.located_xyz - self.located_xyz[pos[0]]) ** 2).sum(axis=1))
+        # Shrunk slightly so rounding can never make a reduced edge length negative
+        km = Geo.EARTH_RADIUS_KM * (1.0 - 1e-9)
+        pot = (np.arcsin(np.minimum(chord_t / 2.0, 1.0)) - np.arcsin(np.minimum(chord_s / 2.0, 1.0))) * km
+        return dict(zip(self.located.tolist(), pot.tolist()))
+
+    def min_distance_nodes(self, source: int, target: int):
+        """
+        (km, node path) of the shortest great-circle path, or (inf, None).
+
+        Bidirectional Dijkstra with the potentials above: forward keys are
+        dist + pot, backward keys dist - pot, so both searches are pulled toward
+        each other and only a few dozen airports get settled even on the full
+        network. The search stops once the two smallest keys add up to the best
+        path found so far.
+        """
+        if source == target:
+            return 0.0, [source]
+        located = np.searchsorted(self.located, [source, target])
+        if not all(p < len(self.located) and self.located[p] == n for p, n in zip(located, (source, target))):
+            return float("inf"), None
+
+        out_lists, in_lists = self.adjacency_lists()
+        pot = self.potentials(source, target)
+        sides = (
+            (out_lists, {source: 0.0}, {source: -1}, [(pot[source], 0.0, source)], 1.0),
+            (in_lists, {target: 0.0}, {target: -1}, [(-pot[target], 0.0, target)], -1.0),
+        )
+        best, meet = float("inf"), None
+        pop, push = heapq.heappop, heapq.heappush
+
+        while sides[0][3] and sides[1][3]:
+            if sides[0][3][0][0] + sides[1][3][0][0] >= best:
+                break
+            side = 0 if len(sides[0][3]) <= len(sides[1][3]) else 1
+            lists, dist, parent, heap, sign = sides[side]
+            other_dist = sides[1 - side][1]
+
+            _, d, u = pop(heap)
+            if d > dist[u]:
+                continue  # stale entry
+            for v, w in lists[u]:
+                nd = d + w
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    parent[v] = u
+                    push(heap, (nd + sign * pot[v], nd, v))
+                    if v in other_dist and nd + other_dist[v] < best:
+                        best, meet = nd + other_dist[v], v
+
+        if meet is None:
+            return float("inf"), None
+
+        path = [meet]
+        while sides[0][2][path[-1]] >= 0:
+            path.append(sides[0][2][path[-1]])
+        path.reverse()
+        while sides[1][2][path[-1]] >= 0:
+            path.append(sides[1][2][path[-1]])
+        return best, path
+
+    def path_frame(self, nodes: list) -> pd.DataFrame:
+        """One row per airport on the path with leg and cumulative great-circle km."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        lat, lon = self.graph.node_coordinates()
+        legs = np.concatenate([[0.0], Geo.haversine_km(lat[nodes[:-1]], lon[nodes[:-1]], lat[nodes[1:]], lon[nodes[1:]])])
+
+        df = self.airport_frame(nodes)
+        df.insert(0, "stop", np.arange(len(nodes)))
+        df["leg_km"] = legs
+        df["cumulative_km"] = np.cumsum(legs)
+        return df
+
+    def min_hop_path(self, source_id: int, dest_id: int, max_stops: int = None):
+        """Fewest-connection path as a DataFrame (None when unreachable within max_stops)."""
+        max_hops = None if max_stops is None else max_stops + 1
+        nodes = self.min_hop_nodes(self.node(source_id), self.node(dest_id), max_hops)
+        return None if nodes is None else self.path_frame(nodes)
+
+    def min_distance_path(self, source_id: int, dest_id: int):
+        """Shortest great-circle path as a DataFrame (None when unreachable)."""
+        _, nodes = self.min_distance_nodes(self.node(source_id), self.node(dest_id))
+        return None if nodes is None else self.path_frame(nodes)
+
+    def hop_matrix(self, airport_ids, workers: int = 1) -> pd.DataFrame:
+        """
+        Hop counts between every ordered pair of airport_ids (rows: origin,
+        columns: destination, UNREACHED when no path). One full BFS per origin;
+        workers > 1 spreads the origins over a process pool.
+        """
+        airport_ids = [int(a) for a in airport_ids]
+        nodes = np.array([self.node(a) for a in airport_ids], dtype=np.int32)
+
+        workers = min(workers or os.cpu_count() or 1, len(nodes)) or 1
+        if workers > 1:
+            chunks = np.array_split(nodes, workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(
+                    RouteNetwork.hop_rows,
+                    [(self.out_ptr, self.out_adj, chunk, nodes) for chunk in chunks],
+                ))
+            matrix = np.concatenate(rows)
+        else:
+            matrix = RouteNetwork.hop_rows((self.out_ptr, self.out_adj, nodes, nodes))
+
+        return pd.DataFrame(matrix, index=pd.Index(airport_ids, name="origin"), columns=airport_ids)
+
+    def hop_summary(self, airport_ids, workers: int = 1) -> dict:
+        """Connectivity between a hub set: reachable ordered pairs and their hop distribution."""
+        matrix = self.hop_matrix(airport_ids, workers).to_numpy()
+        off_diagonal = ~np.eye(len(matrix), dtype=bool)
+        hops = matrix[off_diagonal]
+        reached = hops[hops != RouteNetwork.UNREACHED]
+        return {
+            "hub_pairs": int(off_diagonal.sum()),
+            "pairs_connected": len(reached),
+            "pairs_nonstop": int((reached == 1).sum()),
+            "pairs_one_stop": int((reached == 2).sum()),
+            "mean_hops": float(reached.mean()) if len(reached) else None,
+            "max_hops": int(reached.max()) if len(reached) else None,
+        }
+
+    @staticmethod
+    def connectivity_report(graph: RouteGraph, groups: dict, k: int = 10, workers: int = 1) -> pd.DataFrame:
+        """
+        One row per group (airline name or alliance -> airline ids): network size
+        and how well it links the k busiest airports. Hubs a group does not
+        serve count as unreachable.
+        """
+        hub_ids = graph.airport_ids[graph.top_airports(k)]
+        rows = []
+        for label, airline_ids in groups.items():
+            network = RouteNetwork(graph, airline_ids)
+            degree = np.diff(network.out_ptr) + np.diff(network.in_ptr)
+            hub_nodes = np.array([network.node(h) for h in hub_ids], dtype=np.int64)
+            rows.append({
+                "group": label,
+                "airlines": len(network.airline_ids),
+                "airports_served": int((degree > 0).sum()),
+                "airport_pairs": network.edge_count(),
+                "hubs_served": int((degree[hub_nodes] > 0).sum()),
+                **network.hop_summary(hub_ids, workers),
+            })
+
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        return df.sort_values(
+            ["pairs_connected", "pairs_nonstop", "group"],
+            ascending=[False, False, True],
+            kind="stable",
+        ).reset_index(drop=True)
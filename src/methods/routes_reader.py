@@ -0,0 +1,404 @@
+from methods.airline_routes import AirlineRoutes
+from methods.parsed_cache import ParsedCache
+
+import csv
+import io
+import mmap
+import os
+from itertools import islice
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class RoutesReader:
+    """
+    Memory-mapped, vectorized reader for routes.dat.
+
+    The file is scanned as bytes with NumPy, one block of whole lines at a
+    time: newline and comma offsets give every field's byte range, ids and
+    stops are parsed straight into int32 arrays (with NULL masks) and the code
+    and equipment strings are dictionary-encoded, so each distinct value is
+    decoded once instead of allocating a str per field.
+
+    The result is exactly what AirlineRoutes.iter_routes yields, errors
+    included. Lines the fast path can't vouch for (wrong field count, a bare
+    '\\r', non-ASCII bytes, ids that aren't plain digits) go through
+    csv.reader + parse_route_row one at a time. A quote character can
+    start a field spanning lines, so from the first line containing one the
+    rest of the file is handed to csv.reader (OpenFlights routes never quote).
+    """
+
+    BLOCK_BYTES = 8 << 20
+    INT_COLUMNS = ("airline_id", "source_airport_id", "dest_airport_id", "stops")
+    STRING_COLUMNS = ("airline_code", "source_airport_code", "dest_airport_code", "equipment")
+    MAX_DIGITS = 9  # longer ids go through int(); 9 digits always fit int32
+
+    # Bytes str.strip() removes that can appear in a line (not '\n'/'\r')
+    WHITESPACE = np.zeros(256, dtype=bool)
+    WHITESPACE[[0x09, 0x0B, 0x0C, 0x1C, 0x1D, 0x1E, 0x1F, 0x20]] = True
+
+    def __init__(self, file_path: str, block_bytes: int = None):
+        self.file_path = file_path
+        self.block_bytes = block_bytes or RoutesReader.BLOCK_BYTES
+        # Per string column: decoded values (index = code) and value -> code
+        self.dictionaries = {name: [] for name in RoutesReader.STRING_COLUMNS}
+        self.codes = {name: {} for name in RoutesReader.STRING_COLUMNS}
+
+    def encode(self, name: str, value) -> int:
+        if value is None:
+            return -1
+        codes = self.codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+        return code
+
+    @staticmethod
+    def empty_block(n: int) -> dict:
+        block = {"codeshare": np.zeros(n, dtype=bool)}
+        for name in RoutesReader.INT_COLUMNS:
+            block[name] = np.zeros(n, dtype=np.int32)
+            block[name + "_null"] = np.zeros(n, dtype=bool)
+        for name in RoutesReader.STRING_COLUMNS:
+            block[name] = np.full(n, -1, dtype=np.int32)
+        return block
+
+    def put_row(self, block: dict, i: int, row: tuple):
+        """Store one parse_route_row tuple at position i of a block."""
+        for name, value in zip(AirlineRoutes.ROUTE_COLUMNS, row):
+            if name in self.codes:
+                block[name][i] = self.encode(name, value)
+            elif name == "codeshare":
+                block[name][i] = value
+            elif value is None:
+                block[name + "_null"][i] = True
+            else:
+                block[name][i] = value  # parse_route_row has range-checked it
+
+    @staticmethod
+    def trim(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        """Narrow [starts, ends) field ranges past leading/trailing ASCII whitespace (in place)."""
+        last = len(buf) - 1
+        is_ws = RoutesReader.WHITESPACE
+        while True:
+            m = (starts < ends) & is_ws[buf[np.minimum(starts, last)]]
+            if not m.any():
+                break
+            starts[m] += 1
+        while True:
+            m = (ends > starts) & is_ws[buf[np.maximum(ends - 1, 0)]]
+            if not m.any():
+                break
+            ends[m] -= 1
+
+    @staticmethod
+    def edge_whitespace(buf: np.ndarray) -> np.ndarray:
+        """Offsets of whitespace bytes next to a comma or line end: the only places trim() changes."""
+        ws = np.flatnonzero(RoutesReader.WHITESPACE[buf])
+        if not len(ws):
+            return ws
+        boundary = np.zeros(256, dtype=bool)
+        boundary[[0x2C, 0x0A, 0x0D]] = True
+        padded = np.concatenate([[0x0A], buf, [0x0A]])  # line ends on both sides of buf
+        return ws[boundary[padded[ws]] | boundary[padded[ws + 2]]]
+
+    @staticmethod
+    def gather(buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray, width: int) -> np.ndarray:
+        """(n, width) matrix of each field's bytes, zero-padded past its length."""
+        windows = sliding_window_view(np.concatenate([buf, np.zeros(width, dtype=np.uint8)]), width)
+        out = windows[starts]
+        out[np.arange(width) >= lengths[:, None]] = 0
+        return out
+
+    @staticmethod
+    def parse_ints(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        """(values, ok): optional '-' plus 1..MAX_DIGITS ASCII digits; ok is False elsewhere."""
+        negative = (starts < ends) & (buf[np.minimum(starts, len(buf) - 1)] == 0x2D)
+        lengths = ends - starts - negative
+        ok = (lengths >= 1) & (lengths <= RoutesReader.MAX_DIGITS)
+        width = int(lengths[ok].max()) if ok.any() else 0
+
+        # Right to left: the k-th digit from the end is worth 10 ** k
+        values = np.zeros(len(starts), dtype=np.int64)
+        for k in range(width):
+            used = lengths > k
+            digit = np.where(used, buf[np.maximum(ends - 1 - k, 0)] - np.uint8(0x30), 0)
+            ok &= digit <= 9
+            values += digit.astype(np.int64) * 10 ** k
+        return np.where(negative, -values, values).astype(np.int32), ok
+
+    def encode_strings(self, name: str, buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Dictionary codes for non-NULL (ASCII) string fields: each distinct value is decoded once."""
+        if not len(starts):
+            return np.empty(0, dtype=np.int32)
+        lengths = ends - starts
+        # Key = length + bytes packed into big-endian uint64 words; sorting the
+        # words groups equal values
+        width = -(-(int(lengths.max()) + 1) // 8) * 8
+        keys = np.empty((len(starts), width), dtype=np.uint8)
+        keys[:, 0] = lengths
+        keys[:, 1:] = RoutesReader.gather(buf, starts, lengths, width - 1)
+        words = keys.view(">u8").astype(np.uint64)
+
+        order = np.lexsort(words.T[::-1])
+        ordered = words[order]
+        new = np.concatenate([[True], (ordered[1:] != ordered[:-1]).any(axis=1)])
+        group = np.cumsum(new) - 1
+        first = order[new]
+
+        # Distinct values decoded in one cast (the fast path never sees NUL bytes)
+        values = keys[first, 1:].view(f"S{width - 1}").ravel().astype(f"U{width - 1}").tolist()
+        codes, dictionary = self.codes[name], self.dictionaries[name]
+        known = len(codes)
+        local = np.array([codes.setdefault(v, len(codes)) for v in values], dtype=np.int32)
+        if len(codes) > known:
+            dictionary.extend(list(islice(reversed(codes), len(codes) - known))[::-1])
+
+        out = np.empty(len(starts), dtype=np.int32)
+        out[order] = local[group]
+        return out
+
+    def fast_fields(self, buf: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        """
+        Vectorized parse of ASCII lines with exactly eight commas and no quotes, NULs or '\\r'.
+        Returns (block, ok): the rows, and which lines the fast path accepts (the
+        rest need int() for an id; their rows are left empty).
+        """
+        n = len(starts)
+        commas = np.flatnonzero(buf == 0x2C)
+        first = np.searchsorted(commas, starts)
+        bounds = commas[first[:, None] + np.arange(8)] if n else np.empty((0, 8), dtype=np.int64)
+        field_starts = np.concatenate([starts[:, None], bounds + 1], axis=1).astype(np.int64)
+        field_ends = np.concatenate([bounds, ends[:, None]], axis=1).astype(np.int64)
+
+        edges = RoutesReader.edge_whitespace(buf)
+        if len(edges) and n:
+            lines = np.unique(np.maximum(np.searchsorted(starts, edges, side="right") - 1, 0))
+            fs, fe = field_starts[lines].ravel(), field_ends[lines].ravel()
+            RoutesReader.trim(buf, fs, fe)
+            field_starts[lines], field_ends[lines] = fs.reshape(-1, 9), fe.reshape(-1, 9)
+
+        last = len(buf) - 1
+        lengths = field_ends - field_starts
+        ok = np.ones(n, dtype=bool)
+        # '\\N' markers found from the (rare) backslashes rather than by reading every field
+        backslashes = np.flatnonzero(buf[:-1] == 0x5C)
+        marker = np.zeros(len(buf) + 1, dtype=bool)
+        marker[backslashes[buf[backslashes + 1] == 0x4E]] = True
+        null = (lengths == 0) | ((lengths == 2) & marker[field_starts])
+
+        block = RoutesReader.empty_block(n)
+        for column, name in zip((1, 3, 5, 7), RoutesReader.INT_COLUMNS):
+            values, parsed = RoutesReader.parse_ints(buf, field_starts[:, column], field_ends[:, column])
+            ok &= parsed | null[:, column]
+            block[name] = np.where(null[:, column], 0, values).astype(np.int32)
+            block[name + "_null"] = null[:, column].copy()
+
+        block["codeshare"] = (lengths[:, 6] == 1) & (buf[np.minimum(field_starts[:, 6], last)] == 0x59)
+
+        for column, name in zip((0, 2, 4, 8), RoutesReader.STRING_COLUMNS):
+            keep = ok & ~null[:, column]
+            block[name][keep] = self.encode_strings(name, buf, field_starts[keep, column], field_ends[keep, column])
+        return block, ok
+
+    def parse_block(self, buf: np.ndarray, record_offset: int):
+        """
+        Parse buf (whole lines). Returns (block, n_records, error): error is the
+        exception parse_route_row raised for the first bad record, and block
+        then holds only the rows before it.
+        """
+        newlines = np.flatnonzero(buf == 0x0A)
+        starts = np.concatenate([[0], newlines + 1]).astype(np.int64)
+        ends = np.concatenate([newlines, [len(buf)]]).astype(np.int64)
+        if starts[-1] == len(buf):  # buf ends with a newline
+            starts, ends = starts[:-1], ends[:-1]
+        raw_ends = ends.copy()
+        ends[(ends > starts) & (buf[np.maximum(ends - 1, 0)] == 0x0D)] -= 1
+
+        def per_line(positions):
+            return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+        # Fast path: eight commas, ASCII without NUL or '\r', within csv's field size limit
+        blank = ends == starts
+        simple = (
+            ~blank
+            & (per_line(np.flatnonzero(buf == 0x2C)) == 8)
+            & (per_line(np.flatnonzero((buf == 0x0D) | (buf == 0) | (buf >= 0x80))) == 0)
+            & (ends - starts <= csv.field_size_limit())
+        )
+        simple_lines = np.flatnonzero(simple)
+        fast, ok = self.fast_fields(buf, starts[simple_lines], ends[simple_lines])
+        fallback = np.sort(np.concatenate([np.flatnonzero(~simple & ~blank), simple_lines[~ok]]))
+
+        if not len(fallback):
+            return fast, len(starts), None
+
+        # Fallback lines in file order; a bare '\r' makes csv.reader split a
+        # line into several records, which shifts later line numbers
+        parsed_lines, error, extra_records = {}, None, 0
+        stop_line = len(starts)
+        for line in fallback.tolist():
+            rows, records = [], 0
+            try:
+                text = buf[starts[line]:raw_ends[line]].tobytes().decode("utf-8")
+                for records, row in enumerate(csv.reader(io.StringIO(text, newline="")), start=1):
+                    if row:
+                        rows.append(AirlineRoutes.parse_route_row(row, record_offset + line + extra_records + records))
+            except (ValueError, csv.Error) as e:
+                error = e
+            parsed_lines[line] = rows
+            if error is not None:
+                stop_line = line
+                break
+            extra_records += max(records, 1) - 1
+
+        # Output position of every line's rows: 1 per fast line, 0 per blank
+        # line, whatever csv.reader made of a fallback line; nothing past an error
+        counts = np.zeros(len(starts), dtype=np.int64)
+        counts[simple_lines[ok]] = 1
+        for line, rows in parsed_lines.items():
+            counts[line] = len(rows)
+        counts[stop_line + 1:] = 0
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        block = RoutesReader.empty_block(int(offsets[-1]))
+        take = ok & (simple_lines < stop_line)
+        target = offsets[simple_lines[take]]
+        for name, values in fast.items():
+            block[name][target] = values[take]
+        for line, rows in parsed_lines.items():
+            for i, row in enumerate(rows):
+                self.put_row(block, int(offsets[line]) + i, row)
+
+        return block, len(starts) + extra_records, error
+
+    def csv_tail(self, byte_offset: int, record_offset: int, chunk_rows: int = 100000):
+        """iter_routes from byte_offset on, in blocks (line numbers continue from record_offset)."""
+        with open(self.file_path, "rb") as raw:
+            raw.seek(byte_offset)
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                rows = []
+                for line_num, row in enumerate(csv.reader(f), start=record_offset + 1):
+                    if not row:
+                        continue
+                    rows.append(AirlineRoutes.parse_route_row(row, line_num))
+                    if len(rows) >= chunk_rows:
+                        yield self.rows_block(rows)
+                        rows = []
+                if rows:
+                    yield self.rows_block(rows)
+
+    def rows_block(self, rows: list) -> dict:
+        block = RoutesReader.empty_block(len(rows))
+        for i, row in enumerate(rows):
+            self.put_row(block, i, row)
+        return block
+
+    def blocks(self):
+        """
+        Yield parsed blocks (dicts of column arrays; see empty_block) in file
+        order. A bad record raises after the rows before it have been yielded.
+        """
+        size = os.path.getsize(self.file_path)
+        if size == 0:
+            return
+
+        with open(self.file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, records = 0, 0
+            while start < size:
+                end = min(start + self.block_bytes, size)
+                if end < size:
+                    cut = mm.rfind(b"\n", start, end)
+                    end = cut + 1 if cut >= 0 else (mm.find(b"\n", end) + 1 or size)
+
+                quote = mm.find(b'"', start, end)
+                if quote >= 0:
+                    # Parse up to the quoted line here, the rest with csv.reader
+                    end = mm.rfind(b"\n", start, quote) + 1
+                    if end <= start:
+                        break
+
+                buf = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start).copy()
+                block, n_records, error = self.parse_block(buf, records)
+                del buf
+                if len(block["codeshare"]):
+                    yield block
+                if error is not None:
+                    raise error
+                records += n_records
+                start = end
+                if quote >= 0:
+                    break
+
+        if start < size:
+            yield from self.csv_tail(start, records)
+
+    def iter_rows(self):
+        """`airline_routes` tuples, identical to AirlineRoutes.iter_routes."""
+        for block in self.blocks():
+            columns = []
+            for name in AirlineRoutes.ROUTE_COLUMNS:
+                values = block[name]
+                if name in self.dictionaries:
+                    lookup = np.array([None] + self.dictionaries[name], dtype=object)
+                    columns.append(lookup[values + 1].tolist())
+                elif name == "codeshare":
+                    columns.append(values.tolist())
+                else:
+                    values = values.astype(object)
+                    values[block[name + "_null"]] = None
+                    columns.append(values.tolist())
+            yield from zip(*columns)
+
+    def columns(self) -> dict:
+        """
+        The whole file as typed arrays, preallocated from the line count: int32
+        id/stops columns with <name>_null masks, a codeshare bool array and int32
+        dictionary codes (-1 = NULL) for the strings, plus "dictionaries".
+        """
+        with open(self.file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            capacity = 1
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for offset in range(0, size, self.block_bytes):
+                        chunk = np.frombuffer(mm, dtype=np.uint8, count=min(self.block_bytes, size - offset), offset=offset)
+                        # Every record ends at a '\n', a '\r' or the end of the file
+                        capacity += int(np.count_nonzero((chunk == 0x0A) | (chunk == 0x0D)))
+                        del chunk
+
+        out = RoutesReader.empty_block(capacity)
+        n = 0
+        for block in self.blocks():
+            size = len(block["codeshare"])
+            for name, values in block.items():
+                out[name][n:n + size] = values
+            n += size
+
+        out = {name: values[:n].copy() for name, values in out.items()}
+        out["dictionaries"] = {name: list(values) for name, values in self.dictionaries.items()}
+        return out
+
+    def to_arrow(self):
+        """The rows as a pyarrow Table with AirlineRoutes.ROUTE_COLUMNS / ARROW_TYPES."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        batches = []
+        for block in self.blocks():
+            arrays = []
+            for name in AirlineRoutes.ROUTE_COLUMNS:
+                values = block[name]
+                if name in self.dictionaries:
+                    dictionary = pa.array(self.dictionaries[name], type=pa.string())
+                    arrays.append(pc.take(dictionary, pa.array(values, mask=values < 0)))
+                elif name == "codeshare":
+                    arrays.append(pa.array(values))
+                else:
+                    arrays.append(pa.array(values, mask=block[name + "_null"], type=pa.int32()))
+            batches.append(pa.RecordBatch.from_arrays(arrays, names=list(AirlineRoutes.ROUTE_COLUMNS)))
+
+        schema = ParsedCache.schema(AirlineRoutes.ROUTE_COLUMNS, AirlineRoutes.ARROW_TYPES)
+        return pa.Table.from_batches(batches, schema=schema)
@@ -0,0 +1,238 @@
+from methods.database import Database
+from methods.geo import Geo
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class SpatialIndex:
+    """
+    Uniform grid over airports on the unit sphere.
+
+    Each airport becomes a 3-D unit vector and is bucketed into a cube cell of
+    side `cell_km` (as chord length). Points are sorted by cell key with a CSR
+    offset array, so a radius query only scans the few cells its chord-length
+    ball overlaps, then tests the exact chord length (equivalent to the
+    great-circle distance). Works across the poles and the antimeridian
+    without special cases.
+    """
+
+    def __init__(self, airports: pd.DataFrame, cell_km: float = 200.0):
+        airports = airports.dropna(subset=["latitude", "longitude"]).sort_values("airport_id")
+
+        self.airport_ids = airports["airport_id"].to_numpy(dtype=np.int64)
+        self.names = airports["name"].to_numpy(dtype=object)
+        self.iata = airports["iata"].to_numpy(dtype=object)
+        self.country = airports["country"].to_numpy(dtype=object) if "country" in airports else np.full(len(airports), None)
+        self.lat = airports["latitude"].to_numpy(dtype=np.float64)
+        self.lon = airports["longitude"].to_numpy(dtype=np.float64)
+        total = airports["total_in_out"] if "total_in_out" in airports else pd.Series(0, index=airports.index)
+        self.total = pd.to_numeric(total).fillna(0).to_numpy(dtype=np.int64)
+
+        self.cell = SpatialIndex.chord(cell_km)
+        self.cells_per_axis = int(np.ceil(2.0 / self.cell)) + 1
+        self.xyz = SpatialIndex.to_xyz(self.lat, self.lon)
+
+        keys = self.cell_keys(self.xyz)
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_ids, starts = np.unique(keys[self.order], return_index=True)
+        self.cell_ptr = np.append(starts, len(keys))
+
+    @staticmethod
+    def from_frame(airports: pd.DataFrame, cell_km: float = 200.0) -> "SpatialIndex":
+        return SpatialIndex(airports, cell_km)
+
+    @staticmethod
+    def from_db(db_parameters: dict, cell_km: float = 200.0) -> "SpatialIndex":
+        """Build from the airports table loaded by Airports.load_airports_to_db."""
+        conn = Database.get_connection(db_parameters)
+        try:
+            with conn.cursor() as cur:
+                total_col = ", total_in_out" if Database.column_exists(cur, "airports", "total_in_out") else ""
+            airports = Database.read_sql_frame(
+                conn, f"SELECT airport_id, name, iata, country, latitude, longitude{total_col} FROM airports;"
+            )
+        finally:
+            conn.close()
+        return SpatialIndex(airports, cell_km)
+
+    @staticmethod
+    def chord(km) -> np.ndarray:
+        """Great-circle distance (km) -> straight-line distance on the unit sphere."""
+        return 2.0 * np.sin(np.minimum(np.asarray(km, dtype=np.float64) / Geo.EARTH_RADIUS_KM, np.pi) / 2.0)
+
+    @staticmethod
+    def to_xyz(lat, lon) -> np.ndarray:
+        lat, lon = np.radians(lat), np.radians(lon)
+        cos_lat = np.cos(lat)
+        return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+    def cell_keys(self, xyz: np.ndarray) -> np.ndarray:
+        ijk = np.floor((xyz + 1.0) / self.cell).astype(np.int64)
+        n = self.cells_per_axis
+        return (ijk[..., 0] * n + ijk[..., 1]) * n + ijk[..., 2]
+
+    def candidates(self, point, chord: float) -> np.ndarray:
+        """Positions of every airport in a cell overlapping the ball (point, chord)."""
+        last = self.cells_per_axis - 1
+        spans = [
+            range(max(int(math.floor((c - chord + 1.0) / self.cell)), 0), min(int(math.floor((c + chord + 1.0) / self.cell)), last) + 1)
+            for c in point
+        ]
+        if len(spans[0]) * len(spans[1]) * len(spans[2]) > len(self.cell_ids):
+            return self.order  # ball covers most of the grid: scan everything
+
+        n = self.cells_per_axis
+        keys = np.array([(i * n + j) * n + k for i in spans[0] for j in spans[1] for k in spans[2]], dtype=np.int64)
+        pos = np.searchsorted(self.cell_ids, keys)
+        pos = pos[(pos < len(self.cell_ids)) & (self.cell_ids[np.minimum(pos, len(self.cell_ids) - 1)] == keys)]
+        if len(pos) == 1:
+            return self.order[self.cell_ptr[pos[0]]:self.cell_ptr[pos[0] + 1]]
+        return np.concatenate([self.order[self.cell_ptr[p]:self.cell_ptr[p + 1]] for p in pos] or [np.empty(0, dtype=np.int64)])
+
+    def radius_positions(self, lat: float, lon: float, km: float):
+        """(positions, distances_km) of airports within km of (lat, lon), nearest first."""
+        lat_r, lon_r = math.radians(lat), math.radians(lon)
+        point = (math.cos(lat_r) * math.cos(lon_r), math.cos(lat_r) * math.sin(lon_r), math.sin(lat_r))
+        chord = float(SpatialIndex.chord(km))
+
+        cand = self.candidates(point, chord)
+        # Exact test on chord length, then chord -> great-circle km for the survivors
+        chords = np.sqrt(((self.xyz[cand] - point) ** 2).sum(axis=1))
+        keep = chords <= chord
+        cand = cand[keep]
+        dist = 2.0 * Geo.EARTH_RADIUS_KM * np.arcsin(np.minimum(chords[keep] / 2.0, 1.0))
+        order = np.argsort(dist, kind="stable")
+        return cand[order], dist[order]
+
+    def brute_force_radius(self, lat: float, lon: float, km: float):
+        """Same answer as radius_positions from a full scan (benchmark/verification baseline)."""
+        dist = Geo.haversine_km(lat, lon, self.lat, self.lon)
+        cand = np.flatnonzero(dist <= km)
+        order = np.argsort(dist[cand], kind="stable")
+        return cand[order], dist[cand][order]
+
+    def frame(self, positions: np.ndarray, distances: np.ndarray = None) -> pd.DataFrame:
+        df = pd.DataFrame({
+            "airport_id": self.airport_ids[positions],
+            "iata": self.iata[positions],
+            "name": self.names[positions],
+            "country": self.country[positions],
+            "latitude": self.lat[positions],
+            "longitude": self.lon[positions],
+            "total_in_out": self.total[positions],
+        })
+        if distances is not None:
+            df["distance_km"] = distances
+        return df
+
+    def position(self, airport_id: int) -> int:
+        pos = np.searchsorted(self.airport_ids, airport_id)
+        if pos >= len(self.airport_ids) or self.airport_ids[pos] != airport_id:
+            raise KeyError(f"Airport {airport_id} has no coordinates in the index.")
+        return int(pos)
+
+    def radius(self, lat: float, lon: float, km: float) -> pd.DataFrame:
+        """All airports within km of (lat, lon), nearest first."""
+        return self.frame(*self.radius_positions(lat, lon, km))
+
+    def around_airport(self, airport_id: int, km: float) -> pd.DataFrame:
+        """Airports within km of an airport (the airport itself excluded)."""
+        pos = self.position(airport_id)
+        positions, dist = self.radius_positions(self.lat[pos], self.lon[pos], km)
+        keep = positions != pos
+        return self.frame(positions[keep], dist[keep])
+
+    def nearest_positions(self, lat: float, lon: float, k: int = 1, exclude: int = None):
+        """k nearest by expanding the search radius until k airports fall inside it."""
+        wanted = min(k + (exclude is not None), len(self.airport_ids))
+        km = Geo.EARTH_RADIUS_KM * self.cell  # about one cell
+        while True:
+            positions, dist = self.radius_positions(lat, lon, km)
+            if len(positions) >= wanted or km >= np.pi * Geo.EARTH_RADIUS_KM:
+                break
+            km *= 2.0
+        if exclude is not None:
+            keep = positions != exclude
+            positions, dist = positions[keep], dist[keep]
+        return positions[:k], dist[:k]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> pd.DataFrame:
+        return self.frame(*self.nearest_positions(lat, lon, k))
+
+    def nearest_alternates(self, airport_id: int, k: int = 3) -> pd.DataFrame:
+        """The k airports closest to airport_id ("nearest alternate")."""
+        pos = self.position(airport_id)
+        return self.frame(*self.nearest_positions(self.lat[pos], self.lon[pos], k, exclude=pos))
+
+    @staticmethod
+    def box_xyz_bounds(min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        """(lo, hi) corners of an x/y/z box containing every point of a lat/lon box."""
+        if max_lon < min_lon:
+            max_lon += 360.0  # crosses the antimeridian
+
+        def spans(degrees):
+            return (degrees - min_lon) % 360.0 <= max_lon - min_lon
+
+        lat = np.radians(np.clip([min_lat, max_lat], -90.0, 90.0))
+        lon = np.radians([min_lon, max_lon])
+        cos_lat = [np.cos(lat).min(), 1.0 if lat[0] <= 0.0 <= lat[1] else np.cos(lat).max()]
+        # cos/sin(lon) reach their extremes at the box edges or at 0/90/180/-90 inside it
+        cos_lon = [-1.0 if spans(180.0) else np.cos(lon).min(), 1.0 if spans(0.0) else np.cos(lon).max()]
+        sin_lon = [-1.0 if spans(-90.0) else np.sin(lon).min(), 1.0 if spans(90.0) else np.sin(lon).max()]
+
+        x = [a * b for a in cos_lat for b in cos_lon]
+        y = [a * b for a in cos_lat for b in sin_lon]
+        z = np.sin(lat)
+        return np.array([min(x), min(y), z[0]]), np.array([max(x), max(y), z[1]])
+
+    def box_candidates(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Positions of every airport in a non-empty cell overlapping the x/y/z box [lo, hi]."""
+        n = self.cells_per_axis
+        first = np.floor((lo - 1e-9 + 1.0) / self.cell).astype(np.int64)
+        last = np.floor((hi + 1e-9 + 1.0) / self.cell).astype(np.int64)
+        ijk = np.column_stack([self.cell_ids // (n * n), (self.cell_ids // n) % n, self.cell_ids % n])
+        cells = np.flatnonzero(((ijk >= first) & (ijk <= last)).all(axis=1))
+        if len(cells) == len(self.cell_ids):
+            return self.order
+        return np.concatenate([self.order[self.cell_ptr[c]:self.cell_ptr[c + 1]] for c in cells] or [np.empty(0, dtype=np.int64)])
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> pd.DataFrame:
+        """Airports inside a lat/lon box; min_lon > max_lon means the box crosses the antimeridian."""
+        cand = np.sort(self.box_candidates(*SpatialIndex.box_xyz_bounds(min_lat, min_lon, max_lat, max_lon)))
+        lat, lon = self.lat[cand], self.lon[cand]
+        in_lat = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            in_lon = (lon >= min_lon) & (lon <= max_lon)
+        else:
+            in_lon = (lon >= min_lon) | (lon <= max_lon)
+        return self.frame(cand[in_lat & in_lon])
+
+    def catchment(self, airport_ids, km: float = 300.0) -> pd.DataFrame:
+        """
+        Per hub: airports within km (hub included) and the summed total_in_out
+        of that catchment, next to the hub's own total.
+        """
+        rows = []
+        for airport_id in airport_ids:
+            pos = self.position(airport_id)
+            positions, _ = self.radius_positions(self.lat[pos], self.lon[pos], km)
+            rows.append((
+                int(airport_id),
+                self.iata[pos],
+                self.names[pos],
+                int(self.total[pos]),
+                len(positions),
+                int(self.total[positions].sum()),
+            ))
+
+        return pd.DataFrame(rows, columns=[
+            "airport_id",
+            "iata",
+            "name",
+            "total_in_out",
+            "airports_in_catchment",
+            "catchment_total_in_out",
+        ])
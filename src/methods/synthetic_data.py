@@ -0,0 +1,216 @@
+import csv
+import json
+import os
+import shutil
+import string
+import time
+
+import numpy as np
+
+
+class SyntheticData:
+    """
+    Seeded OpenFlights-format input files at a multiple of the bundled data.
+
+    airports.dat.txt, airlines.dat.txt and routes.dat.txt are generated in the
+    exact layout the load_*_to_db methods parse; planes.dat.txt and
+    countries.dat.txt are copied from the bundled input so aircraft, route
+    equipment and the Asia flags resolve as usual.
+
+    Airports copy country, time zone and (jittered) coordinates from a random
+    bundled airport, so the regional mix matches the real data. Route traffic
+    is skewed: only a share of airports and airlines have routes, and endpoint
+    and airline choices follow Zipf-like weights (weight ~ rank ** -skew), so a
+    few hubs and carriers dominate as in the real network.
+    """
+
+    # Bundled input sizes the scale factor multiplies
+    BASE_AIRPORTS = 7698
+    BASE_AIRLINES = 6162
+    BASE_ROUTES = 67663
+
+    ACTIVE_AIRPORT_SHARE = 0.45
+    ACTIVE_AIRLINE_SHARE = 0.10
+    HUB_SKEW = 0.6
+    AIRLINE_SKEW = 1.0
+    CODESHARE_SHARE = 0.15
+
+    CHUNK_ROWS = 500000
+    FILES = ("airports.dat.txt", "airlines.dat.txt", "routes.dat.txt", "planes.dat.txt", "countries.dat.txt")
+
+    @staticmethod
+    def codes(n: int, alphabet: str, length: int, fallback_prefix: str) -> list:
+        """
+        n distinct codes: every fixed-length code over alphabet first, then
+        fallback_prefix + base-36 serials once those run out.
+        """
+        capacity = len(alphabet) ** length
+        idx = np.arange(min(n, capacity))
+        chars = np.array(list(alphabet))
+        digits = [chars[(idx // len(alphabet) ** p) % len(alphabet)] for p in reversed(range(length))]
+        out = [''.join(t) for t in zip(*digits)] if length > 1 else list(digits[0])
+
+        base36 = string.digits + string.ascii_uppercase
+        for i in range(capacity, n):
+            serial, v = "", i
+            while True:
+                v, r = divmod(v, 36)
+                serial = base36[r] + serial
+                if not v:
+                    break
+            out.append(fallback_prefix + serial)
+        return out
+
+    @staticmethod
+    def skewed_weights(rng, n: int, active_share: float, skew: float) -> np.ndarray:
+        """Probabilities over n items: a random active subset ranked with weight rank ** -skew."""
+        active = max(1, int(round(n * active_share)))
+        weights = np.zeros(n)
+        weights[rng.permutation(n)[:active]] = np.arange(1, active + 1, dtype=np.float64) ** -skew
+        return weights / weights.sum()
+
+    @staticmethod
+    def read_templates(input_dir: str):
+        """(country, lat, lon, utc offset, dst, tz database) columns of the bundled airports."""
+        rows = []
+        with open(os.path.join(input_dir, "airports.dat.txt"), encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) != 14 or row[6] in ("", r"\N") or row[7] in ("", r"\N"):
+                    continue
+                rows.append((row[3], float(row[6]), float(row[7]), row[9], row[10], row[11]))
+        return rows
+
+    @staticmethod
+    def plane_codes(input_dir: str) -> list:
+        with open(os.path.join(input_dir, "planes.dat.txt"), encoding="utf-8", newline="") as f:
+            return [row[1].strip() for row in csv.reader(f, skipinitialspace=True)
+                    if len(row) > 1 and row[1].strip() not in ("", r"\N")]
+
+    @staticmethod
+    def quoted(value) -> str:
+        return r"\N" if value is None else '"' + str(value).replace('"', '""') + '"'
+
+    @staticmethod
+    def write_airports(path: str, rng, n: int, templates: list):
+        iata = SyntheticData.codes(min(n, 26 ** 3), string.ascii_uppercase, 3, "")
+        icao = SyntheticData.codes(n, string.ascii_uppercase, 4, "Z")
+        q = SyntheticData.quoted
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for start in range(0, n, SyntheticData.CHUNK_ROWS):
+                stop = min(start + SyntheticData.CHUNK_ROWS, n)
+                size = stop - start
+                pick = rng.integers(0, len(templates), size)
+                lat = np.clip([templates[t][1] for t in pick] + rng.normal(0, 0.3, size), -89.9, 89.9)
+                lon = (np.array([templates[t][2] for t in pick]) + rng.normal(0, 0.3, size) + 180.0) % 360.0 - 180.0
+                altitude = rng.integers(0, 8000, size)
+
+                lines = []
+                for i, t, la, lo, alt in zip(range(start, stop), pick.tolist(), lat.tolist(), lon.tolist(), altitude.tolist()):
+                    country, _, _, offset, dst, tz = templates[t]
+                    airport_id = i + 1
+                    iata_field = q(iata[i]) if i < len(iata) else q(None)
+                    lines.append(
+                        f'{airport_id},{q(f"Synthetic Airport {airport_id}")},{q(f"City {airport_id}")},{q(country)},'
+                        f'{iata_field},{q(icao[i])},{la:.6f},{lo:.6f},{alt},'
+                        f'{offset},{q(dst)},{q(tz)},"airport","Synthetic"'
+                    )
+                f.write("\n".join(lines) + "\n")
+        return iata, icao
+
+    @staticmethod
+    def write_airlines(path: str, rng, n: int, countries: list):
+        iata = SyntheticData.codes(min(n, 36 ** 2), string.ascii_uppercase + string.digits, 2, "")
+        icao = SyntheticData.codes(n, string.ascii_uppercase, 3, "Y")
+        active = rng.random(n) < 0.8
+        country = rng.integers(0, len(countries), n)
+        q = SyntheticData.quoted
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            lines = []
+            for i in range(n):
+                airline_id = i + 1
+                code = q(iata[i]) if i < len(iata) else '""'
+                lines.append(
+                    f'{airline_id},{q(f"Synthetic Airline {airline_id}")},\\N,{code},{q(icao[i])},'
+                    f'{q(f"SYNTH{airline_id}")},{q(countries[country[i]])},{"Y" if active[i] else "N"}'
+                )
+                if len(lines) >= SyntheticData.CHUNK_ROWS:
+                    f.write("\n".join(lines) + "\n")
+                    lines = []
+            if lines:
+                f.write("\n".join(lines) + "\n")
+        # Routes carry the IATA code where there is one, else the ICAO code (as in routes.dat)
+        return [iata[i] if i < len(iata) else icao[i] for i in range(n)]
+
+    @staticmethod
+    def write_routes(path: str, rng, n: int, airport_codes: list, airline_codes: list, planes: list):
+        airport_p = SyntheticData.skewed_weights(rng, len(airport_codes), SyntheticData.ACTIVE_AIRPORT_SHARE, SyntheticData.HUB_SKEW)
+        airline_p = SyntheticData.skewed_weights(rng, len(airline_codes), SyntheticData.ACTIVE_AIRLINE_SHARE, SyntheticData.AIRLINE_SKEW)
+        n_airports = len(airport_codes)
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for start in range(0, n, SyntheticData.CHUNK_ROWS):
+                size = min(SyntheticData.CHUNK_ROWS, n - start)
+                airline = rng.choice(len(airline_codes), size, p=airline_p)
+                source = rng.choice(n_airports, size, p=airport_p)
+                dest = rng.choice(n_airports, size, p=airport_p)
+                same = source == dest
+                dest[same] = (dest[same] + 1 + rng.integers(0, n_airports - 1, same.sum())) % n_airports
+                codeshare = rng.random(size) < SyntheticData.CODESHARE_SHARE
+                n_planes = rng.integers(1, 4, size)
+                plane = rng.integers(0, len(planes), (size, 3))
+
+                lines = []
+                for a, s, d, c, k, p in zip(airline.tolist(), source.tolist(), dest.tolist(),
+                                            codeshare.tolist(), n_planes.tolist(), plane.tolist()):
+                    lines.append(
+                        f"{airline_codes[a]},{a + 1},{airport_codes[s]},{s + 1},{airport_codes[d]},{d + 1},"
+                        f"{'Y' if c else ''},0,{' '.join(planes[x] for x in p[:k])}"
+                    )
+                f.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def generate(scale: int, output_dir: str = "benchmark data", seed: int = 0, input_dir: str = "input data") -> str:
+        """
+        Write a scale-x data set to output_dir/scale_{scale}_seed_{seed} (reused
+        when its manifest matches) and return that directory.
+        """
+        target = os.path.join(output_dir, f"scale_{scale}_seed_{seed}")
+        manifest_path = os.path.join(target, "manifest.json")
+        counts = {
+            "airports": SyntheticData.BASE_AIRPORTS * scale,
+            "airlines": SyntheticData.BASE_AIRLINES * scale,
+            "routes": SyntheticData.BASE_ROUTES * scale,
+        }
+        manifest = {"scale": scale, "seed": seed, **counts}
+
+        if os.path.exists(manifest_path) and all(os.path.exists(os.path.join(target, n)) for n in SyntheticData.FILES):
+            with open(manifest_path, encoding="utf-8") as f:
+                if json.load(f) == manifest:
+                    return target
+
+        started = time.perf_counter()
+        os.makedirs(target, exist_ok=True)
+        rng = np.random.default_rng([seed, scale])
+
+        templates = SyntheticData.read_templates(input_dir)
+        countries = sorted({t[0] for t in templates})
+        planes = SyntheticData.plane_codes(input_dir)
+
+        iata, icao = SyntheticData.write_airports(os.path.join(target, "airports.dat.txt"), rng, counts["airports"], templates)
+        airport_codes = [iata[i] if i < len(iata) else icao[i] for i in range(counts["airports"])]
+        airline_codes = SyntheticData.write_airlines(os.path.join(target, "airlines.dat.txt"), rng, counts["airlines"], countries)
+        SyntheticData.write_routes(os.path.join(target, "routes.dat.txt"), rng, counts["routes"], airport_codes, airline_codes, planes)
+
+        for name in ("planes.dat.txt", "countries.dat.txt"):
+            shutil.copyfile(os.path.join(input_dir, name), os.path.join(target, name))
+
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        print(
+            f"Synthetic data x{scale}: {counts['airports']} airports, {counts['airlines']} airlines, "
+            f"{counts['routes']} routes in {time.perf_counter() - started:.1f}s -> {target}"
+        )
+        return target
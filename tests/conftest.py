@@ -0,0 +1,184 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pandas
+import psycopg2
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INPUT_DIR = os.path.join(ROOT, "input data")
+
+# Metrics are logged to a path read at import time; keep them out of the repo
+SCRATCH = tempfile.mkdtemp(prefix="bca-tests-")
+os.environ.setdefault("METRICS_LOG", os.path.join(SCRATCH, "metrics.jsonl"))
+
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from methods.aircraft import Aircraft  # noqa: E402
+from methods.airline_routes import AirlineRoutes  # noqa: E402
+from methods.airlines import Airlines  # noqa: E402
+from methods.airports import Airports  # noqa: E402
+from methods.database import Database  # noqa: E402
+from methods.embedded import Embedded  # noqa: E402
+
+ROUTES_PATH = os.path.join(INPUT_DIR, "routes.dat.txt")
+COUNTRIES_PATH = os.path.join(INPUT_DIR, "countries.dat.txt")
+
+# Small routes.dat variants for the parser edge cases (written as bytes, so line endings are exact)
+EDGE_CASES = {
+    "crlf": b"2B,410,AER,2965,KZN,2990,,0,CR2\r\n2B,410,ASF,2966,KZN,2990,Y,0,CR2 737\r\n",
+    "null_markers": b"3H,\\N,AKV,5506,YIK,5504,,0,DH8\n2G,1654,IKT,2937,KCK,\\N,,0,AN4\nZZ,1,,\\N,BBB,2,,\\N,\n",
+    "quoted_fields": b'"AA",1,"BBB",2,CCC,3,Y,0,"320"\nAB,2,"C,D",3,EEE,4,,0,"738 320"\n',
+    "blank_lines": b"2B,410,AER,2965,KZN,2990,,0,CR2\n\n\n2B,410,ASF,2966,KZN,2990,,0,CR2\n",
+    "no_trailing_newline": b"2B,410,AER,2965,KZN,2990,,0,CR2\n2B,410,ASF,2966,KZN,2990,,0,CR2",
+    "whitespace": b" 2B , 410 ,AER,2965,KZN,2990, ,0, CR2 \n",
+    "short_row": b"2B,410,AER,2965,KZN,2990,,0,CR2\nAA,1,BBB\n2B,410,ASF,2966,KZN,2990,,0,CR2\n",
+    "bad_int": b"2B,410,AER,2965,KZN,2990,,0,CR2\n2B,x1,ASF,2966,KZN,2990,,0,CR2\n",
+    "int_out_of_range": b"2B,410,AER,2965,KZN,2990,,0,CR2\nAA,12345678901,BBB,2,CCC,3,,0,320\n",
+}
+
+
+@pytest.fixture(params=sorted(EDGE_CASES))
+def edge_case_path(request, tmp_path):
+    path = tmp_path / f"{request.param}.dat"
+    path.write_bytes(EDGE_CASES[request.param])
+    return str(path)
+
+
+def parse_outcome(parse):
+    """(rows, None) or (rows before the error, (type, message)) for a parse callable."""
+    rows = []
+    try:
+        for row in parse():
+            rows.append(tuple(row))
+    except (ValueError, UnicodeDecodeError) as e:
+        return rows, (type(e).__name__, str(e))
+    return rows, None
+
+
+def postgres_server():
+    """Connection keywords for the server in the libpq PG* variables, or skip when PGHOST is unset or unreachable."""
+    if not os.environ.get("PGHOST"):
+        pytest.skip("PGHOST is not set; Postgres tests need a server they can create databases on.")
+    kwargs = {
+        "host": os.environ["PGHOST"],
+        "port": int(os.environ.get("PGPORT", 5432)),
+        "user": os.environ.get("PGUSER", "postgres"),
+        "password": os.environ.get("PGPASSWORD", ""),
+    }
+    try:
+        psycopg2.connect(dbname="postgres", **kwargs).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres at {kwargs['host']} is unreachable: {e}")
+    return kwargs
+
+
+def create_postgres_database(server: dict) -> dict:
+    """A new empty database on the server, as db_parameters."""
+    name = f"bca_test_{uuid.uuid4().hex[:12]}"
+    conn = psycopg2.connect(dbname="postgres", **server)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE DATABASE {name};")
+    conn.close()
+    return {
+        "database_username": server["user"],
+        "database_password": server["password"],
+        "database_host": server["host"],
+        "database_port": server["port"],
+        "database_name": name,
+    }
+
+
+def drop_postgres_database(server: dict, db_parameters: dict):
+    conn = psycopg2.connect(dbname="postgres", **server)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {db_parameters['database_name']} WITH (FORCE);")
+    conn.close()
+
+
+@pytest.fixture
+def new_postgres_database():
+    """Factory for empty Postgres databases, all dropped after the test."""
+    server = postgres_server()
+    created = []
+
+    def create():
+        created.append(create_postgres_database(server))
+        return created[-1]
+
+    yield create
+    Database.close_pools()
+    for parameters in created:
+        drop_postgres_database(server, parameters)
+
+
+@pytest.fixture
+def postgres_parameters(new_postgres_database):
+    return new_postgres_database()
+
+
+@pytest.fixture
+def duckdb_parameters(tmp_path):
+    yield {"backend": "duckdb", "database_path": str(tmp_path / "routes.duckdb")}
+    Database.close_pools()
+    Embedded.close_databases()
+
+
+@pytest.fixture(params=["postgres", "duckdb"])
+def db_parameters(request):
+    """An empty database on each backend."""
+    return request.getfixturevalue(f"{request.param}_parameters")
+
+
+def load_input_data(db_parameters: dict):
+    """Load and transform the bundled input data like main.py."""
+    Airlines.load_airlines_to_db(os.path.join(INPUT_DIR, "airlines.dat.txt"), db_parameters)
+    Airports.load_airports_to_db(os.path.join(INPUT_DIR, "airports.dat.txt"), db_parameters)
+    Aircraft.load_aircraft_to_db(os.path.join(INPUT_DIR, "planes.dat.txt"), db_parameters)
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, db_parameters)
+    AirlineRoutes.map_asia_flags(db_parameters, COUNTRIES_PATH)
+    Airports.add_columns(db_parameters)
+    Airports.calculate_flights_per_airport(db_parameters)
+
+
+@pytest.fixture(scope="session", params=["postgres", "duckdb"])
+def loaded_db(request, tmp_path_factory):
+    """Database with the bundled input data loaded on each backend, shared by the read-only report tests."""
+    if request.param == "duckdb":
+        parameters = {"backend": "duckdb", "database_path": str(tmp_path_factory.mktemp("loaded") / "routes.duckdb")}
+        load_input_data(parameters)
+        yield parameters
+        Database.close_pools()
+        Embedded.close_databases()
+        return
+
+    server = postgres_server()
+    parameters = create_postgres_database(server)
+    load_input_data(parameters)
+    yield parameters
+    Database.close_pools()
+    drop_postgres_database(server, parameters)
+
+
+@pytest.fixture(scope="session")
+def loaded_graph(loaded_db):
+    from methods.route_graph import RouteGraph
+    return RouteGraph.from_db(loaded_db)
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """Run in tmp_path, where the reports' fixed "output data/..." paths can be written."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output data")
+    return tmp_path / "output data"
+
+
+def excel_rows(excel_path):
+    """Header and rows of an exported report, NaN as None."""
+    df = pandas.read_excel(excel_path)
+    return [tuple(df.columns)] + list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
@@ -0,0 +1,39 @@
+from conftest import COUNTRIES_PATH, ROUTES_PATH, load_input_data
+from test_embedded import reports, table_rows
+from test_incremental_load import write_changed_snapshot
+
+from methods.airline_routes import AirlineRoutes
+from methods.airports import Airports
+
+ROUTES_SQL = f"""
+    SELECT route_id, {', '.join(AirlineRoutes.ROUTE_COLUMNS)}, source_in_asia, dest_in_asia
+    FROM {{}};
+"""
+EQUIPMENT_SQL = "SELECT route_id, aircraft_id FROM route_equipment;"
+AIRPORTS_SQL = "SELECT airport_id, inbound_count, outbound_count, total_in_out FROM airports;"
+
+
+def test_code_ids_match_plain_schema_after_incremental_reload(new_postgres_database, output_dir):
+    plain, coded = new_postgres_database(), new_postgres_database()
+    changed = write_changed_snapshot(output_dir / "routes_changed.dat")
+    for parameters in (plain, coded):
+        load_input_data(parameters)
+        if parameters is coded:
+            AirlineRoutes.migrate_to_code_ids(coded)
+        AirlineRoutes.load_routes_incremental(changed, parameters, countries_path=COUNTRIES_PATH)
+
+    routes = table_rows(plain, ROUTES_SQL.format("airline_routes"))
+    assert len(routes) > 60000
+    assert table_rows(coded, ROUTES_SQL.format("airline_routes_decoded")) == routes
+    # The text columns are gone from the table itself
+    assert table_rows(coded, """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'airline_routes'
+          AND column_name IN ('airline_code', 'source_airport_code', 'dest_airport_code', 'equipment');
+    """) == []
+
+    assert table_rows(coded, EQUIPMENT_SQL) == table_rows(plain, EQUIPMENT_SQL)
+    assert table_rows(coded, AIRPORTS_SQL) == table_rows(plain, AIRPORTS_SQL)
+    assert Airports.verify_flight_counts(coded) == 0
+
+    assert reports(coded, output_dir) == reports(plain, output_dir)
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+from conftest import COUNTRIES_PATH, INPUT_DIR, ROUTES_PATH
+
+from methods.airline_routes import AirlineRoutes
+from methods.airports import Airports
+from methods.database import Database
+
+
+@pytest.fixture
+def triggered(postgres_parameters):
+    """Airports and routes loaded, counters and airport_airline_usage kept by the triggers."""
+    Airports.load_airports_to_db(os.path.join(INPUT_DIR, "airports.dat.txt"), postgres_parameters)
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, postgres_parameters, use_copy=True)
+    Airports.enable_counter_triggers(postgres_parameters)
+    return postgres_parameters
+
+
+def execute(db_parameters, sql, vars=None):
+    with Database.connection(db_parameters) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, vars)
+            result = cur.fetchall() if cur.description else cur.rowcount
+        conn.commit()
+    return result
+
+
+def usage_drift(db_parameters) -> int:
+    """airport_airline_usage rows a full recount would change (the recount is rolled back)."""
+    with Database.connection(db_parameters) as conn:
+        with conn.cursor() as cur:
+            drift = Airports.refresh_airline_usage(cur)
+        conn.rollback()
+    return drift
+
+
+def assert_consistent(db_parameters):
+    assert Airports.verify_flight_counts(db_parameters) == 0
+    assert usage_drift(db_parameters) == 0
+
+
+def update_trigger_calls(db_parameters, sql) -> int:
+    """Times the row-level UPDATE counter trigger ran for sql (0 when it was skipped)."""
+    plan = execute(db_parameters, f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")[0][0][0]
+    return sum(t["Calls"] for t in plan.get("Triggers", []) if t["Trigger Name"] == "airline_routes_airport_counters_update")
+
+
+def total(db_parameters, airport_id) -> int:
+    return execute(db_parameters, "SELECT total_in_out FROM airports WHERE airport_id = %s;", (airport_id,))[0][0]
+
+
+def test_enabled_triggers_start_consistent(triggered):
+    assert execute(triggered, "SELECT COUNT(*) FROM airport_airline_usage;")[0][0] > 10000
+    assert_consistent(triggered)
+
+
+def test_insert(triggered):
+    before = total(triggered, 3364)
+    execute(triggered, """
+        INSERT INTO airline_routes (airline_code, airline_id, source_airport_code, source_airport_id,
+                                    dest_airport_code, dest_airport_id, codeshare, stops, equipment)
+        VALUES ('ZZ', 99999, 'PEK', 3364, 'HND', 2359, FALSE, 0, '320'),
+               ('ZZ', 99999, 'HND', 2359, 'PEK', 3364, FALSE, 0, '320');
+    """)
+    assert total(triggered, 3364) == before + 2
+    assert execute(triggered, "SELECT route_records FROM airport_airline_usage WHERE airport_id = 3364 AND airline_id = 99999;") == [(2,)]
+    assert_consistent(triggered)
+
+
+def test_delete(triggered):
+    assert execute(triggered, "DELETE FROM airline_routes WHERE source_airport_id = 3364;") > 0
+    assert execute(triggered, "SELECT outbound_count FROM airports WHERE airport_id = 3364;") == [(0,)]
+    assert_consistent(triggered)
+
+
+def test_key_update(triggered):
+    changed = update_trigger_calls(triggered, "UPDATE airline_routes SET dest_airport_id = 3364 WHERE route_id % 100 = 0;")
+    assert changed > 0
+    assert update_trigger_calls(triggered, "UPDATE airline_routes SET airline_id = 99999 WHERE route_id % 97 = 0;") > 0
+    assert_consistent(triggered)
+
+
+def test_non_key_updates_skip_the_trigger(triggered):
+    before = execute(triggered, "SELECT airport_id, outbound_count, inbound_count, total_in_out FROM airports ORDER BY airport_id;")
+
+    assert update_trigger_calls(triggered, "UPDATE airline_routes SET stops = stops + 1;") == 0
+    # Key columns assigned their own values don't pass the WHEN either
+    assert update_trigger_calls(triggered, "UPDATE airline_routes SET source_airport_id = source_airport_id;") == 0
+    AirlineRoutes.map_asia_flags(triggered, COUNTRIES_PATH)
+
+    assert execute(triggered, "SELECT airport_id, outbound_count, inbound_count, total_in_out FROM airports ORDER BY airport_id;") == before
+    assert_consistent(triggered)
+
+
+def test_truncate(triggered):
+    execute(triggered, "TRUNCATE airline_routes;")
+    assert execute(triggered, "SELECT COUNT(*) FROM airports WHERE total_in_out <> 0;") == [(0,)]
+    assert execute(triggered, "SELECT COUNT(*) FROM airport_airline_usage;") == [(0,)]
+    assert_consistent(triggered)
+
+
+def test_airports_inserted_after_their_routes_are_seeded(triggered):
+    execute(triggered, "DELETE FROM airports WHERE airport_id = 3364;")
+    Airports.load_airports_to_db(os.path.join(INPUT_DIR, "airports.dat.txt"), triggered)
+    assert total(triggered, 3364) > 0
+    assert_consistent(triggered)
+
+
+def test_verify_flight_counts_finds_and_fixes_drift(triggered):
+    execute(triggered, "UPDATE airports SET outbound_count = outbound_count + 5 WHERE airport_id IN (3364, 2359);")
+    assert Airports.verify_flight_counts(triggered) == 2
+    assert Airports.verify_flight_counts(triggered, fix=True) == 2
+    assert Airports.verify_flight_counts(triggered) == 0
+
+
+def test_disabled_triggers_fall_back_to_recounts(triggered):
+    Airports.disable_counter_triggers(triggered)
+    execute(triggered, "DELETE FROM airline_routes WHERE source_airport_id = 3364;")
+    assert Airports.verify_flight_counts(triggered) > 0
+    Airports.calculate_flights_per_airport(triggered)
+    assert_consistent(triggered)
@@ -0,0 +1,21 @@
+from conftest import excel_rows
+
+from methods.coverage import Coverage
+from methods.report import Report
+
+
+def test_unique_airport_counts_match_sql(loaded_db, loaded_graph, output_dir):
+    excel_path = output_dir / "airlines_unique_airports_report.xlsx"
+    Report.get_airlines_unique_airport_counts(loaded_db)
+    expected = excel_rows(excel_path)
+    excel_path.unlink()
+    Report.get_airlines_unique_airport_counts(loaded_db, graph=loaded_graph)
+
+    assert len(expected) > 500
+    assert excel_rows(excel_path) == expected
+
+
+def test_coverage_matches_graph_counts(loaded_graph):
+    coverage = Coverage.from_graph(loaded_graph)
+    counts = loaded_graph.airlines_unique_airport_counts()
+    assert [coverage.unique_count(a) for a in counts["airline_id"]] == counts["unique_airports_touched"].tolist()
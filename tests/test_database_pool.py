@@ -0,0 +1,91 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2.pool import PoolError
+
+from methods.database import Database
+
+
+def backend_pid(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_backend_pid();")
+        return cur.fetchone()[0]
+
+
+def test_connections_are_reused(postgres_parameters):
+    with Database.connection(postgres_parameters) as conn:
+        first = backend_pid(conn)
+    with Database.connection(postgres_parameters) as conn:
+        assert backend_pid(conn) == first
+
+    stats = Database.pool_stats(postgres_parameters)
+    assert (stats["checkouts"], stats["peak_in_use"], stats["in_use"]) == (2, 1, 0)
+
+
+def test_release_rolls_back_open_transactions(postgres_parameters):
+    with Database.connection(postgres_parameters) as conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TABLE pool_probe (x INTEGER);")
+        conn.commit()
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO pool_probe VALUES (1);")
+
+    with Database.connection(postgres_parameters) as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM pool_probe;")
+            assert cur.fetchone()[0] == 0
+        conn.rollback()
+        conn.autocommit = True
+
+    with Database.connection(postgres_parameters) as conn:
+        assert not conn.autocommit
+
+
+def test_callers_wait_for_a_free_connection(postgres_parameters):
+    parameters = dict(postgres_parameters, pool_max_size=2)
+    held = [Database.get_connection(parameters) for _ in range(2)]
+    acquired = threading.Event()
+
+    def third():
+        conn = Database.get_connection(parameters)
+        acquired.set()
+        conn.close()
+
+    waiter = threading.Thread(target=third)
+    waiter.start()
+    assert not acquired.wait(0.3)
+    held.pop().close()
+    waiter.join(5)
+    assert acquired.is_set()
+    held.pop().close()
+
+    stats = Database.pool_stats(parameters)
+    assert (stats["waits"], stats["peak_in_use"], stats["in_use"]) == (1, 2, 0)
+
+
+def test_exhausted_pool_times_out(postgres_parameters):
+    parameters = dict(postgres_parameters, pool_max_size=1, pool_timeout_seconds=0.2)
+    conn = Database.get_connection(parameters)
+    try:
+        with pytest.raises(PoolError):
+            Database.get_connection(parameters)
+    finally:
+        conn.close()
+
+
+def test_broken_connections_are_replaced(postgres_parameters):
+    parameters = dict(postgres_parameters, pool_health_check_seconds=0)
+    with Database.connection(parameters) as conn:
+        pid = backend_pid(conn)
+
+    # Kill the idle pooled connection from outside the pool
+    other = psycopg2.connect(**Database.connection_kwargs(parameters))
+    with other.cursor() as cur:
+        cur.execute("SELECT pg_terminate_backend(%s);", (pid,))
+    other.commit()
+    other.close()
+
+    with Database.connection(parameters) as conn:
+        assert backend_pid(conn) != pid
+    assert Database.pool_stats(parameters)["health_check_failures"] == 1
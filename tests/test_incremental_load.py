@@ -0,0 +1,114 @@
+import csv
+import os
+
+import pytest
+from conftest import COUNTRIES_PATH, INPUT_DIR, ROUTES_PATH
+
+from methods.airline_routes import AirlineRoutes
+from methods.airports import Airports
+from methods.database import Database
+
+AIRPORTS_PATH = os.path.join(INPUT_DIR, "airports.dat.txt")
+
+
+def write_changed_snapshot(path):
+    """The bundled routes with rows removed, edited (new fingerprint and airports) and added."""
+    with open(ROUTES_PATH, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+
+    changed = []
+    for i, row in enumerate(rows):
+        if i % 50 == 0:
+            continue  # removed
+        if i % 97 == 0:
+            row = row[:8] + [(row[8] + " 999").strip()]  # equipment edit
+        if i % 211 == 0:
+            row = row[:4] + [row[4], "3364"] + row[6:]  # moved to PEK
+            row[4] = "PEK"
+        changed.append(row)
+    changed += [["ZZ", "99999", "PEK", "3364", "HND", "2359", "", "0", "320"],
+                ["ZZ", "99999", "HND", "2359", "SIN", "3316", "", "1", "320 738"]]
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f, lineterminator="\n").writerows(changed)
+    return str(path)
+
+
+def full_load(db_parameters, routes_path):
+    Airports.load_airports_to_db(AIRPORTS_PATH, db_parameters)
+    AirlineRoutes.load_routes_to_db(routes_path, db_parameters)
+    AirlineRoutes.map_asia_flags(db_parameters, COUNTRIES_PATH)
+    Airports.add_columns(db_parameters)
+    Airports.calculate_flights_per_airport(db_parameters)
+
+
+def snapshot(db_parameters):
+    """Routes (as a multiset) and airport counters."""
+    conn = Database.get_connection(db_parameters)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT {', '.join(AirlineRoutes.ROUTE_COLUMNS)}, source_in_asia, dest_in_asia
+                FROM airline_routes;
+            """)
+            routes = sorted(cur.fetchall(), key=repr)
+            cur.execute("""
+                SELECT airport_id, inbound_count, outbound_count, total_in_out
+                FROM airports ORDER BY airport_id;
+            """)
+            return routes, cur.fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def reloaded(tmp_path, postgres_parameters):
+    """A full load of the changed snapshot, the state every incremental path must reach."""
+    changed_path = write_changed_snapshot(tmp_path / "routes_changed.dat")
+    full_load(postgres_parameters, changed_path)
+    return changed_path, snapshot(postgres_parameters)
+
+
+@pytest.fixture
+def incremental_parameters(new_postgres_database):
+    return new_postgres_database()
+
+
+def load_incremental(db_parameters, routes_path):
+    AirlineRoutes.load_routes_incremental(routes_path, db_parameters, countries_path=COUNTRIES_PATH)
+
+
+@pytest.mark.parametrize("triggers", [False, True], ids=["deltas", "triggers"])
+def test_changed_snapshot_matches_full_reload(reloaded, incremental_parameters, triggers):
+    changed_path, expected = reloaded
+    full_load(incremental_parameters, ROUTES_PATH)
+    if triggers:
+        Airports.enable_counter_triggers(incremental_parameters)
+
+    load_incremental(incremental_parameters, ROUTES_PATH)  # adopts every route, changes nothing
+    unchanged = snapshot(incremental_parameters)
+    load_incremental(incremental_parameters, changed_path)
+
+    assert snapshot(incremental_parameters) == expected
+    assert unchanged != expected
+    assert Airports.verify_flight_counts(incremental_parameters) == 0
+
+
+def test_first_snapshot_deletes_routes_it_does_not_list(reloaded, incremental_parameters):
+    # No manifest yet: unmatched routes from the full load must go, not linger
+    changed_path, expected = reloaded
+    full_load(incremental_parameters, ROUTES_PATH)
+    load_incremental(incremental_parameters, changed_path)
+    assert snapshot(incremental_parameters) == expected
+
+
+def test_reapplying_a_snapshot_changes_nothing(reloaded, incremental_parameters):
+    changed_path, expected = reloaded
+    Airports.load_airports_to_db(AIRPORTS_PATH, incremental_parameters)
+    Airports.add_columns(incremental_parameters)
+    load_incremental(incremental_parameters, ROUTES_PATH)
+    AirlineRoutes.map_asia_flags(incremental_parameters, COUNTRIES_PATH)
+    Airports.calculate_flights_per_airport(incremental_parameters)
+    load_incremental(incremental_parameters, changed_path)
+    load_incremental(incremental_parameters, changed_path)
+    assert snapshot(incremental_parameters) == expected
@@ -0,0 +1,30 @@
+from conftest import ROUTES_PATH, parse_outcome
+
+from methods.airline_routes import AirlineRoutes
+
+
+def test_parallel_parse_matches_serial_on_bundled_routes():
+    serial = list(AirlineRoutes.iter_routes(ROUTES_PATH))
+    parallel = list(AirlineRoutes.parse_routes_parallel(ROUTES_PATH, workers=2))
+    assert len(serial) > 60000
+    assert parallel == serial
+
+
+def test_parallel_parse_matches_serial_across_many_ranges(tmp_path, monkeypatch):
+    # Force small byte ranges so rows and line numbers cross range boundaries
+    path = tmp_path / "routes_x3.dat"
+    with open(ROUTES_PATH, "rb") as f:
+        data = f.read()
+    path.write_bytes(data * 3)
+
+    split = AirlineRoutes.split_byte_ranges
+    monkeypatch.setattr(AirlineRoutes, "split_byte_ranges", lambda p, parts, min_chunk_bytes=0: split(p, parts, 64 << 10))
+
+    serial = list(AirlineRoutes.iter_routes(str(path)))
+    assert list(AirlineRoutes.parse_routes_parallel(str(path), workers=2)) == serial
+
+
+def test_parallel_parse_matches_serial_on_edge_cases(edge_case_path):
+    serial = parse_outcome(lambda: AirlineRoutes.iter_routes(edge_case_path))
+    parallel = parse_outcome(lambda: AirlineRoutes.parse_routes_parallel(edge_case_path, workers=2))
+    assert parallel == serial
@@ -0,0 +1,65 @@
+import pytest
+
+from methods.pipeline import Pipeline, Step
+
+
+def closure(deps):
+    """step name -> every step it waits for, directly or not."""
+    upstream = {}
+
+    def visit(name):
+        if name not in upstream:
+            upstream[name] = set()
+            for d in deps[name]:
+                upstream[name] |= {d} | visit(d)
+        return upstream[name]
+
+    for name in deps:
+        visit(name)
+    return upstream
+
+
+def test_writer_waits_for_earlier_readers():
+    steps = [
+        Step("load", None, writes=["t"]),
+        Step("read", None, reads=["t"], writes=["u"]),
+        Step("alter", None, writes=["t"]),
+        Step("report", None, reads=["t"]),
+    ]
+    assert Pipeline.dependencies(steps) == {
+        "load": set(),
+        "read": {"load"},
+        "alter": {"load", "read"},
+        "report": {"load", "alter"},
+    }
+
+
+def test_default_steps_order_every_conflicting_pair():
+    steps = Pipeline.default_steps()
+    upstream = closure(Pipeline.dependencies(steps))
+
+    for i, later in enumerate(steps):
+        for earlier in steps[:i]:
+            conflict = (
+                set(later.reads + later.writes) & set(earlier.writes)
+                or set(later.writes) & set(earlier.reads)
+            )
+            if conflict:
+                assert earlier.name in upstream[later.name], (later.name, earlier.name, conflict)
+
+
+def test_default_steps_dependencies():
+    deps = Pipeline.dependencies(Pipeline.default_steps())
+
+    loaders = {"load_airlines", "load_routes", "load_airports", "load_aircraft"}
+    assert all(deps[name] == set() for name in loaders)
+    assert deps["airport_columns"] == {"load_airports", "map_asia_flags", "route_distances"}
+    assert {"airport_columns", "map_asia_flags", "route_distances"} <= deps["flights_per_airport"]
+    assert deps["unique_airports_report"] == {"load_routes", "load_airlines", "map_asia_flags", "route_distances"}
+
+
+def test_dependencies_reject_bad_steps():
+    with pytest.raises(ValueError):
+        Pipeline.dependencies([Step("a", None), Step("a", None)])
+    with pytest.raises(ValueError):
+        Pipeline.dependencies([Step("a", None, after=["b"]), Step("b", None)])
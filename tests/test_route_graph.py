@@ -0,0 +1,36 @@
+from conftest import excel_rows
+
+from methods.airline_routes import AirlineRoutes
+from methods.report import Report
+
+
+def test_count_asia_routes_matches_sql(loaded_db, loaded_graph):
+    expected = AirlineRoutes.count_asia_routes(loaded_db)
+    assert expected[3] > 0
+    assert AirlineRoutes.count_asia_routes(loaded_db, graph=loaded_graph) == tuple(expected)
+
+
+def test_asia_airline_frequencies_match_sql(loaded_db, loaded_graph):
+    expected = AirlineRoutes.report_asia_airline_frequencies(loaded_db)
+    rows = AirlineRoutes.report_asia_airline_frequencies(loaded_db, graph=loaded_graph)
+    assert len(expected) == 50
+    assert rows == [tuple(r) for r in expected]
+
+
+def test_asia_airline_frequencies_match_sql_without_limit(loaded_db, loaded_graph):
+    expected = AirlineRoutes.report_asia_airline_frequencies(loaded_db, limit=100000)
+    assert len(expected) > 50
+    assert AirlineRoutes.report_asia_airline_frequencies(loaded_db, limit=100000, graph=loaded_graph) == [
+        tuple(r) for r in expected
+    ]
+
+
+def test_airlines_using_top_airports_match_sql(loaded_db, loaded_graph, output_dir):
+    excel_path = output_dir / "top_airports_in_asia_report.xlsx"
+    Report.get_airlines_using_top10_airports(loaded_db)
+    expected = excel_rows(excel_path)
+    excel_path.unlink()
+    Report.get_airlines_using_top10_airports(loaded_db, graph=loaded_graph)
+
+    assert len(expected) > 10
+    assert excel_rows(excel_path) == expected
@@ -0,0 +1,57 @@
+from conftest import ROUTES_PATH, excel_rows, load_input_data
+
+from methods.airline_routes import AirlineRoutes
+from methods.database import Database
+from methods.report import Report
+
+
+def routes_with_keys(db_parameters):
+    conn = Database.get_connection(db_parameters)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT route_key, {', '.join(AirlineRoutes.ROUTE_COLUMNS)} FROM airline_routes;")
+            return sorted(cur.fetchall(), key=repr)
+    finally:
+        conn.close()
+
+
+def reports(db_parameters, output_dir):
+    Report.get_airlines_using_top10_airports(db_parameters)
+    Report.get_airlines_unique_airport_counts(db_parameters)
+    return (
+        AirlineRoutes.count_asia_routes(db_parameters),
+        AirlineRoutes.report_asia_airline_frequencies(db_parameters),
+        excel_rows(output_dir / "top_airports_in_asia_report.xlsx"),
+        excel_rows(output_dir / "airlines_unique_airports_report.xlsx"),
+    )
+
+
+def test_migrated_route_keys_round_trip(postgres_parameters):
+    load_input_data(postgres_parameters)
+    AirlineRoutes.migrate_to_route_key(postgres_parameters)
+    routes = routes_with_keys(postgres_parameters)
+
+    assert len(routes) > 60000
+    assert all(key == AirlineRoutes.route_fingerprint(tuple(route)) for key, *route in routes)
+    assert len({key for key, *_ in routes}) == len(routes)
+
+    # Reloading on the hash key finds every route already there
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, postgres_parameters, use_copy=True, use_route_key=True)
+    assert routes_with_keys(postgres_parameters) == routes
+
+
+def test_route_key_load_matches_migrated_table(new_postgres_database):
+    migrated, loaded = new_postgres_database(), new_postgres_database()
+    load_input_data(migrated)
+    AirlineRoutes.migrate_to_route_key(migrated)
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, loaded, use_route_key=True)
+    assert routes_with_keys(loaded) == routes_with_keys(migrated)
+
+
+def test_reports_on_route_key_schema_match_serial_id_schema(new_postgres_database, output_dir):
+    serial, keyed = new_postgres_database(), new_postgres_database()
+    load_input_data(serial)
+    load_input_data(keyed)
+    AirlineRoutes.migrate_to_route_key(keyed)
+
+    assert reports(keyed, output_dir) == reports(serial, output_dir)
@@ -0,0 +1,64 @@
+import pytest
+from conftest import EDGE_CASES, ROUTES_PATH, parse_outcome
+
+from methods.airline_routes import AirlineRoutes
+from methods.database import Database
+from methods.parsed_cache import ParsedCache
+
+
+def read_mmap(path):
+    return ParsedCache.iter_rows(AirlineRoutes.read_routes(path, use_mmap=True))
+
+
+def test_mmap_reader_matches_csv_reader_on_bundled_routes():
+    rows = [tuple(row) for row in read_mmap(ROUTES_PATH)]
+    assert rows == list(AirlineRoutes.iter_routes(ROUTES_PATH))
+
+
+def test_mmap_reader_matches_csv_reader_on_edge_cases(edge_case_path):
+    csv_rows, csv_error = parse_outcome(lambda: AirlineRoutes.iter_routes(edge_case_path))
+    mmap_rows, mmap_error = parse_outcome(lambda: read_mmap(edge_case_path))
+    # The mmap reader fails before yielding anything; only the error has to match
+    assert mmap_error == csv_error
+    if csv_error is None:
+        assert mmap_rows == csv_rows
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("crlf", ("2B", 410, "ASF", 2966, "KZN", 2990, True, 0, "CR2 737")),
+    ("null_markers", ("ZZ", 1, None, None, "BBB", 2, False, None, None)),
+    ("quoted_fields", ("AB", 2, "C,D", 3, "EEE", 4, False, 0, "738 320")),
+])
+def test_edge_case_last_row(tmp_path, name, expected):
+    path = tmp_path / f"{name}.dat"
+    path.write_bytes(EDGE_CASES[name])
+    assert list(AirlineRoutes.iter_routes(str(path)))[-1] == expected
+    assert tuple(list(read_mmap(str(path)))[-1]) == expected
+
+
+def loaded_routes(db_parameters):
+    conn = Database.get_connection(db_parameters)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {', '.join(AirlineRoutes.ROUTE_COLUMNS)} FROM airline_routes;")
+            return sorted(cur.fetchall(), key=repr)
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("use_copy", [False, True])
+def test_mmap_load_matches_dat_load(db_parameters, tmp_path, use_copy):
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, db_parameters)
+    expected = loaded_routes(db_parameters)
+    assert len(expected) > 60000
+
+    conn = Database.get_connection(db_parameters)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM airline_routes;")
+        conn.commit()
+    finally:
+        conn.close()
+
+    AirlineRoutes.load_routes_to_db(ROUTES_PATH, db_parameters, use_copy=use_copy, use_mmap=True)
+    assert loaded_routes(db_parameters) == expected
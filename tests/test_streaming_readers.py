@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from conftest import COUNTRIES_PATH, excel_rows, load_input_data
+
+from methods.database import Database
+from methods.geo import Geo
+from methods.plot import Plot
+from methods.regions import Regions
+from methods.report import Report
+from methods.route_graph import RouteGraph
+
+ROUTES_SQL = "SELECT route_id, airline_id, airline_code, source_in_asia FROM airline_routes ORDER BY route_id;"
+
+
+def read_frame(db_parameters, sql, params=None):
+    conn = Database.get_connection(db_parameters)
+    try:
+        return Database.read_sql_frame(conn, sql, params)
+    finally:
+        conn.close()
+
+
+def test_read_sql_columns_matches_frame_across_chunks(loaded_db):
+    converters = {
+        "airline_id": RouteGraph.int_column,
+        "source_in_asia": lambda series: RouteGraph.flag_column(series, len(series)),
+    }
+    conn = Database.get_connection(loaded_db)
+    try:
+        stats = Database.query_stats()
+        columns = Database.read_sql_columns(conn, ROUTES_SQL, converters, itersize=7000, stats=stats)
+    finally:
+        conn.close()
+    frame = read_frame(loaded_db, ROUTES_SQL)
+
+    assert stats["rows"] == len(frame) > 60000
+    assert columns["airline_id"].dtype == np.int32 and columns["source_in_asia"].dtype == np.int8
+    assert np.array_equal(columns["airline_id"], RouteGraph.int_column(frame["airline_id"]))
+    assert np.array_equal(columns["source_in_asia"], RouteGraph.flag_column(frame["source_in_asia"], len(frame)))
+    assert columns["airline_code"].tolist() == frame["airline_code"].tolist()
+    assert columns["route_id"].tolist() == frame["route_id"].tolist()
+
+
+def test_streamed_route_distances(db_parameters):
+    load_input_data(db_parameters)
+    assert Geo.compute_route_distances(db_parameters) > 60000
+    assert Geo.compute_route_distances(db_parameters) == 0
+
+    routes = read_frame(db_parameters, """
+        SELECT r.distance_km, s.latitude AS slat, s.longitude AS slon, d.latitude AS dlat, d.longitude AS dlon
+        FROM airline_routes r
+        LEFT JOIN airports s ON s.airport_id = r.source_airport_id
+        LEFT JOIN airports d ON d.airport_id = r.dest_airport_id;
+    """)
+    expected = Geo.haversine_km(routes["slat"], routes["slon"], routes["dlat"], routes["dlon"]).round(3)
+    stored = pd.to_numeric(routes["distance_km"]).to_numpy(dtype=np.float64)
+    assert np.allclose(stored, expected, equal_nan=True)
+
+
+def test_streamed_regional_report_export(db_parameters, output_dir):
+    load_input_data(db_parameters)
+    Regions.standard(COUNTRIES_PATH).apply_to_db(db_parameters)
+    Report.refresh_regional_flow_report(db_parameters)
+
+    count = Report.export_regional_report(db_parameters, "asia")
+    rows = excel_rows(output_dir / "asia_regional_report.xlsx")
+    expected = read_frame(db_parameters, """
+        SELECT f.airline_id, f.flights_total
+        FROM regional_flow_report f
+        JOIN regions g ON g.region_id = f.region_id
+        WHERE g.name = %s;
+    """, ("asia",))
+
+    assert count == len(rows) - 1 == len(expected) > 100
+    header = rows[0]
+    totals = [row[header.index("flights_total")] for row in rows[1:]]
+    assert totals == sorted(totals, reverse=True)
+    assert sum(totals) == expected["flights_total"].sum()
+
+
+def test_streamed_pie_matches_frame_input(loaded_db, output_dir):
+    Report.create_asia_report_table(loaded_db)
+    report = read_frame(loaded_db, "SELECT airline_name, total_flights_to_asia FROM asia_report;")
+
+    Plot.export_asia_report_flights_pie(
+        loaded_db, str(output_dir / "db.png"), 10, True, str(output_dir / "db.xlsx")
+    )
+    Plot.export_asia_report_flights_pie(
+        loaded_db, str(output_dir / "frame.png"), 10, True, str(output_dir / "frame.xlsx"), data=report
+    )
+
+    rows = excel_rows(output_dir / "db.xlsx")
+    assert rows[0] == ("airline_name", "total_flights_to_asia", "label")
+    assert len(rows) - 1 == (report["total_flights_to_asia"].fillna(0) > 0).sum()
+    assert [r[1] for r in rows[1:]] == [r[1] for r in excel_rows(output_dir / "frame.xlsx")[1:]]
+    assert (output_dir / "db.png").exists()